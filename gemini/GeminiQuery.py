@@ -16,6 +16,8 @@ import gemini_utils as util
 from gemini_constants import *
 from gemini_utils import OrderedSet, OrderedDict, itersubclasses, partition
 import compression
+import database
+import genotype_matrix
 from sql_utils import ensure_columns, get_select_cols_and_rest
 from gemini_subjects import get_subjects
 
@@ -311,6 +313,15 @@ class GeminiQuery(object):
             # use the smp2idx dict to access sample genotypes
             idx = smp2idx['NA20814']
             print row, gts[idx]
+
+    Whole-cohort analyses can instead read the genotypes of many variants
+    at once as a numpy matrix, from the memory-mapped copy written by
+    ``gemini build_matrix`` when there is one::
+
+        variant_ids, gt_types = gq.get_genotype_matrix("gt_types",
+                                                       start=1, end=1000)
+        # gt_types[i, smp2idx['NA20814']] is the genotype of NA20814
+        # at the variant variant_ids[i]
     """
 
     def __init__(self, db, include_gt_cols=False,
@@ -336,6 +347,7 @@ class GeminiQuery(object):
         self.idx_to_sample_object = util.map_indices_to_sample_objects(self.c)
         self.formatter = out_format
         self.predicates = [self.formatter.predicate]
+        self._genotype_matrix = None
 
 
     def _set_gemini_browser(self, for_browser):
@@ -437,6 +449,64 @@ class GeminiQuery(object):
         """
         return self.idx_to_sample
 
+    def get_genotype_matrix(self, field="gt_types", start=None, end=None,
+                            samples=None, by_sample=False, variant_ids=None):
+        """
+        Return the variant_ids of the variants from start to end
+        (inclusive, all by default), or of those in variant_ids, and their
+        gt_types, gt_depths or gt_quals for the named samples (all by
+        default) as a numpy variants x samples array, or samples x
+        variants with by_sample::
+
+            gq = GeminiQuery("my.db")
+            ids, depths = gq.get_genotype_matrix("gt_depths",
+                                                 samples=["NA20814"])
+
+        The values are read from the genotype matrix of the database if
+        it has an up to date one, and decompressed from its genotype
+        BLOBs otherwise.
+        """
+        ids, (values, ) = self.get_genotype_matrices([field], start, end,
+                                                     samples, by_sample,
+                                                     variant_ids)
+        return ids, values
+
+    def get_genotype_matrices(self, fields, start=None, end=None,
+                              samples=None, by_sample=False, variant_ids=None):
+        """
+        Same as get_genotype_matrix for a list of fields, returning the
+        variant_ids and a list of one array per field. Without a genotype
+        matrix, the BLOBs of each variant are decompressed once for all
+        of the fields::
+
+            ids, (types, depths) = gq.get_genotype_matrices(
+                ["gt_types", "gt_depths"], variant_ids=[1, 5, 8])
+        """
+        idxs = None
+        if samples is not None:
+            idxs = [self.sample_to_idx[sample] for sample in samples]
+        # a connection of its own, as the query results are iterated and
+        # their connection closed once they are exhausted
+        conn = sqlite3.connect(self.db)
+        try:
+            if self._genotype_matrix is None:
+                self._genotype_matrix = genotype_matrix.open_matrix(
+                    self.db, conn.cursor()) or False
+            if self._genotype_matrix:
+                ids = None
+                matrices = []
+                for field in fields:
+                    ids, values = self._genotype_matrix.get(
+                        field, start, end, idxs, by_sample, variant_ids)
+                    matrices.append(values)
+                return ids, matrices
+            return genotype_matrix.read_matrix(conn.cursor(),
+                                               len(self.sample_to_idx), fields,
+                                               start, end, idxs, by_sample,
+                                               variant_ids)
+        finally:
+            conn.close()
+
     def next(self):
         """
         Return the GeminiRow object for the next query result.
@@ -645,6 +715,8 @@ class GeminiQuery(object):
             # querying the variants table
             self.query = self._add_gt_cols_to_query()
 
+            # the genotypes are only joined to the variants when needed
+            database.join_genotypes(self.c)
             self._execute_query()
 
             self.all_query_cols = [str(tuple[0]) for tuple in self.c.description
@@ -662,6 +734,7 @@ class GeminiQuery(object):
         # the query does not involve the variants table
         # and as such, we don't need to do anything fancy.
         else:
+            database.unjoin_genotypes(self.c)
             self._execute_query()
             self.all_query_cols = [str(tuple[0]) for tuple in self.c.description
                                    if not tuple[0].startswith("gt")]
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+"""
+Persistent cache of the annotations looked up for each variant allele,
+shared by successive `gemini load --annotation-cache FILE` runs.
+
+The cache is an SQLite file with one row per allele, keyed by
+chrom, start, end, ref and alt, that holds the pickled dictionary of
+{annotation source: value} computed for the allele. The rows are only
+valid for the annotation files they were computed from: the cache
+records a fingerprint of the files (name, size and modification time
+of each, plus the gemini version) and empties itself whenever the
+current fingerprint differs.
+
+Each load is a new generation, shared by all of its chunks; rows read
+or written by a load are stamped with its generation, and when the
+cache grows past its size bound the rows of the oldest generations are
+evicted first.
+"""
+import os
+import sqlite3
+import hashlib
+import cPickle
+
+import annotations
+import version
+
+CACHE_VERSION = 1
+DEFAULT_MAX_ENTRIES = 5000000
+
+
+def get_fingerprint():
+    """
+    Identify the current annotation files and gemini version.
+    """
+    fingerprint = hashlib.md5()
+    fingerprint.update("%d %s" % (CACHE_VERSION, version.__version__))
+    anno_files = annotations.get_anno_files()
+    for name in sorted(anno_files):
+        stat = os.stat(anno_files[name])
+        fingerprint.update("\t%s %s %d %d" % (name, os.path.basename(anno_files[name]),
+                                              stat.st_size, int(stat.st_mtime)))
+    return fingerprint.hexdigest()
+
+
+def variant_key(var):
+    return "%s:%d:%d:%s:%s" % (var.CHROM, var.start, var.end, var.REF,
+                               ",".join(str(alt) for alt in var.ALT))
+
+
+class AnnotationCache(object):
+    """
+    An open annotation cache file, for the given generation or else a
+    new one.
+    """
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES, generation=None):
+        self.path = path
+        self.max_entries = max_entries
+        # several loader processes may share the file; wait for their locks
+        self.conn = sqlite3.connect(path, timeout=600, check_same_thread=False)
+        self.conn.isolation_level = None
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS cache_info
+                             (name text PRIMARY KEY, value text)""")
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS annotations
+                             (key text PRIMARY KEY, generation integer,
+                              annos blob)""")
+        self.conn.execute("""CREATE INDEX IF NOT EXISTS annotations_gen_idx
+                             ON annotations(generation)""")
+        info = dict(self.conn.execute("SELECT name, value FROM cache_info"))
+        fingerprint = get_fingerprint()
+        if info.get("fingerprint") != fingerprint:
+            # the annotation files have changed since the cache was filled
+            self.conn.execute("DELETE FROM annotations")
+            self.conn.execute("INSERT OR REPLACE INTO cache_info VALUES "
+                              "('fingerprint', ?)", (fingerprint, ))
+        if generation is None:
+            generation = int(info.get("generation", 0)) + 1
+            self.conn.execute("INSERT OR REPLACE INTO cache_info VALUES "
+                              "('generation', ?)", (str(generation), ))
+        self.generation = generation
+        self.conn.execute("COMMIT")
+        self.hits = self.misses = 0
+
+    def get_many(self, variants):
+        """
+        Return the cached {source: value} dictionary of each variant,
+        or None for variants that are not in the cache.
+        """
+        keys = [variant_key(var) for var in variants]
+        found = {}
+        self.conn.execute("BEGIN IMMEDIATE")
+        # stay well below SQLite's limit on the number of bound parameters
+        for i in xrange(0, len(keys), 500):
+            sub_keys = keys[i:i + 500]
+            marks = ",".join("?" * len(sub_keys))
+            for key, annos in self.conn.execute(
+                    "SELECT key, annos FROM annotations WHERE key IN (%s)"
+                    % marks, sub_keys):
+                found[key] = cPickle.loads(str(annos))
+            self.conn.execute("UPDATE annotations SET generation = ? "
+                              "WHERE key IN (%s) AND generation < ?" % marks,
+                              [self.generation] + sub_keys + [self.generation])
+        self.conn.execute("COMMIT")
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return [found.get(key) for key in keys]
+
+    def put_many(self, items):
+        """
+        Store the {source: value} dictionary of each (variant, annos) pair.
+        """
+        if not items:
+            return
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.executemany("INSERT OR REPLACE INTO annotations VALUES (?,?,?)",
+                              [(variant_key(var), self.generation,
+                                sqlite3.Binary(cPickle.dumps(annos,
+                                                             cPickle.HIGHEST_PROTOCOL)))
+                               for var, annos in items])
+        self.conn.execute("COMMIT")
+
+    def close(self):
+        """
+        Evict the least recently used rows beyond max_entries and close
+        the cache.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        num_entries = self.conn.execute("SELECT count(*) FROM annotations").fetchone()[0]
+        if num_entries > self.max_entries:
+            self.conn.execute("""DELETE FROM annotations WHERE key IN
+                                 (SELECT key FROM annotations
+                                  ORDER BY generation LIMIT ?)""",
+                              (num_entries - self.max_entries, ))
+        self.conn.execute("COMMIT")
+        self.conn.close()
+
+
+def new_generation(path):
+    """
+    Start the generation of a load whose chunks open the cache at path
+    separately, and return it.
+    """
+    cache = AnnotationCache(path)
+    cache.conn.close()
+    return cache.generation
@@ -0,0 +1,514 @@
+#!/usr/bin/env python
+"""
+Compiled, memory-mapped indexes for the allele-level annotation sources
+(dbSNP, ClinVar, ESP, 1000 Genomes, COSMIC and GMS).
+
+`gemini compile_annotations` converts each source VCF into a directory of
+position-sorted numpy columns next to the original file:
+
+    <source>.gidx/meta.json     contigs, max record span per contig, stats
+    <source>.gidx/key.npy       (contig code << 32) | 0-based start, int64
+    <source>.gidx/end.npy       0-based, exclusive record end, int32
+    <source>.gidx/allele.npy    64-bit hash of REF and ALT, uint64
+    <source>.gidx/<col>.npy     typed value columns
+    <source>.gidx/<col>.offsets.npy + <col>.data   string value columns
+
+The loader memory-maps these files and resolves a whole buffer of variants
+with a vectorized binary search (numpy.searchsorted) instead of one tabix
+fetch and INFO parse per variant and source.  Lookups follow the same
+overlap and allele-matching rules as the annotations.get_* functions, so a
+database is identical whether or not the indexes are present.
+"""
+import os
+import sys
+import json
+import zlib
+import shutil
+import collections
+import numpy as np
+import pysam
+
+import annotations
+import load_profile
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".gidx"
+# marks a missing (None) value in a string column.
+NULL_STRING = "\x00"
+
+# dictionary of anno_type -> open AnnotationIndex objects
+indexes = {}
+
+
+def allele_hash(ref, alt):
+    """64-bit hash of a REF/ALT pair used for exact allele matching.
+    """
+    s = "%s\t%s" % (ref, alt)
+    return ((zlib.crc32(s) & 0xffffffff) << 32) | (zlib.adler32(s) & 0xffffffff)
+
+
+def flatten_ranges(lo, hi):
+    """
+    Flatten the [lo, hi) record ranges of each query into parallel
+    (query index, record index) arrays.
+    """
+    counts = np.maximum(hi - lo, 0)
+    qidx = np.repeat(np.arange(len(lo)), counts)
+    first = np.repeat(np.cumsum(counts) - counts, counts)
+    recs = np.arange(counts.sum()) - first + np.repeat(lo, counts)
+    return qidx, recs
+
+
+def _vcf_info_end(hit):
+    """Record end as computed by tabix: the END INFO tag or the REF length.
+    """
+    for info in hit.info.split(";"):
+        if info.startswith("END="):
+            try:
+                return int(info[4:])
+            except ValueError:
+                break
+    return hit.pos + len(hit.ref)
+
+
+def _none_to_nan(value):
+    return np.nan if value is None else value
+
+
+def _nan_to_none(value):
+    return None if np.isnan(value) else float(value)
+
+
+###########################################################################
+# per-source definitions
+###########################################################################
+# - naming: contig naming used when querying the source
+# - mode: "all", "first" or "last" overlapping record, "exact" (all the
+#         records at the same start with the same alleles) or
+#         "first_allele" (first overlapping record, must match alleles)
+# - columns: (name, kind) with kind one of "str", "float" or "int"
+# - parse: hit -> tuple of column values
+# - build: (index, record or None, found) -> value returned by get_* function
+IndexSpec = collections.namedtuple("IndexSpec",
+                                   "naming mode columns parse build skip_contigs")
+
+
+def _parse_id(hit):
+    return (hit.id,)
+
+
+def _build_ids(index, records, found):
+    ids = [index.value("id", r) for r in records]
+    return ",".join(ids) if len(ids) > 0 else None
+
+
+CLINVAR_COLUMNS = ["clinvar_dbsource", "clinvar_dbsource_id",
+                   "clinvar_origin", "clinvar_sig", "clinvar_dsdb",
+                   "clinvar_dsdbid", "clinvar_disease_name",
+                   "clinvar_disease_acc"]
+CLINVAR_FLAGS = ["clinvar_in_omim", "clinvar_in_locus_spec_db",
+                 "clinvar_on_diag_assay"]
+
+
+def _parse_clinvar(hit):
+    clinvar = annotations._parse_clinvar_info(annotations.ClinVarInfo(),
+                                              hit.info)
+    return tuple(getattr(clinvar, c) for c in CLINVAR_COLUMNS + CLINVAR_FLAGS)
+
+
+def _build_clinvar(index, record, found):
+    clinvar = annotations.ClinVarInfo()
+    if record is not None:
+        for c in CLINVAR_COLUMNS + CLINVAR_FLAGS:
+            setattr(clinvar, c, index.value(c, record))
+    return clinvar
+
+
+def _parse_esp(hit):
+    (aaf_EA, aaf_AA, aaf_ALL, exome_chip) = annotations._parse_esp_info(hit.info)
+    return (_none_to_nan(aaf_EA), _none_to_nan(aaf_AA),
+            _none_to_nan(aaf_ALL), int(exome_chip))
+
+
+def _build_esp(index, record, found):
+    if not found:
+        return annotations.ESPInfo(False, None, None, None, False)
+    return annotations.ESPInfo(True,
+                               index.value("aaf_EA", record),
+                               index.value("aaf_AA", record),
+                               index.value("aaf_ALL", record),
+                               index.value("exome_chip", record))
+
+
+THOUSANDG_TAGS = ["AF", "AMR_AF", "ASN_AF", "AFR_AF", "EUR_AF"]
+
+
+def _parse_1000g(hit):
+    info_map = annotations._get_vcf_info_attrs(hit)
+    return tuple(info_map.get(t) for t in THOUSANDG_TAGS)
+
+
+def _build_1000g(index, records, found):
+    # like get_1000G_info, later matching records override the tags they set
+    info_map = {}
+    for record in records:
+        for t in THOUSANDG_TAGS:
+            value = index.value(t, record)
+            if value is not None:
+                info_map[t] = value
+    return annotations._thousandG_info_from_map(len(records) > 0, info_map)
+
+
+GMS_TAGS = ["GMS_{0}".format(x) for x in annotations.GMS_TECHS]
+
+
+def _parse_gms(hit):
+    info_map = annotations._get_vcf_info_attrs(hit)
+    return tuple(info_map.get(t) for t in GMS_TAGS)
+
+
+def _build_gms(index, record, found):
+    return apply(annotations.GmsTechs,
+                 [index.value(t, record) if record is not None else None
+                  for t in GMS_TAGS])
+
+
+SOURCES = {
+    'dbsnp': IndexSpec("grch37", "all", [("id", "str")],
+                       _parse_id, _build_ids, []),
+    'cosmic': IndexSpec("ucsc", "all", [("id", "str")],
+                        _parse_id, _build_ids, []),
+    'clinvar': IndexSpec("grch37", "last",
+                         [(c, "str") for c in CLINVAR_COLUMNS] +
+                         [(c, "int") for c in CLINVAR_FLAGS],
+                         _parse_clinvar, _build_clinvar, []),
+    'esp': IndexSpec("grch37", "first_allele",
+                     [("aaf_EA", "float"), ("aaf_AA", "float"),
+                      ("aaf_ALL", "float"), ("exome_chip", "int")],
+                     _parse_esp, _build_esp, ['Y']),
+    '1000g': IndexSpec("grch37", "exact", [(t, "str") for t in THOUSANDG_TAGS],
+                       _parse_1000g, _build_1000g, []),
+    'gms': IndexSpec("grch37", "first", [(t, "str") for t in GMS_TAGS],
+                     _parse_gms, _build_gms, []),
+}
+INDEXED_SOURCES = ['dbsnp', 'clinvar', 'esp', '1000g', 'cosmic', 'gms']
+
+
+###########################################################################
+# reading compiled indexes
+###########################################################################
+class StringColumn(object):
+    """
+    A memory-mapped column of variable length strings stored as a
+    byte buffer plus n+1 offsets into it.
+    """
+    def __init__(self, path, name):
+        self.offsets = np.load(os.path.join(path, name + ".offsets.npy"),
+                               mmap_mode="r")
+        data_file = os.path.join(path, name + ".data")
+        if os.path.getsize(data_file) > 0:
+            self.data = np.memmap(data_file, dtype=np.uint8, mode="r")
+        else:
+            self.data = np.zeros(0, dtype=np.uint8)
+
+    def __getitem__(self, i):
+        value = self.data[self.offsets[i]:self.offsets[i + 1]].tostring()
+        return None if value == NULL_STRING else value
+
+
+class AnnotationIndex(object):
+    """
+    A compiled annotation source, memory-mapped from disk.
+    """
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.spec = SOURCES[name]
+        with open(os.path.join(path, "meta.json")) as in_handle:
+            self.meta = json.load(in_handle)
+        self.contig_codes = dict((str(c), i) for i, c in
+                                 enumerate(self.meta["contigs"]))
+        self.max_span = dict((str(c), s) for c, s in
+                             self.meta["max_span"].items())
+        self.key = np.load(os.path.join(path, "key.npy"), mmap_mode="r")
+        self.end = np.load(os.path.join(path, "end.npy"), mmap_mode="r")
+        self.allele = np.load(os.path.join(path, "allele.npy"), mmap_mode="r")
+        self.columns = {}
+        self.kinds = {}
+        for col, kind in self.spec.columns:
+            self.kinds[col] = kind
+            if kind == "str":
+                self.columns[col] = StringColumn(path, col)
+            else:
+                self.columns[col] = np.load(os.path.join(path, col + ".npy"),
+                                            mmap_mode="r")
+
+    def value(self, col, record):
+        value = self.columns[col][record]
+        if self.kinds[col] == "float":
+            return _nan_to_none(value)
+        elif self.kinds[col] == "int":
+            return int(value)
+        return value
+
+    def _query_arrays(self, variants):
+        n = len(variants)
+        codes = np.empty(n, dtype=np.int64)
+        starts = np.empty(n, dtype=np.int64)
+        ends = np.empty(n, dtype=np.int64)
+        spans = np.empty(n, dtype=np.int64)
+        for i, var in enumerate(variants):
+            chrom, start, end = annotations._get_var_coords(var, self.spec.naming)
+            codes[i] = self.contig_codes.get(chrom, -1)
+            starts[i] = start
+            ends[i] = end
+            spans[i] = self.max_span.get(chrom, 0)
+        return codes, starts, ends, spans
+
+    def _overlaps(self, codes, starts, ends, spans):
+        known = codes >= 0
+        base = np.where(known, codes, 0) << 32
+        lo = np.searchsorted(self.key,
+                             base | np.maximum(starts - spans + 1, 0), "left")
+        hi = np.searchsorted(self.key, base | ends, "left")
+        hi = np.where(known, hi, lo)
+        qidx, recs = flatten_ranges(lo, hi)
+        keep = self.end[recs] > starts[qidx]
+        return qidx[keep], recs[keep]
+
+    def _exact(self, codes, starts):
+        known = codes >= 0
+        qkey = (np.where(known, codes, 0) << 32) | starts
+        lo = np.searchsorted(self.key, qkey, "left")
+        hi = np.searchsorted(self.key, qkey, "right")
+        hi = np.where(known, hi, lo)
+        return flatten_ranges(lo, hi)
+
+    def lookup(self, variants):
+        """
+        Return one annotation value per variant, equal to what the
+        corresponding annotations.get_* function reports.
+        """
+        n = len(variants)
+        if n == 0:
+            return []
+        mode = self.spec.mode
+        build = self.spec.build
+        codes, starts, ends, spans = self._query_arrays(variants)
+
+        if mode in ("exact", "first_allele"):
+            hashes = np.array([allele_hash(v.REF, v.ALT[0] if v.ALT else None)
+                               for v in variants], dtype=np.uint64)
+
+        if mode == "exact":
+            qidx, recs = self._exact(codes, starts)
+            keep = self.allele[recs] == hashes[qidx]
+            qidx, recs = qidx[keep], recs[keep]
+        else:
+            qidx, recs = self._overlaps(codes, starts, ends, spans)
+
+        if mode in ("all", "exact"):
+            bounds = np.searchsorted(qidx, np.arange(n + 1))
+            return [build(self, recs[bounds[i]:bounds[i + 1]], True)
+                    for i in xrange(n)]
+
+        # reduce to a single record per variant
+        chosen = np.full(n, -1, dtype=np.int64)
+        if mode in ("first", "first_allele"):
+            hit_queries, pick = np.unique(qidx, return_index=True)
+        else:
+            hit_queries, pick = np.unique(qidx[::-1], return_index=True)
+            pick = len(qidx) - 1 - pick
+        chosen[hit_queries] = recs[pick]
+        found = chosen >= 0
+        if mode == "first_allele":
+            found &= self.allele[np.maximum(chosen, 0)] == hashes
+        results = []
+        for i in xrange(n):
+            record = int(chosen[i]) if chosen[i] >= 0 else None
+            if mode == "first_allele" and not found[i]:
+                record = None
+            results.append(build(self, record, bool(found[i])))
+        return results
+
+
+def get_index_dir(anno_file):
+    return anno_file + INDEX_SUFFIX
+
+
+def _source_stat(anno_file):
+    st = os.stat(anno_file)
+    return st.st_size, int(st.st_mtime)
+
+
+def index_is_current(anno_file):
+    """
+    True if a compiled index exists for anno_file and was built
+    from the file as it is now.
+    """
+    meta_file = os.path.join(get_index_dir(anno_file), "meta.json")
+    if not os.path.exists(meta_file):
+        return False
+    with open(meta_file) as in_handle:
+        meta = json.load(in_handle)
+    size, mtime = _source_stat(anno_file)
+    return meta.get("version") == INDEX_VERSION and \
+        meta.get("source_size") == size and \
+        meta.get("source_mtime") == mtime
+
+
+def load_indexes():
+    """
+    Populate a dictionary of AnnotationIndex objects for each source
+    with an up to date compiled index.  Sources without one keep being
+    annotated through their Tabix files; those that were not opened by
+    annotations.load_annos are not selected for the load and are skipped.
+    """
+    indexes.clear()
+    anno_files = annotations.get_anno_files()
+    for name in INDEXED_SOURCES:
+        if name not in annotations.annos:
+            continue
+        anno_file = anno_files.get(name)
+        if anno_file is None or not os.path.exists(get_index_dir(anno_file)):
+            continue
+        if not index_is_current(anno_file):
+            sys.stderr.write("WARNING: the compiled index for %s is out of "
+                             "date; using the Tabix file instead. Run "
+                             "`gemini compile_annotations` to rebuild it.\n"
+                             % name)
+            continue
+        indexes[name] = AnnotationIndex(name, get_index_dir(anno_file))
+    return indexes
+
+
+def get_batch_annotations(variants):
+    """
+    Look up every compiled source for a buffer of variants. Returns one
+    dict of {source: value} per variant.
+    """
+    batch = [{} for v in variants]
+    for name, index in indexes.items():
+        with load_profile.timer("batch_annotation." + name):
+            values = index.lookup(variants)
+        for i, value in enumerate(values):
+            batch[i][name] = value
+    return batch
+
+
+###########################################################################
+# compiling indexes
+###########################################################################
+class _StringColumnWriter(object):
+    def __init__(self, path, name):
+        self.path = path
+        self.name = name
+        self.handle = open(os.path.join(path, name + ".data"), "wb")
+        self.offsets = [0]
+        self.size = 0
+
+    def append(self, value):
+        value = NULL_STRING if value is None else str(value)
+        self.handle.write(value)
+        self.size += len(value)
+        self.offsets.append(self.size)
+
+    def close(self):
+        self.handle.close()
+        np.save(os.path.join(self.path, self.name + ".offsets.npy"),
+                np.array(self.offsets, dtype=np.int64))
+
+
+def compile_index(name, anno_file):
+    """
+    Convert one annotation VCF into a compiled index directory.
+    """
+    spec = SOURCES[name]
+    out_dir = get_index_dir(anno_file)
+    tmp_dir = out_dir + ".tmp"
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+
+    tbx = pysam.Tabixfile(anno_file)
+    contigs = [c for c in tbx.contigs if c not in spec.skip_contigs]
+    keys, ends, alleles = [], [], []
+    values = dict((col, []) for col, kind in spec.columns if kind != "str")
+    writers = dict((col, _StringColumnWriter(tmp_dir, col))
+                   for col, kind in spec.columns if kind == "str")
+    max_span = {}
+    for code, contig in enumerate(contigs):
+        c_keys, c_ends, c_alleles = [], [], []
+        span = 0
+        for hit in tbx.fetch(contig, parser=pysam.asVCF()):
+            end = _vcf_info_end(hit)
+            c_keys.append((code << 32) | hit.pos)
+            c_ends.append(end)
+            c_alleles.append(allele_hash(hit.ref, hit.alt))
+            span = max(span, end - hit.pos)
+            for (col, kind), value in zip(spec.columns, spec.parse(hit)):
+                if kind == "str":
+                    writers[col].append(value)
+                else:
+                    values[col].append(value)
+        max_span[contig] = span
+        keys.append(np.array(c_keys, dtype=np.int64))
+        ends.append(np.array(c_ends, dtype=np.int32))
+        alleles.append(np.array(c_alleles, dtype=np.uint64))
+
+    key = np.concatenate(keys) if keys else np.zeros(0, dtype=np.int64)
+    if len(key) > 1 and np.any(np.diff(key) < 0):
+        shutil.rmtree(tmp_dir)
+        sys.exit("%s is not sorted by position. Exiting." % anno_file)
+    np.save(os.path.join(tmp_dir, "key.npy"), key)
+    np.save(os.path.join(tmp_dir, "end.npy"),
+            np.concatenate(ends) if ends else np.zeros(0, dtype=np.int32))
+    np.save(os.path.join(tmp_dir, "allele.npy"),
+            np.concatenate(alleles) if alleles else np.zeros(0, dtype=np.uint64))
+    for col, kind in spec.columns:
+        if kind == "str":
+            writers[col].close()
+        else:
+            dtype = np.float64 if kind == "float" else np.int8
+            np.save(os.path.join(tmp_dir, col + ".npy"),
+                    np.array(values[col], dtype=dtype))
+
+    size, mtime = _source_stat(anno_file)
+    meta = {"version": INDEX_VERSION,
+            "source": name,
+            "source_file": os.path.basename(anno_file),
+            "source_size": size,
+            "source_mtime": mtime,
+            "contigs": contigs,
+            "max_span": max_span,
+            "records": len(key)}
+    with open(os.path.join(tmp_dir, "meta.json"), "w") as out_handle:
+        json.dump(meta, out_handle)
+
+    if os.path.exists(out_dir):
+        shutil.rmtree(out_dir)
+    os.rename(tmp_dir, out_dir)
+    return len(key)
+
+
+def compile_annotations(parser, args):
+    """
+    Entry point for `gemini compile_annotations`.
+    """
+    sources = INDEXED_SOURCES
+    if args.sources:
+        sources = [s.strip() for s in args.sources.split(",")]
+        unknown = [s for s in sources if s not in SOURCES]
+        if unknown:
+            sys.exit("Cannot compile unknown annotation sources: %s. "
+                     "Options are: %s" % (",".join(unknown),
+                                          ",".join(INDEXED_SOURCES)))
+    anno_files = annotations.get_anno_files()
+    for name in sources:
+        anno_file = anno_files[name]
+        if not args.force and index_is_current(anno_file):
+            print "%s: compiled index is up to date." % name
+            continue
+        print "%s: compiling %s" % (name, os.path.basename(anno_file))
+        records = compile_index(name, anno_file)
+        print "%s: indexed %d records." % (name, records)
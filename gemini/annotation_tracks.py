@@ -0,0 +1,255 @@
+#!/usr/bin/env python
+"""
+In-memory interval engine for the region (BED) annotation tracks.
+
+The records of a track are read one contig at a time, when a variant on
+that contig is first looked up, into position-sorted arrays:
+
+    start:  0-based start
+    maxend: running maximum of end
+    value:  index into the contig's list of distinct record payloads
+
+Only the few contigs looked up last are kept, so a process loading the
+chunks of one chromosome holds that chromosome alone.  A batch of
+variants is then resolved with two numpy.searchsorted calls per contig:
+the first record whose running maximum end lies past the variant start
+and the first record starting at or after the variant end bound the only
+records that can overlap it.  This gives the same hits, in the same order,
+as a tabix fetch, so the results match the annotations.get_* functions.
+"""
+import collections
+import numpy as np
+import pysam
+
+import annotations
+import load_profile
+from annotation_index import flatten_ranges
+
+# dictionary of anno_type -> loaded IntervalTrack objects
+tracks = {}
+
+
+###########################################################################
+# per-track definitions
+###########################################################################
+# - naming: contig naming used when querying the track
+# - fields: tuple columns kept for each record
+# - mode: "any" (bool), "first" overlapping record or "all" records
+# - build: list of record payloads (or the first payload) -> annotation
+TrackSpec = collections.namedtuple("TrackSpec", "naming fields mode build")
+
+
+def _join_or_none(values):
+    return ",".join(values) if len(values) > 0 else None
+
+
+def _build_cyto(hits):
+    return _join_or_none([contig + name for (contig, name) in hits])
+
+
+def _build_names(hits):
+    return _join_or_none([name for (name, ) in hits])
+
+
+def _build_gerp_elements(hits):
+    p_vals = [p for (p, ) in hits]
+    if len(p_vals) == 1:
+        return p_vals[0]
+    elif len(p_vals) > 1:
+        return min(float(p) for p in p_vals)
+    else:
+        return None
+
+
+def _build_tfbs(hits):
+    return _join_or_none([tf + "_" + count for (tf, count) in hits])
+
+
+def _build_grc(hits):
+    regions = set(name for (name, ) in hits)
+    return ",".join(sorted(list(regions))) if len(regions) > 0 else None
+
+
+def _build_recomb(hits):
+    count = 0
+    tot_rate = 0.0
+    for (contig, rate) in hits:
+        if contig not in ['chrY']:
+            count += 1
+            tot_rate += float(rate)
+    return float(tot_rate) / float(count) if count > 0 else None
+
+
+def _build_dnase(hit):
+    if hit is None:
+        return annotations.ENCODEDnaseIClusters(None, None)
+    return apply(annotations.ENCODEDnaseIClusters, hit)
+
+
+def _build_segs(hit):
+    if hit is None:
+        return annotations.ENCODESegInfo(None, None, None, None, None, None)
+    return apply(annotations.ENCODESegInfo, hit)
+
+
+TRACKS = {
+    'cpg_island': TrackSpec("ucsc", (), "any", None),
+    'segdup': TrackSpec("ucsc", (), "any", None),
+    'conserved': TrackSpec("ucsc", (), "any", None),
+    'cse': TrackSpec("grch37", (), "any", None),
+    'cytoband': TrackSpec("ucsc", (0, 3), "all", _build_cyto),
+    'rmsk': TrackSpec("ucsc", (3, ), "all", _build_names),
+    'pfam_domain': TrackSpec("ucsc", (3, ), "all", _build_names),
+    'gerp_elements': TrackSpec("ucsc", (3, ), "all", _build_gerp_elements),
+    'vista_enhancers': TrackSpec("ucsc", (4, ), "all", _build_names),
+    'encode_tfbs': TrackSpec("ucsc", (3, 4), "all", _build_tfbs),
+    'grc': TrackSpec("grch37", (3, ), "all", _build_grc),
+    'recomb': TrackSpec("ucsc", (0, 3), "all", _build_recomb),
+    'encode_dnase1': TrackSpec("ucsc", (3, 5), "first", _build_dnase),
+    'encode_consensus_segs': TrackSpec("ucsc", (3, 4, 5, 6, 7, 8), "first",
+                                       _build_segs),
+}
+
+
+# contigs of each track kept in memory at once
+MAX_LOADED_CONTIGS = 4
+
+
+class ContigRecords(object):
+    """
+    The records of one contig of a track, as sorted numpy arrays, and
+    the distinct payloads their values index.
+    """
+    def __init__(self, starts, ends, values, payloads):
+        starts = np.array(starts, dtype=np.int64)
+        order = np.argsort(starts, kind="mergesort")
+        self.start = starts[order]
+        self.end = np.array(ends, dtype=np.int64)[order]
+        self.maxend = np.maximum.accumulate(self.end) if len(self.end) \
+            else self.end
+        self.value = np.array(values, dtype=np.int32)[order]
+        self.payloads = payloads
+
+
+class IntervalTrack(object):
+    """
+    The records of one BED annotation track, read into memory a contig
+    at a time as variants on it are looked up.
+    """
+    def __init__(self, name, tabix_file):
+        self.name = name
+        self.spec = TRACKS[name]
+        self.tabix_file = tabix_file
+        self.contig_names = set(tabix_file.contigs)
+        self.contigs = collections.OrderedDict()
+
+    def _get_contig(self, contig):
+        """
+        Return the ContigRecords of contig, reading them if needed, or
+        None if the track has no records on it.
+        """
+        if contig not in self.contig_names:
+            return None
+        records = self.contigs.pop(contig, None)
+        if records is None:
+            starts, ends, values = [], [], []
+            payloads, payload_ids = [], {}
+            for hit in self.tabix_file.fetch(contig, parser=pysam.asTuple()):
+                starts.append(int(hit[1]))
+                ends.append(int(hit[2]))
+                payload = tuple(hit[i] for i in self.spec.fields)
+                if payload not in payload_ids:
+                    payload_ids[payload] = len(payloads)
+                    payloads.append(payload)
+                values.append(payload_ids[payload])
+            records = ContigRecords(starts, ends, values, payloads)
+            if len(self.contigs) >= MAX_LOADED_CONTIGS:
+                self.contigs.popitem(last=False)
+        # most recently used last
+        self.contigs[contig] = records
+        return records
+
+    def _overlaps(self, variants):
+        """
+        Return parallel (variant index, payload index) arrays of every
+        overlap between the variants and the track, ordered by variant
+        and then by record start, and the list of payloads they index.
+        """
+        by_contig = collections.defaultdict(list)
+        for i, var in enumerate(variants):
+            chrom, start, end = annotations._get_var_coords(var, self.spec.naming)
+            by_contig[chrom].append((i, start, end))
+        all_qidx, all_values, payloads = [], [], []
+        for contig, queries in by_contig.items():
+            records = self._get_contig(contig)
+            if records is None:
+                continue
+            idx, qstart, qend = [np.array(col, dtype=np.int64)
+                                 for col in zip(*queries)]
+            lo = np.searchsorted(records.maxend, qstart, "right")
+            hi = np.searchsorted(records.start, qend, "left")
+            qidx, recs = flatten_ranges(lo, hi)
+            keep = records.end[recs] > qstart[qidx]
+            all_qidx.append(idx[qidx[keep]])
+            # renumber the payloads hit on this contig into the batch's list
+            used, values = np.unique(records.value[recs[keep]],
+                                     return_inverse=True)
+            all_values.append(values + len(payloads))
+            payloads.extend(records.payloads[v] for v in used)
+        if not all_qidx:
+            return (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32),
+                    payloads)
+        qidx = np.concatenate(all_qidx)
+        values = np.concatenate(all_values)
+        # a stable sort keeps the hits of each variant in record order
+        order = np.argsort(qidx, kind="mergesort")
+        return qidx[order], values[order], payloads
+
+    def lookup(self, variants):
+        """
+        Return one annotation value per variant, equal to what the
+        corresponding annotations.get_* function reports.
+        """
+        n = len(variants)
+        if n == 0:
+            return []
+        qidx, values, payloads = self._overlaps(variants)
+        mode = self.spec.mode
+        if mode == "any":
+            return [bool(x) for x in np.bincount(qidx, minlength=n) > 0]
+        elif mode == "first":
+            chosen = np.full(n, -1, dtype=np.int64)
+            hit_queries, pick = np.unique(qidx, return_index=True)
+            chosen[hit_queries] = values[pick]
+            return [self.spec.build(payloads[c] if c >= 0 else None)
+                    for c in chosen]
+        bounds = np.searchsorted(qidx, np.arange(n + 1))
+        return [self.spec.build([payloads[v] for v in
+                                 values[bounds[i]:bounds[i + 1]]])
+                for i in xrange(n)]
+
+
+def load_tracks():
+    """
+    Set up every BED track with an open Tabix handle (see
+    annotations.load_annos); their records are read as they are needed.
+    """
+    tracks.clear()
+    for name in TRACKS:
+        if name in annotations.annos:
+            tracks[name] = IntervalTrack(name, annotations.annos[name])
+    return tracks
+
+
+def get_batch_annotations(variants):
+    """
+    Look up every loaded track for a buffer of variants. Returns one
+    dict of {track: value} per variant.
+    """
+    batch = [{} for v in variants]
+    for name, track in tracks.items():
+        with load_profile.timer("batch_annotation." + name):
+            values = track.lookup(variants)
+        for i, value in enumerate(values):
+            batch[i][name] = value
+    return batch
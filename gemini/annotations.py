@@ -152,11 +152,65 @@ ThousandGInfo = collections.namedtuple("ThousandGInfo",
                                         aaf_ASN \
                                         aaf_AFR \
                                         aaf_EUR")
+GMS_TECHS = ["illumina", "solid", "iontorrent"]
+GmsTechs = collections.namedtuple("GmsTechs", GMS_TECHS)
 
-def load_annos():
+# sources that are only found once installed with `gemini update --extra`
+EXTRA_SOURCES = ["gerp_bp", "cadd_score"]
+
+
+def _null_tuple(cls):
+    return cls(*[None] * len(cls._fields))
+
+# the value stored for a variant when a source is skipped, such that all of
+# its columns are NULL; the other sources give a single NULL column
+SKIPPED_VALUES = {"clinvar": ClinVarInfo(),
+                  "esp": _null_tuple(ESPInfo),
+                  "1000g": _null_tuple(ThousandGInfo),
+                  "gms": _null_tuple(GmsTechs),
+                  "encode_dnase1": _null_tuple(ENCODEDnaseIClusters),
+                  "encode_consensus_segs": _null_tuple(ENCODESegInfo),
+                  "cadd_score": (None, None)}
+
+
+def _parse_sources(value, known):
+    sources = [s.strip() for s in value.split(",") if s.strip()]
+    unknown = [s for s in sources if s not in known]
+    if unknown:
+        sys.exit("ERROR: unknown annotation source(s): %s. The sources are: "
+                 "%s\n" % (", ".join(unknown), ", ".join(sorted(known))))
+    return sources
+
+
+def get_sources(args):
+    """
+    Return the names of the annotation sources selected for a load: those
+    of --annotations (all of them by default) less those of
+    --skip-annotations, --skip-cadd and --skip-gerp-bp. None are with
+    --defer-annotations, their columns being filled afterwards by
+    `gemini annotate_builtins`.
+    """
+    known = set(get_anno_files().keys() + EXTRA_SOURCES)
+    if getattr(args, "defer_annotations", False):
+        return set()
+    if getattr(args, "annotations", None):
+        sources = set(_parse_sources(args.annotations, known))
+    else:
+        sources = known
+    if getattr(args, "skip_annotations", None):
+        sources -= set(_parse_sources(args.skip_annotations, known))
+    if getattr(args, "skip_cadd", False):
+        sources.discard("cadd_score")
+    if getattr(args, "skip_gerp_bp", False):
+        sources.discard("gerp_bp")
+    return sources
+
+
+def load_annos(sources=None):
     """
     Populate a dictionary of Tabixfile handles for
-    each annotation file.  Other modules can then
+    each annotation file, or for those of the sources
+    given.  Other modules can then
     access a given handle and fetch data from it
     as follows:
 
@@ -164,7 +218,10 @@ def load_annos():
     hits = dbsnp_handle.fetch(chrom, start, end)
     """
     anno_files = get_anno_files()
-    for anno in anno_files: 
+    annos.clear()
+    for anno in anno_files:
+        if sources is not None and anno not in sources:
+            continue
         try:
             # .gz denotes Tabix files.
             if anno_files[anno].endswith(".gz"):
@@ -250,11 +307,17 @@ def _get_var_coords(var, naming):
         chrom = var.CHROM
         start = var.start
         end = var.end
+    return get_chrom_name(chrom, naming), start, end
+
+
+def get_chrom_name(chrom, naming):
+    """Return the name of a chromosome in a naming scheme, ucsc or grch37.
+    """
     if naming == "ucsc":
-        chrom = _get_chr_as_ucsc(chrom)
+        return _get_chr_as_ucsc(chrom)
     elif naming == "grch37":
-        chrom = _get_chr_as_grch37(chrom)
-    return chrom, start, end
+        return _get_chr_as_grch37(chrom)
+    return chrom
 
 def _get_cadd_scores(var, labels, hit):
     """
@@ -465,36 +528,44 @@ def get_clinvar_info(var):
 
     # report the first overlapping ClinVar variant Most often, just one).
     for hit in annotations_in_region(var, "clinvar", "vcf", "grch37"):
-        # load each VCF INFO key/value pair into a DICT
-        info_map = {}
-        for info in hit.info.split(";"):
-            if info.find("=") > 0:
-                (key, value) = info.split("=")
-                info_map[key] = value
-            else:
-                info_map[info] = True
-
-        raw_dbsource = info_map['CLNSRC'] or None
-        #interpret 8-bit strings and convert to plain text
-        clinvar.clinvar_dbsource = unidecode(raw_dbsource.decode('utf-8'))
-        clinvar.clinvar_dbsource_id = info_map['CLNSRCID'] or None
-        clinvar.clinvar_origin           = \
-            clinvar.lookup_clinvar_origin(info_map['CLNORIGIN'])
-        clinvar.clinvar_sig              = \
-            clinvar.lookup_clinvar_significance(info_map['CLNSIG'])
-        clinvar.clinvar_dsdb = info_map['CLNDSDB'] or None
-        clinvar.clinvar_dsdbid = info_map['CLNDSDBID'] or None
-        # Remap all unicode characters into plain text string replacements
-        raw_disease_name = info_map['CLNDBN'] or None
-        clinvar.clinvar_disease_name = unidecode(raw_disease_name.decode('utf-8'))
-        # Clinvar represents commas as \x2c.  Make them commas.
-        clinvar.clinvar_disease_name = clinvar.clinvar_disease_name.decode('string_escape')
-
-        clinvar.clinvar_disease_acc = info_map['CLNACC'] or None
-        clinvar.clinvar_in_omim = 1 if 'OM' in info_map else 0
-        clinvar.clinvar_in_locus_spec_db = 1 if 'LSD' in info_map else 0
-        clinvar.clinvar_on_diag_assay = 1 if 'CDA' in info_map else 0
+        _parse_clinvar_info(clinvar, hit.info)
+
+    return clinvar
 
+
+def _parse_clinvar_info(clinvar, info_string):
+    """
+    Fill a ClinVarInfo object from the INFO field of a ClinVar VCF record.
+    """
+    # load each VCF INFO key/value pair into a DICT
+    info_map = {}
+    for info in info_string.split(";"):
+        if info.find("=") > 0:
+            (key, value) = info.split("=")
+            info_map[key] = value
+        else:
+            info_map[info] = True
+
+    raw_dbsource = info_map['CLNSRC'] or None
+    #interpret 8-bit strings and convert to plain text
+    clinvar.clinvar_dbsource = unidecode(raw_dbsource.decode('utf-8'))
+    clinvar.clinvar_dbsource_id = info_map['CLNSRCID'] or None
+    clinvar.clinvar_origin           = \
+        clinvar.lookup_clinvar_origin(info_map['CLNORIGIN'])
+    clinvar.clinvar_sig              = \
+        clinvar.lookup_clinvar_significance(info_map['CLNSIG'])
+    clinvar.clinvar_dsdb = info_map['CLNDSDB'] or None
+    clinvar.clinvar_dsdbid = info_map['CLNDSDBID'] or None
+    # Remap all unicode characters into plain text string replacements
+    raw_disease_name = info_map['CLNDBN'] or None
+    clinvar.clinvar_disease_name = unidecode(raw_disease_name.decode('utf-8'))
+    # Clinvar represents commas as \x2c.  Make them commas.
+    clinvar.clinvar_disease_name = clinvar.clinvar_disease_name.decode('string_escape')
+
+    clinvar.clinvar_disease_acc = info_map['CLNACC'] or None
+    clinvar.clinvar_in_omim = 1 if 'OM' in info_map else 0
+    clinvar.clinvar_in_locus_spec_db = 1 if 'LSD' in info_map else 0
+    clinvar.clinvar_on_diag_assay = 1 if 'CDA' in info_map else 0
     return clinvar
 
 
@@ -530,7 +601,6 @@ def get_esp_info(var):
     maf = fetched = con = []
     exome_chip = False
     found = False
-    info_map = {}
     for hit in annotations_in_region(var, "esp", "vcf", "grch37"):
         if hit.contig not in ['Y']:
             fetched.append(hit)
@@ -538,40 +608,53 @@ def get_esp_info(var):
             if fetched != None and len(fetched) == 1 and \
                     hit.alt == var.ALT[0] and hit.ref == var.REF:
                 found = True
-                # loads each VCF INFO key/value pair into a DICT
-                for info in hit.info.split(";"):
-                    if info.find("=") > 0:
-                    # splits on first occurence of '='
-                    # useful to handle valuerror: too many values to unpack (e.g (a,b) = split(",", (a,b,c,d)) for cases like
-                    # SA=http://www.ncbi.nlm.nih.gov/sites/varvu?gene=4524&amp%3Brs=1801131|http://omim.org/entry/607093#0004
-                        (key, value) = info.split("=", 1)
-                        info_map[key] = value
-
-                # get the allele counts so that we can compute alternate allele frequencies
-                # example: EA_AC=2,6764;AA_AC=23,3785;TAC=25,10549
-                if info_map.get('EA_AC') is not None:
-                    lines = info_map['EA_AC'].split(",")
-                    aaf_EA = float(lines[0]) / (float(lines[0]) + float(lines[1]))
-
-                if info_map.get('AA_AC') is not None:
-                    lines = info_map['AA_AC'].split(",")
-                    aaf_AA = float(lines[0]) / (float(lines[0]) + float(lines[1]))
-
-                if info_map.get('TAC') is not None:
-                    lines = info_map['TAC'].split(",")
-                    aaf_ALL = float(lines[0]) / (float(lines[0]) + float(lines[1]))
-
-                # Is the SNP on an human exome chip?
-                if info_map.get('EXOME_CHIP') is not None and \
-                        info_map['EXOME_CHIP'] == "no":
-                    exome_chip = 0
-                elif info_map.get('EXOME_CHIP') is not None and \
-                        info_map['EXOME_CHIP'] == "yes":
-                    exome_chip = 1
+                (aaf_EA, aaf_AA, aaf_ALL, exome_chip) = \
+                    _parse_esp_info(hit.info)
 
     return ESPInfo(found, aaf_EA, aaf_AA, aaf_ALL, exome_chip)
 
 
+def _parse_esp_info(info_string):
+    """
+    Extract the alternate allele frequencies and exome chip status
+    from the INFO field of an ESP VCF record.
+    """
+    aaf_EA = aaf_AA = aaf_ALL = None
+    exome_chip = False
+    info_map = {}
+    # loads each VCF INFO key/value pair into a DICT
+    for info in info_string.split(";"):
+        if info.find("=") > 0:
+        # splits on first occurence of '='
+        # useful to handle valuerror: too many values to unpack (e.g (a,b) = split(",", (a,b,c,d)) for cases like
+        # SA=http://www.ncbi.nlm.nih.gov/sites/varvu?gene=4524&amp%3Brs=1801131|http://omim.org/entry/607093#0004
+            (key, value) = info.split("=", 1)
+            info_map[key] = value
+
+    # get the allele counts so that we can compute alternate allele frequencies
+    # example: EA_AC=2,6764;AA_AC=23,3785;TAC=25,10549
+    if info_map.get('EA_AC') is not None:
+        lines = info_map['EA_AC'].split(",")
+        aaf_EA = float(lines[0]) / (float(lines[0]) + float(lines[1]))
+
+    if info_map.get('AA_AC') is not None:
+        lines = info_map['AA_AC'].split(",")
+        aaf_AA = float(lines[0]) / (float(lines[0]) + float(lines[1]))
+
+    if info_map.get('TAC') is not None:
+        lines = info_map['TAC'].split(",")
+        aaf_ALL = float(lines[0]) / (float(lines[0]) + float(lines[1]))
+
+    # Is the SNP on an human exome chip?
+    if info_map.get('EXOME_CHIP') is not None and \
+            info_map['EXOME_CHIP'] == "no":
+        exome_chip = 0
+    elif info_map.get('EXOME_CHIP') is not None and \
+            info_map['EXOME_CHIP'] == "yes":
+        exome_chip = 1
+    return aaf_EA, aaf_AA, aaf_ALL, exome_chip
+
+
 def get_1000G_info(var):
     """
     Returns a suite of annotations from the 1000 Genomes project
@@ -592,6 +675,10 @@ def get_1000G_info(var):
                     info_map[key] = value
             found = True
 
+    return _thousandG_info_from_map(found, info_map)
+
+
+def _thousandG_info_from_map(found, info_map):
     return ThousandGInfo(found, info_map.get('AF'), info_map.get('AMR_AF'),
                          info_map.get('ASN_AF'), info_map.get('AFR_AF'),
                          info_map.get('EUR_AF'))
@@ -672,13 +759,11 @@ def _get_vcf_info_attrs(hit):
 def get_gms(var):
     """Return Genome Mappability Scores for multiple technologies.
     """
-    techs = ["illumina", "solid", "iontorrent"]
-    GmsTechs = collections.namedtuple("GmsTechs", techs)
     hit = _get_first_vcf_hit(
         annotations_in_region(var, "gms", "vcf", "grch37"))
     attr_map = _get_vcf_info_attrs(hit) if hit is not None else {}
     return apply(GmsTechs,
-                 [attr_map.get("GMS_{0}".format(x), None) for x in techs])
+                 [attr_map.get("GMS_{0}".format(x), None) for x in GMS_TECHS])
 
 
 def get_grc(var):
@@ -784,8 +869,10 @@ def get_encode_chromhmm_segs(var):
     return ENCODESegInfo(None, None, None, None, None, None)
 
 
-def get_resources():
-    """Retrieve list of annotation resources loaded into gemini.
+def get_resources(sources=None):
+    """Retrieve list of annotation resources loaded into gemini,
+    or of those of the sources given.
     """
     anno_files = get_anno_files()
-    return [(n, os.path.basename(anno_files[n])) for n in sorted(anno_files.keys())]
+    return [(n, os.path.basename(anno_files[n])) for n in sorted(anno_files.keys())
+            if sources is None or n in sources]
@@ -0,0 +1,412 @@
+#!/usr/bin/env python
+"""
+Read BCF files (or indexed VCF.gz files) with pysam.VariantFile into
+records that look like the cyvcf records the loader is written against,
+so that _prepare_variation and the annotation code need not know which
+reader produced them.
+
+BCF is decoded by htslib, so there is no text to parse; the genotype
+columns of each record are filled straight into numpy arrays. The CSI
+index of a BCF (or the tabix index of a VCF.gz) also lets a multicore
+load split it into genomic ranges (see get_units).
+"""
+import os
+import collections
+import itertools
+import struct
+
+import numpy as np
+import pysam
+
+from gemini_constants import HOM_REF, HET, HOM_ALT, UNKNOWN
+import vcf_split
+
+# the same description of a header INFO line as cyvcf's
+Info = collections.namedtuple('Info', ['id', 'num', 'type', 'desc'])
+
+# a position of a region-parallel load is the index of the contig in the
+# high bits and the 0-based position on it in the low POS_BITS bits
+POS_BITS = 32
+POS_MASK = (1 << POS_BITS) - 1
+
+
+def is_bcf(fname):
+    return fname.endswith(".bcf")
+
+
+def use_pysam(args):
+    """
+    Whether to read the VCF of a load with pysam rather than cyvcf: always
+    for a BCF, which cyvcf cannot read, and on request otherwise.
+    """
+    if args.vcf is None or args.vcf == "-":
+        return False
+    return is_bcf(args.vcf) or getattr(args, "reader", None) == "pysam"
+
+
+def _header_info(info):
+    # Numbers like A, G and . have no fixed count, as in cyvcf
+    num = info.number if isinstance(info.number, int) else None
+    return Info(info.name, num, info.type, info.description)
+
+
+def _float(value):
+    # BCF stores floats in single precision; report the shortest decimal
+    # that reads back as the same float32, i.e. the value in the VCF text
+    return float(repr(np.float32(value)))
+
+
+def _info_value(value, info_type, info_num):
+    """
+    Convert an INFO value from pysam to what cyvcf would have parsed.
+    """
+    if info_type == "Flag":
+        return True
+    elif info_type == "String" or info_type == "Character":
+        # pysam decodes the values of multi-valued strings to unicode
+        if isinstance(value, tuple):
+            return ",".join("." if v is None else str(v) for v in value)
+        return str(value)
+    if not isinstance(value, tuple):
+        value = (value, )
+    if info_type == "Float":
+        value = [None if v is None else _float(v) for v in value]
+    else:
+        value = list(value)
+    return value[0] if info_num == 1 else value
+
+
+class BcfRecord(object):
+    """
+    One variant of a BCF file, with the attributes and properties of a
+    cyvcf record that the loader uses.
+    """
+    __slots__ = ("CHROM", "POS", "ID", "REF", "ALT", "QUAL", "FILTER", "INFO",
+                 "start", "end", "alleles", "gt_bases", "gt_types",
+                 "gt_phases", "gt_depths", "gt_ref_depths", "gt_alt_depths",
+                 "gt_quals")
+
+    def __init__(self, rec, infos, num_samples):
+        self.CHROM = rec.chrom
+        self.POS = rec.pos
+        self.ID = rec.id if rec.id is not None else "."
+        self.REF = rec.ref
+        self.ALT = list(rec.alts) if rec.alts is not None else [None]
+        self.QUAL = _float(rec.qual) if rec.qual is not None else None
+        filters = [f for f in rec.filter.keys() if f != "PASS"]
+        if len(filters) == 0:
+            self.FILTER = None
+        elif len(filters) == 1:
+            self.FILTER = filters[0]
+        else:
+            self.FILTER = filters
+        self.INFO = {}
+        for key, value in rec.info.iteritems():
+            info = infos.get(key)
+            if info is None:
+                # htslib adds the INFO fields missing from the header
+                info = infos[key] = _header_info(rec.header.info[key])
+            self.INFO[key] = _info_value(value, info.type, info.num)
+        self.start = rec.start
+        self.end = self.start + len(self.REF)
+        self.alleles = [self.REF] + self.ALT
+        if num_samples:
+            self._read_genotypes(rec, num_samples)
+        else:
+            self.gt_bases = self.gt_types = self.gt_phases = None
+            self.gt_depths = self.gt_ref_depths = self.gt_alt_depths = None
+            self.gt_quals = None
+
+    def _read_genotypes(self, rec, num_samples):
+        gt_bases = self.gt_bases = []
+        gt_types = self.gt_types = np.empty(num_samples, np.int8)
+        gt_phases = self.gt_phases = np.zeros(num_samples, np.bool)
+        gt_depths = self.gt_depths = np.empty(num_samples, np.int32)
+        gt_ref_depths = self.gt_ref_depths = np.empty(num_samples, np.int32)
+        gt_alt_depths = self.gt_alt_depths = np.empty(num_samples, np.int32)
+        gt_quals = self.gt_quals = np.empty(num_samples, np.float32)
+
+        fmt = set(rec.format.keys())
+        has_dp, has_gq = "DP" in fmt, "GQ" in fmt
+        # allelic depths, GATK style, or Freebayes style
+        has_ad = "AD" in fmt
+        has_ro, has_ao = "RO" in fmt and not has_ad, "AO" in fmt and not has_ad
+        alleles = self.alleles
+        for i, sample in enumerate(rec.samples.itervalues()):
+            gt = sample["GT"] if "GT" in fmt else (None, )
+            if all(a is None for a in gt):
+                gt_bases.append("./.")
+                gt_types[i] = UNKNOWN
+            else:
+                phased = gt_phases[i] = sample.phased
+                gt_bases.append(("|" if phased else "/").join(
+                    "." if a is None else alleles[a] for a in gt))
+                if len(gt) == 2:
+                    if gt[0] == gt[1]:
+                        gt_types[i] = HOM_REF if gt[0] == 0 else HOM_ALT
+                    else:
+                        gt_types[i] = HET
+                elif len(gt) == 1:
+                    gt_types[i] = HOM_REF if gt[0] == 0 else HOM_ALT
+                else:
+                    gt_types[i] = UNKNOWN
+
+            depth = sample["DP"] if has_dp else None
+            gt_depths[i] = depth if depth is not None else -1
+            qual = sample["GQ"] if has_gq else None
+            gt_quals[i] = qual if qual is not None else -1
+            ref_depth = alt_depth = -1
+            if has_ad:
+                depths = sample["AD"]
+                # require bi-allelic
+                if depths is not None and len(depths) == 2:
+                    ref_depth, alt_depth = depths
+            else:
+                if has_ro and sample["RO"] is not None:
+                    ref_depth = sample["RO"]
+                if has_ao:
+                    depth = sample["AO"]
+                    if isinstance(depth, tuple):
+                        depth = depth[0] if len(depth) == 1 else None
+                    if depth is not None:
+                        alt_depth = depth
+            gt_ref_depths[i] = ref_depth if ref_depth is not None else -1
+            gt_alt_depths[i] = alt_depth if alt_depth is not None else -1
+
+    @property
+    def is_snp(self):
+        if len(self.REF) > 1:
+            return False
+        for alt in self.ALT:
+            if alt not in ['A', 'C', 'G', 'T']:
+                return False
+        return True
+
+    @property
+    def is_sv(self):
+        return self.INFO.get('SVTYPE') is not None
+
+    @property
+    def is_indel(self):
+        is_sv = self.is_sv
+        if len(self.REF) > 1 and not is_sv:
+            return True
+        for alt in self.ALT:
+            if alt is None:
+                return True
+            elif len(alt) != len(self.REF):
+                return not is_sv
+        return False
+
+    @property
+    def is_transition(self):
+        if len(self.ALT) > 1 or not self.is_snp:
+            return False
+        return (self.REF, self.ALT[0]) in (('A', 'G'), ('G', 'A'),
+                                           ('C', 'T'), ('T', 'C'))
+
+    @property
+    def is_deletion(self):
+        if len(self.ALT) > 1 or not self.is_indel:
+            return False
+        alt_allele = self.ALT[0]
+        return alt_allele is None or len(self.REF) > len(alt_allele)
+
+    @property
+    def is_sv_precise(self):
+        return self.is_sv and self.INFO.get('IMPRECISE') is None
+
+    @property
+    def var_type(self):
+        if self.is_snp:
+            return "snp"
+        elif self.is_indel:
+            return "indel"
+        elif self.is_sv:
+            return "sv"
+        else:
+            return "unknown"
+
+    @property
+    def var_subtype(self):
+        if self.is_snp:
+            if self.is_transition:
+                return "ts"
+            elif len(self.ALT) == 1:
+                return "tv"
+            else:  # multiple ALT alleles.  unclear
+                return "unknown"
+        elif self.is_indel:
+            if self.is_deletion:
+                return "del"
+            elif len(self.ALT) == 1:
+                return "ins"
+            else:  # multiple ALT alleles.  unclear
+                return "unknown"
+        elif self.is_sv:
+            if self.INFO['SVTYPE'] == "BND":
+                return "complex"
+            elif self.is_sv_precise:
+                return self.INFO['SVTYPE']
+            else:
+                return self.ALT[0].strip('<>')
+        else:
+            return "unknown"
+
+
+
+class BcfReader(object):
+    """
+    Iterate over the records of a BCF (or an indexed VCF.gz) as BcfRecords,
+    optionally only those that start at positions start <= pos < stop,
+    as numbered by region_position, and after the first skip of them.
+    """
+    def __init__(self, fname, start=None, stop=None, skip=0):
+        self.fname = fname
+        self.vcf = pysam.VariantFile(fname)
+        header = self.vcf.header
+        self.samples = list(header.samples)
+        self.metadata = dict((rec.key, rec.value) for rec in header.records
+                             if rec.type == "GENERIC")
+        self.infos = dict((key, _header_info(info))
+                          for key, info in header.info.items())
+        self.start = start
+        self.stop = stop
+        self.skip = skip
+
+    def _records(self):
+        if self.start is None:
+            for rec in self.vcf:
+                yield rec
+            return
+        # the contigs are numbered in the order of the index
+        contigs = list(self.vcf.index.keys())
+        start_tid, stop_tid = self.start >> POS_BITS, self.stop >> POS_BITS
+        for tid in xrange(start_tid, min(stop_tid + 1, len(contigs))):
+            lo = self.start & POS_MASK if tid == start_tid else 0
+            # to the end of the contig, unless it holds stop
+            hi = self.stop & POS_MASK if tid == stop_tid else None
+            if hi is not None and lo >= hi:
+                continue
+            for rec in self.vcf.fetch(contigs[tid], lo, hi):
+                # fetch also returns the records that only overlap lo
+                if rec.start >= lo:
+                    yield rec
+
+    def __iter__(self):
+        num_samples = len(self.samples)
+        for rec in itertools.islice(self._records(), self.skip, None):
+            yield BcfRecord(rec, self.infos, num_samples)
+
+
+###########################################################################
+# splitting an indexed file into genomic ranges for a multicore load
+###########################################################################
+def region_position(tid, pos):
+    """
+    Number a 0-based position on the contig with index tid so that
+    positions of a file sort in file order.
+    """
+    return (tid << POS_BITS) + pos
+
+
+def get_index_file(fname):
+    """
+    Return the CSI or tabix index of a BCF or VCF.gz, or None.
+    """
+    for ext in (".csi", ".tbi"):
+        if os.path.exists(fname + ext):
+            return fname + ext
+    return None
+
+
+def _read_bgzf(fname):
+    """
+    Return the decompressed content of a whole BGZF file.
+    """
+    data = []
+    with open(fname, "rb") as handle:
+        while True:
+            block_size, block = vcf_split._read_block(handle)
+            if not block_size:
+                break
+            data.append(block)
+    return "".join(data)
+
+
+def read_index(index_file):
+    """
+    Return, for each contig in a CSI or tabix index, None if the index
+    has no bins for it, else (number of records, end of the last bin).
+    """
+    data = _read_bgzf(index_file)
+    if data.startswith("CSI\1"):
+        min_shift, depth, l_aux = struct.unpack_from("<iii", data, 4)
+        pos = 16 + l_aux
+        n_ref = struct.unpack_from("<i", data, pos)[0]
+        pos += 4
+    elif data.startswith("TBI\1"):
+        min_shift, depth = 14, 5
+        n_ref = struct.unpack_from("<i", data, 4)[0]
+        # the tabix settings, then the contig names
+        l_nm = struct.unpack_from("<i", data, 32)[0]
+        pos = 36 + l_nm
+    else:
+        raise ValueError("%s is not a CSI or tabix index" % index_file)
+    # the first bin of each level; the bin after them is the pseudo-bin
+    level_starts = [((1 << (3 * level)) - 1) / 7 for level in range(depth + 1)]
+    pseudo_bin = ((1 << (3 * (depth + 1))) - 1) / 7 + 1
+    contigs = []
+    for _ in xrange(n_ref):
+        n_bin = struct.unpack_from("<i", data, pos)[0]
+        pos += 4
+        n_mapped = 0
+        extent = 0
+        for _ in xrange(n_bin):
+            if data.startswith("CSI\1"):
+                bin_id, _, n_chunk = struct.unpack_from("<IQi", data, pos)
+                pos += 16
+            else:
+                bin_id, n_chunk = struct.unpack_from("<Ii", data, pos)
+                pos += 8
+            if bin_id == pseudo_bin:
+                # the file offsets of the contig, then its record counts
+                n_mapped = struct.unpack_from("<Q", data, pos + 16)[0]
+            else:
+                level = max(l for l in range(depth + 1) if level_starts[l] <= bin_id)
+                shift = min_shift + 3 * (depth - level)
+                extent = max(extent, (bin_id - level_starts[level] + 1) << shift)
+            pos += 16 * n_chunk
+        if not data.startswith("CSI\1"):
+            # the linear index of tabix
+            n_intv = struct.unpack_from("<i", data, pos)[0]
+            pos += 4 + 8 * n_intv
+        contigs.append((n_mapped, extent) if n_bin else None)
+    return contigs
+
+
+def get_units(fname, num_units):
+    """
+    Break an indexed BCF or VCF.gz into about num_units (start, stop, cost,
+    ends_chrom) units holding equal numbers of records, as ranges of
+    region_positions. A contig is cut into pieces of equal length when it
+    holds more than its share of the records.
+    """
+    contigs = read_index(get_index_file(fname))
+    total = sum(contig[0] for contig in contigs if contig is not None)
+    target = max(1, total / max(1, num_units))
+    units = []
+    for tid, contig in enumerate(contigs):
+        if contig is None:
+            continue
+        n_mapped, extent = contig
+        pieces = max(1, min(n_mapped / target, extent))
+        starts = [region_position(tid, extent * i / pieces) for i in range(pieces)]
+        # the last piece runs to the start of the next contig
+        stops = starts[1:] + [region_position(tid + 1, 0)]
+        for i in range(pieces):
+            units.append((starts[i], stops[i], max(1, n_mapped / pieces),
+                          i == pieces - 1))
+    if not units:
+        units.append((0, region_position(1, 0), 1, True))
+    return units
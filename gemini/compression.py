@@ -1,21 +1,141 @@
 import zlib
 import cPickle
 import sqlite3
+import struct
 import numpy
 import collections
 
 from gemini_utils import OrderedDict
 
+# optional, faster compressors for the typed genotype codec.
+try:
+    import snappy
+except ImportError:
+    snappy = None
+try:
+    import lz4.block as lz4
+except ImportError:
+    lz4 = None
+
 # http://stackoverflow.com/questions/695794/more-efficient-way-to-
 # pickle-a-string
 
+# Typed genotype BLOBs are laid out as:
+#   magic (4 bytes) | version (uint8) | codec id (uint8) |
+#   dtype length (uint8) | dtype string | ndim (uint8) | shape (uint32 * ndim) |
+#   (compressed) raw array buffer
+# The magic can never start a legacy BLOB, since those are zlib streams
+# and always begin with 0x78.
+GT_MAGIC = "\x93GTB"
+GT_VERSION = 1
+GT_CODECS = {"none": 0, "zlib": 1, "snappy": 2, "lz4": 3}
+GT_CODEC_NAMES = dict((v, k) for k, v in GT_CODECS.items())
+DEFAULT_GT_CODEC = "zlib"
+
+_gt_codec = DEFAULT_GT_CODEC
+
+
+def available_genotype_codecs():
+    """Return the genotype codecs usable in this installation.
+    """
+    codecs = ["none", "zlib"]
+    if snappy is not None:
+        codecs.append("snappy")
+    if lz4 is not None:
+        codecs.append("lz4")
+    return codecs
+
+
+def set_genotype_codec(name):
+    """Select the compressor used for typed genotype BLOBs.
+    """
+    global _gt_codec
+    if name not in available_genotype_codecs():
+        raise ValueError("Genotype codec %s is not available. Options are: %s"
+                         % (name, ", ".join(available_genotype_codecs())))
+    _gt_codec = name
+
+
+def _compress(codec, data):
+    if codec == "none":
+        return data
+    elif codec == "zlib":
+        return zlib.compress(data, 1)
+    elif codec == "snappy":
+        return snappy.compress(data)
+    elif codec == "lz4":
+        return lz4.compress(data)
+
+
+def _decompress(codec, data):
+    if codec == "none":
+        return data
+    elif codec == "zlib":
+        return zlib.decompress(data)
+    elif codec == "snappy":
+        return snappy.decompress(data)
+    elif codec == "lz4":
+        return lz4.decompress(data)
+
+
+def is_typed_blob(blob):
+    return blob is not None and str(blob[:len(GT_MAGIC)]) == GT_MAGIC
+
+
+def pack_genotype_array(arr, codec=None):
+    """Encode a numpy array as a typed genotype BLOB.
+    """
+    codec = codec or _gt_codec
+    arr = numpy.ascontiguousarray(arr)
+    dtype = arr.dtype.str
+    header = struct.pack("<4sBBB", GT_MAGIC, GT_VERSION,
+                         GT_CODECS[codec], len(dtype))
+    header += dtype
+    header += struct.pack("<B%dI" % arr.ndim, arr.ndim, *arr.shape)
+    return header + _compress(codec, arr.tostring())
+
+
+def get_blob_codec(blob):
+    """Return the codec of a typed genotype BLOB, or None for a legacy one.
+    """
+    if not is_typed_blob(blob):
+        return None
+    codec_id = struct.unpack_from("<B", blob, len(GT_MAGIC) + 1)[0]
+    return GT_CODEC_NAMES[codec_id]
+
+
+def unpack_genotype_array(blob):
+    """Decode a typed genotype BLOB without copying the array buffer.
+    """
+    offset = len(GT_MAGIC)
+    version, codec_id, dtype_len = struct.unpack_from("<BBB", blob, offset)
+    if version > GT_VERSION:
+        raise ValueError("Unsupported genotype BLOB version: %d" % version)
+    offset += 3
+    dtype = str(blob[offset:offset + dtype_len])
+    offset += dtype_len
+    ndim = struct.unpack_from("<B", blob, offset)[0]
+    offset += 1
+    shape = struct.unpack_from("<%dI" % ndim, blob, offset)
+    offset += 4 * ndim
+    codec = GT_CODEC_NAMES[codec_id]
+    if codec == "none":
+        arr = numpy.frombuffer(blob, dtype=dtype, offset=offset)
+    else:
+        arr = numpy.frombuffer(_decompress(codec, blob[offset:]), dtype=dtype)
+    return arr.reshape(shape)
+
 
 def pack_blob(obj):
+    if isinstance(obj, numpy.ndarray) and obj.dtype != object:
+        return sqlite3.Binary(pack_genotype_array(obj))
     return sqlite3.Binary(zdumps(obj))
 
 def unpack_genotype_blob(blob):
+    if is_typed_blob(blob):
+        return unpack_genotype_array(blob)
     return numpy.array(cPickle.loads(zlib.decompress(blob)))
-    
+
 def unpack_ordereddict_blob(blob):
 	blob_val = cPickle.loads(zlib.decompress(blob))
 	if blob_val is not None:
@@ -27,3 +147,33 @@ def zdumps(obj):
 
 def zloads(obj):
     return cPickle.loads(zlib.decompress(obj))
+
+
+# unit tests of the genotype codecs
+def _test_genotype_codecs():
+    arrays = [numpy.array([0, 1, 2, 3, -1], dtype=numpy.int8),
+              numpy.array([10, -1, 0, 250, 65536], dtype=numpy.int32),
+              numpy.array([99.0, -1.0, 0.5, 30.25, 0.0], dtype=numpy.float32),
+              numpy.arange(12, dtype=numpy.int32).reshape(3, 4),
+              numpy.array([], dtype=numpy.int8)]
+    for codec in available_genotype_codecs():
+        for arr in arrays:
+            blob = pack_genotype_array(arr, codec)
+            assert get_blob_codec(blob) == codec
+            calc = unpack_genotype_blob(buffer(blob))
+            assert calc.dtype == arr.dtype
+            assert calc.shape == arr.shape
+            assert (calc == arr).all()
+
+def _test_legacy_blobs():
+    gts = ["C/C", "T/C", "./.", "A|G"]
+    gt_types = numpy.array([3, 1, 2, 1])
+    for obj in (gts, gt_types):
+        blob = buffer(zdumps(obj))
+        assert get_blob_codec(blob) is None
+        calc = unpack_genotype_blob(blob)
+        assert list(calc) == list(obj)
+    # the string genotypes are still pickled by pack_blob
+    blob = pack_blob(numpy.array(gts, dtype=object))
+    assert not is_typed_blob(blob)
+    assert list(unpack_genotype_blob(blob)) == gts
@@ -2,6 +2,7 @@
 
 import sqlite3
 import sys
+import uuid
 from itertools import repeat
 import contextlib
 
@@ -9,69 +10,69 @@ from ped import get_ped_fields, default_ped_fields
 
 
 def index_variation(cursor):
-    cursor.execute('''create index var_chr_start_idx on\
+    cursor.execute('''create index if not exists var_chr_start_idx on\
                       variants(chrom, start)''')
-    cursor.execute('''create index var_type_idx on variants(type)''')
-    cursor.execute('''create index var_gt_counts_idx on \
+    cursor.execute('''create index if not exists var_type_idx on variants(type)''')
+    cursor.execute('''create index if not exists var_gt_counts_idx on \
                       variants(num_hom_ref, num_het, \
                                num_hom_alt, num_unknown)''')
-    cursor.execute('''create index var_aaf_idx on variants(aaf)''')
-    cursor.execute('''create index var_in_dbsnp_idx on variants(in_dbsnp)''')
-    cursor.execute('''create index var_in_call_rate_idx on variants(call_rate)''')
-    cursor.execute('''create index var_exonic_idx on variants(is_exonic)''')
-    cursor.execute('''create index var_coding_idx on variants(is_coding)''')
-    cursor.execute('''create index var_lof_idx on variants(is_lof)''')
-    cursor.execute('''create index var_som_idx on variants(is_somatic)''')
-    cursor.execute('''create index var_depth_idx on variants(depth)''')
-    cursor.execute('''create index var_gene_idx on variants(gene)''')
-    cursor.execute('''create index var_trans_idx on variants(transcript)''')
-    cursor.execute('''create index var_impact_idx on variants(impact)''')
-    cursor.execute('''create index var_impact_severity_idx on variants(impact_severity)''')
-    cursor.execute('''create index var_esp_idx on variants(aaf_esp_all)''')
-    cursor.execute('''create index var_1kg_idx on variants(aaf_1kg_all)''')
-    cursor.execute('''create index var_qual_idx on variants(qual)''')
-    cursor.execute('''create index var_homref_idx on variants(num_hom_ref)''')
-    cursor.execute('''create index var_homalt_idx on variants(num_hom_alt)''')
-    cursor.execute('''create index var_het_idx on variants(num_het)''')
-    cursor.execute('''create index var_unk_idx on variants(num_unknown)''')
-    cursor.execute('''create index var_omim_idx on variants(in_omim)''')
-    cursor.execute('''create index var_cadd_raw_idx on variants(cadd_raw)''')
-    cursor.execute('''create index var_cadd_scaled_idx on variants(cadd_scaled)''')
+    cursor.execute('''create index if not exists var_aaf_idx on variants(aaf)''')
+    cursor.execute('''create index if not exists var_in_dbsnp_idx on variants(in_dbsnp)''')
+    cursor.execute('''create index if not exists var_in_call_rate_idx on variants(call_rate)''')
+    cursor.execute('''create index if not exists var_exonic_idx on variants(is_exonic)''')
+    cursor.execute('''create index if not exists var_coding_idx on variants(is_coding)''')
+    cursor.execute('''create index if not exists var_lof_idx on variants(is_lof)''')
+    cursor.execute('''create index if not exists var_som_idx on variants(is_somatic)''')
+    cursor.execute('''create index if not exists var_depth_idx on variants(depth)''')
+    cursor.execute('''create index if not exists var_gene_idx on variants(gene)''')
+    cursor.execute('''create index if not exists var_trans_idx on variants(transcript)''')
+    cursor.execute('''create index if not exists var_impact_idx on variants(impact)''')
+    cursor.execute('''create index if not exists var_impact_severity_idx on variants(impact_severity)''')
+    cursor.execute('''create index if not exists var_esp_idx on variants(aaf_esp_all)''')
+    cursor.execute('''create index if not exists var_1kg_idx on variants(aaf_1kg_all)''')
+    cursor.execute('''create index if not exists var_qual_idx on variants(qual)''')
+    cursor.execute('''create index if not exists var_homref_idx on variants(num_hom_ref)''')
+    cursor.execute('''create index if not exists var_homalt_idx on variants(num_hom_alt)''')
+    cursor.execute('''create index if not exists var_het_idx on variants(num_het)''')
+    cursor.execute('''create index if not exists var_unk_idx on variants(num_unknown)''')
+    cursor.execute('''create index if not exists var_omim_idx on variants(in_omim)''')
+    cursor.execute('''create index if not exists var_cadd_raw_idx on variants(cadd_raw)''')
+    cursor.execute('''create index if not exists var_cadd_scaled_idx on variants(cadd_scaled)''')
 
 
 def index_variation_impacts(cursor):
-    cursor.execute('''create index varimp_exonic_idx on \
+    cursor.execute('''create index if not exists varimp_exonic_idx on \
                       variant_impacts(is_exonic)''')
-    cursor.execute('''create index varimp_coding_idx on \
+    cursor.execute('''create index if not exists varimp_coding_idx on \
                       variant_impacts(is_coding)''')
     cursor.execute(
-        '''create index varimp_lof_idx on variant_impacts(is_lof)''')
-    cursor.execute('''create index varimp_impact_idx on \
+        '''create index if not exists varimp_lof_idx on variant_impacts(is_lof)''')
+    cursor.execute('''create index if not exists varimp_impact_idx on \
                       variant_impacts(impact)''')
-    cursor.execute('''create index varimp_trans_idx on \
+    cursor.execute('''create index if not exists varimp_trans_idx on \
                       variant_impacts(transcript)''')
-    cursor.execute('''create index varimp_gene_idx on \
+    cursor.execute('''create index if not exists varimp_gene_idx on \
                       variant_impacts(gene)''')
 
 
 def index_samples(cursor):
-    cursor.execute('''create unique index sample_name_idx on samples(name)''')
+    cursor.execute('''create unique index if not exists sample_name_idx on samples(name)''')
 
 
 def index_gene_detailed(cursor):
-    cursor.execute('''create index gendet_chrom_gene_idx on \
+    cursor.execute('''create index if not exists gendet_chrom_gene_idx on \
                        gene_detailed(chrom, gene)''')
-    cursor.execute('''create index gendet_rvis_idx on \
+    cursor.execute('''create index if not exists gendet_rvis_idx on \
                        gene_detailed(rvis_pct)''')
-    cursor.execute('''create index gendet_transcript_idx on \
+    cursor.execute('''create index if not exists gendet_transcript_idx on \
                        gene_detailed(transcript)''')
-    cursor.execute('''create index gendet_ccds_idx on \
+    cursor.execute('''create index if not exists gendet_ccds_idx on \
                        gene_detailed(ccds_id)''')
 
 def index_gene_summary(cursor):
-    cursor.execute('''create index gensum_chrom_gene_idx on \
+    cursor.execute('''create index if not exists gensum_chrom_gene_idx on \
                        gene_summary(chrom, gene)''')
-    cursor.execute('''create index gensum_rvis_idx on \
+    cursor.execute('''create index if not exists gensum_rvis_idx on \
                       gene_summary(rvis_pct)''')
 
 def create_indices(cursor):
@@ -102,13 +103,6 @@ def create_tables(cursor):
                     filter text,                                \
                     type text,                                  \
                     sub_type text,                              \
-                    gts blob,                                   \
-                    gt_types blob,                              \
-                    gt_phases blob,                             \
-                    gt_depths blob,                             \
-                    gt_ref_depths blob,                         \
-                    gt_alt_depths blob,                         \
-                    gt_quals blob,                              \
                     call_rate float,                            \
                     in_dbsnp bool,                              \
                     rs_ids text default NULL,                   \
@@ -206,6 +200,8 @@ def create_tables(cursor):
                     cadd_scaled float,                          \
                     PRIMARY KEY(variant_id ASC))''')
 
+    create_variant_genotypes(cursor)
+
     cursor.execute('''create table if not exists variant_impacts  (   \
                     variant_id integer,                               \
                     anno_id integer,                                  \
@@ -285,6 +281,63 @@ def create_tables(cursor):
                     in_cosmic_census bool,                          \
                     PRIMARY KEY(uid ASC))''')
 
+# the genotype columns, stored in the variant_genotypes table
+GENOTYPE_COLUMNS = ["gts", "gt_types", "gt_phases", "gt_depths",
+                    "gt_ref_depths", "gt_alt_depths", "gt_quals"]
+
+
+def create_variant_genotypes(cursor):
+    """
+    Create the table of the genotype BLOBs of the variants. They are kept
+    out of the variants table so that scans of the variants do not read
+    them.
+    """
+    cursor.execute('''create table if not exists variant_genotypes (  \
+                    variant_id integer,                               \
+                    gts blob,                                         \
+                    gt_types blob,                                    \
+                    gt_phases blob,                                   \
+                    gt_depths blob,                                   \
+                    gt_ref_depths blob,                               \
+                    gt_alt_depths blob,                               \
+                    gt_quals blob,                                    \
+                    PRIMARY KEY(variant_id ASC))''')
+
+
+def has_variant_genotypes(cursor):
+    """
+    Return True if the genotypes of a database are in the variant_genotypes
+    table, False if they are in its variants table, as in databases created
+    before that table and not yet migrated (see gemini migrate_genotypes).
+    """
+    cursor.execute("select name from sqlite_master "
+                   "where type='table' and name='variant_genotypes'")
+    return cursor.fetchone() is not None
+
+
+def join_genotypes(cursor):
+    """
+    Give the queries of the cursor's connection the genotype columns as
+    columns of the variants table. A temporary view of the variants joined
+    with their genotypes takes the place of the table; statements writing
+    to the variants must then name it main.variants.
+    """
+    if has_variant_genotypes(cursor):
+        cursor.execute("create temp view if not exists variants as "
+                       "select v.*, " +
+                       ", ".join("g." + col for col in GENOTYPE_COLUMNS) +
+                       " from main.variants v left join main.variant_genotypes g"
+                       " on g.variant_id = v.variant_id")
+
+
+def unjoin_genotypes(cursor):
+    """
+    Undo join_genotypes, so that the queries of the cursor's connection
+    read the variants table itself again.
+    """
+    cursor.execute("drop view if exists temp.variants")
+
+
 def create_sample_table(cursor, args):
     NUM_BUILT_IN = 6
     fields = get_ped_fields(args.ped_file)
@@ -297,22 +350,17 @@ def create_sample_table(cursor, args):
     creation = "create table if not exists samples ({0})".format(structure)
     cursor.execute(creation)
 
+def _get_placeholders(variant):
+    # a variants row may hold values for columns added to the table
+    # after it was created (see get_num_added_columns)
+    return ",".join(list(repeat("?", len(variant))))
+
 def _insert_variation_one_per_transaction(cursor, buffer):
     for variant in buffer:
         try:
             cursor.execute("BEGIN TRANSACTION")
-            cursor.execute('insert into variants values     (?,?,?,?,?,?,?,?,?,?, \
-                                                             ?,?,?,?,?,?,?,?,?,?, \
-                                                             ?,?,?,?,?,?,?,?,?,?, \
-                                                             ?,?,?,?,?,?,?,?,?,?, \
-                                                             ?,?,?,?,?,?,?,?,?,?, \
-                                                             ?,?,?,?,?,?,?,?,?,?, \
-                                                             ?,?,?,?,?,?,?,?,?,?, \
-                                                             ?,?,?,?,?,?,?,?,?,?, \
-                                                             ?,?,?,?,?,?,?,?,?,?, \
-                                                             ?,?,?,?,?,?,?,?,?,?, \
-                                                             ?,?,?,?,?,?,?,?,?,?, \
-                                                             ?,?,?,?)', variant)
+            cursor.execute('insert into variants values ({0})'.format(
+                _get_placeholders(variant)), variant)
             cursor.execute("END TRANSACTION")
         # skip repeated keys until we get to the failed variant
         except sqlite3.IntegrityError, e:
@@ -329,18 +377,8 @@ def insert_variation(cursor, buffer):
     """
     try:
         cursor.execute("BEGIN TRANSACTION")
-        cursor.executemany('insert into variants values (?,?,?,?,?,?,?,?,?,?, \
-                                                         ?,?,?,?,?,?,?,?,?,?, \
-                                                         ?,?,?,?,?,?,?,?,?,?, \
-                                                         ?,?,?,?,?,?,?,?,?,?, \
-                                                         ?,?,?,?,?,?,?,?,?,?, \
-                                                         ?,?,?,?,?,?,?,?,?,?, \
-                                                         ?,?,?,?,?,?,?,?,?,?, \
-                                                         ?,?,?,?,?,?,?,?,?,?, \
-                                                         ?,?,?,?,?,?,?,?,?,?, \
-                                                         ?,?,?,?,?,?,?,?,?,?, \
-                                                         ?,?,?,?,?,?,?,?,?,?, \
-                                                         ?,?,?,?)', buffer)
+        cursor.executemany('insert into variants values ({0})'.format(
+                           _get_placeholders(buffer[0])), buffer)
 
         cursor.execute("END TRANSACTION")
     except sqlite3.ProgrammingError:
@@ -348,6 +386,17 @@ def insert_variation(cursor, buffer):
         _insert_variation_one_per_transaction(cursor, buffer)
 
 
+def insert_variant_genotypes(cursor, buffer):
+    """
+    Populate the variant_genotypes table with the genotypes of each
+    variant in the buffer.
+    """
+    cursor.execute("BEGIN TRANSACTION")
+    cursor.executemany('insert into variant_genotypes values (?,?,?,?,?,?,?,?)',
+                       buffer)
+    cursor.execute("END")
+
+
 def insert_variation_impacts(cursor, buffer):
     """
     Populate the variant_impacts table with each variant in the buffer.
@@ -365,32 +414,18 @@ def insert_sample(cursor, sample_list):
     Populate the samples with sample ids, names, and
     other indicative information.
     """
-<<<<<<< HEAD
-    print 'inserting samples into sqlite'
-=======
->>>>>>> 21164f486cc4cada95efe9e8ad64bea91e9d6caf
     placeholders = ",".join(list(repeat("?", len(sample_list))))
     cursor.execute("BEGIN TRANSACTION")
     cursor.execute("insert into samples values "
                    "({0})".format(placeholders), sample_list)
     cursor.execute("END")
 
-<<<<<<< HEAD
-    print 'execute END'
-
-=======
->>>>>>> 21164f486cc4cada95efe9e8ad64bea91e9d6caf
 def insert_gene_detailed(cursor, table_contents):
     cursor.execute("BEGIN TRANSACTION")
     cursor.executemany('insert into gene_detailed values (?,?,?,?,?,?,?,?,?, \
                                                           ?,?,?,?,?,?,?,?,?, \
                                                           ?)',
                         table_contents)
-<<<<<<< HEAD
-    print 'gene_detailed table contents:'
-    print len(table_contents)
-=======
->>>>>>> 21164f486cc4cada95efe9e8ad64bea91e9d6caf
     cursor.execute("END")
     
 
@@ -404,10 +439,6 @@ def insert_gene_summary(cursor, contents):
 def insert_resources(cursor, resources):
     """Populate table of annotation resources used in this database.
     """
-<<<<<<< HEAD
-    print 'Populating table of annotation resources used in this database.'
-=======
->>>>>>> 21164f486cc4cada95efe9e8ad64bea91e9d6caf
     cursor.execute("BEGIN TRANSACTION")
     cursor.executemany('''insert into resources values (?,?)''', resources)
     cursor.execute("END")
@@ -420,6 +451,113 @@ def insert_version(cursor, version):
     cursor.execute('''insert into version values (?)''', (version,))
     cursor.execute("END")
 
+# the resources entry identifying the genotypes of a database
+LOAD_ID_RESOURCE = "load_id"
+
+
+def set_load_id(cursor):
+    """
+    Record a new identifier of the genotypes of the database in its
+    resources table. It changes with every load, append or add_samples,
+    so copies of the genotypes kept outside of the database (see
+    genotype_matrix) can tell that they are out of date.
+    """
+    cursor.execute("delete from resources where name = ?", (LOAD_ID_RESOURCE,))
+    cursor.execute("insert into resources values (?,?)",
+                   (LOAD_ID_RESOURCE, str(uuid.uuid4())))
+
+
+def get_load_id(cursor):
+    """Return the identifier set by set_load_id, or None."""
+    cursor.execute("select resource from resources where name = ?",
+                   (LOAD_ID_RESOURCE,))
+    row = cursor.fetchone()
+    return None if row is None else row[0]
+
+
+def create_load_checkpoint(cursor):
+    """
+    Create the table recording how far the load of a database has got,
+    so that an interrupted load can be resumed (see gemini load --resume).
+    """
+    cursor.execute('''create table if not exists load_checkpoint ( \
+                     first_variant_id integer,                     \
+                     variant_id integer,                           \
+                     records integer,                              \
+                     skipped integer,                              \
+                     split_start integer,                          \
+                     split_stop integer,                           \
+                     sample_gt_counts blob,                        \
+                     complete bool)''')
+
+
+def create_variant_extras(cursor):
+    """
+    Create the table staging the extra fields of the variants, as JSON,
+    until gemini_annotate.add_extras makes columns of them.
+    """
+    cursor.execute('''create table if not exists variant_extras ( \
+                     variant_id integer primary key,               \
+                     fields text)''')
+
+
+def insert_variant_extras(cursor, extras):
+    """
+    Populate the variant_extras table with (variant_id, JSON) rows.
+    """
+    cursor.execute("BEGIN TRANSACTION")
+    cursor.executemany('''insert into variant_extras values (?,?)''', extras)
+    cursor.execute("END")
+
+
+def update_load_checkpoint(cursor, checkpoint):
+    """
+    Replace the checkpoint of the load, a load_checkpoint row.
+    """
+    cursor.execute("BEGIN TRANSACTION")
+    cursor.execute("delete from load_checkpoint")
+    cursor.execute("insert into load_checkpoint values (?,?,?,?,?,?,?,?)",
+                   checkpoint)
+    cursor.execute("END")
+
+
+def get_load_checkpoint(cursor):
+    """
+    Return the load_checkpoint row of a database, or None if it has none.
+    """
+    cursor.execute("select name from sqlite_master "
+                   "where type='table' and name='load_checkpoint'")
+    if cursor.fetchone() is None:
+        return None
+    cursor.execute("select * from load_checkpoint")
+    return cursor.fetchone()
+
+
+def get_num_added_columns(cursor):
+    """
+    Return the number of columns added to the variants table since it
+    was created, e.g. by gemini annotate; they follow cadd_scaled.
+    """
+    cursor.execute("PRAGMA table_info(variants)")
+    names = [row[1] for row in cursor.fetchall()]
+    return len(names) - names.index("cadd_scaled") - 1
+
+
+def get_sample_names(cursor):
+    """
+    Return the names of the samples of a database, in sample_id order.
+    """
+    cursor.execute("select name from samples order by sample_id")
+    return [row[0] for row in cursor.fetchall()]
+
+
+def get_max_variant_id(cursor):
+    """
+    Return the largest variant_id of a database, 0 if it has no variants.
+    """
+    cursor.execute("select max(variant_id) from variants")
+    return cursor.fetchone()[0] or 0
+
 
 def close_and_commit(cursor, connection):
     """
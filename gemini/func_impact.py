@@ -1,6 +1,115 @@
 import sys
+import collections
+
 import snpEff
 import vep
+import severe_impact
+
+# number of distinct EFF/CSQ transcript strings whose parsed effects are
+# remembered by each EffectParser
+EFFECT_MEMO_SIZE = 50000
+
+
+class EffectParser(object):
+    """
+    Parse the snpEff (EFF) or VEP (CSQ) report of each variant once,
+    yielding every transcript impact and the most severe of them.
+
+    The same transcript strings recur across nearby variants, so the
+    EffectDetails built from each string are kept in a bounded LRU memo.
+    """
+    def __init__(self, args, effect_fields, memo_size=EFFECT_MEMO_SIZE):
+        self.args = args
+        self.effect_fields = effect_fields
+        self.memo_size = memo_size
+        self._memo = collections.OrderedDict()
+        if args.anno_type == "snpEff":
+            self._parse_string = self._parse_snpeff_string
+            self.effect_map = snpEff.effect_map
+        elif args.anno_type == "VEP":
+            self._parse_string = self._parse_vep_string
+            self.effect_map = vep.effect_map
+        else:
+            # should not get here, as the valid -t options should be handled
+            # in main()
+            sys.exit("ERROR: Unsupported variant annotation type.\n")
+
+    def _parse_snpeff_string(self, effect_string):
+        effects = []
+        for impact_string, impact_detail in snpEff.eff_search.findall(effect_string):
+            # the predicted impact is outside the (), all the other
+            # information inside it
+            impact_info = snpEff.effect_map.get(impact_string)
+            effects.append(snpEff.EffectDetails(
+                impact_string,
+                impact_info.priority if impact_info is not None else None,
+                impact_detail, 0, self.args.maj_version))
+        return effects
+
+    def _parse_vep_string(self, effect_string):
+        # nc_transcript_variant&intron_variant|||ENSG00000243485|MIR1302-11|ENST00000
+        effects = []
+        for impact_string in effect_string.split("|")[0].split("&"):
+            impact_info = vep.effect_map.get(impact_string)
+            effects.append(vep.EffectDetails(
+                impact_string,
+                impact_info.priority if impact_info is not None else None,
+                effect_string, 0, self.effect_fields))
+        return effects
+
+    def _get_effects(self, effect_string):
+        """
+        Return the EffectDetails of one transcript string, parsing it
+        only if it is not in the memo.
+        """
+        memo = self._memo
+        effects = memo.pop(effect_string, None)
+        if effects is None:
+            effects = self._parse_string(effect_string)
+            if memo and len(memo) >= self.memo_size:
+                memo.popitem(last=False)
+        memo[effect_string] = effects
+        return effects
+
+    def parse(self, var):
+        """
+        Return (impacts, severe): the list of all the transcript impacts of
+        the variant and the most severe of them (None if there is none).
+        """
+        impacts = []
+        counter = 0  # counter for anno_id
+        if self.args.anno_type == "snpEff":
+            try:
+                effect_strings = var.INFO["EFF"].split(",")
+            except KeyError:
+                effect_strings = []
+                if "SNPEFF_EFFECT" in var.INFO:
+                    impacts.append(snpEff.gatk_effect_details(var.INFO))
+                else:
+                    sys.stderr.write("WARNING: The input VCF has no snpEFF annotations. "
+                                     "Variant impact will be set to unknown\n")
+            # every effect in a transcript string shares its anno_id
+            for effect_string in effect_strings:
+                counter += 1
+                for effect in self._get_effects(effect_string):
+                    if effect.anno_id != counter:
+                        effect = effect.with_anno_id(counter)
+                    impacts.append(effect)
+        else:
+            try:
+                effect_strings = var.INFO["CSQ"].split(",")
+            except KeyError:
+                effect_strings = []
+                sys.stderr.write("WARNING: The input VCF has no VEP annotations. \
+                                 Variant impact will be set to unknown\n")
+            # each consequence term of a transcript string has its own anno_id
+            for effect_string in effect_strings:
+                for effect in self._get_effects(effect_string):
+                    counter += 1
+                    if effect.anno_id != counter:
+                        effect = effect.with_anno_id(counter)
+                    impacts.append(effect)
+        return impacts, severe_impact.pick_severe_impact(impacts, self.effect_map)
 
 
 def interpret_impact(args, var, effect_fields):
@@ -15,87 +124,8 @@ def interpret_impact(args, var, effect_fields):
     CSQ: Consequence|Codons|Amino_acids|Gene|hgnc|Feature|EXON|polyphen|sift
     non_synonymous_codon|gaT/gaG|D/E|ENSG00000116254|CHD5|ENST00000378006|18/25|benign(0.011)|tolerated(0.3)
     nc_transcript_variant|||ENSG00000116254|CHD5|ENST00000491020|5/6||
-    """
-    impact_all = []
-        # holds a list of all the transcript impacts for this variant
-    effect_strings_str = ""
-    effect_strings = []
-    counter = 0  # counter for anno_id
-    if args.anno_type == "snpEff":
-        try:
-            effect_strings_str = var.INFO["EFF"]
-            effect_strings = effect_strings_str.split(",")
-        except KeyError:
-            if "SNPEFF_EFFECT" in var.INFO:
-                impact_all.append(snpEff.gatk_effect_details(var.INFO))
-            else:
-                sys.stderr.write("WARNING: The input VCF has no snpEFF annotations. "
-                                 "Variant impact will be set to unknown\n")
-
-        for effect_string in effect_strings:
-            counter += 1
-            eff_pieces = snpEff.eff_search.findall(effect_string)
-            for piece in eff_pieces:
-                impact_string = piece[0]
-                    # the predicted inpact, which is outside the ()
-                impact_detail = piece[1]
-                    # all the other information, which is inside the ()
-                try:
-                    impact_info = snpEff.effect_map[impact_string]
-                    impact_details = snpEff.EffectDetails(impact_string,
-                                                      impact_info.priority,
-                                                      impact_detail,
-                                                      counter,
-                                                      args.maj_version)
-                except KeyError:
-                    impact_details = snpEff.EffectDetails(impact_string,
-                                                    None,
-                                                    impact_detail,
-                                                    counter,
-                                                    args.maj_version)
-                impact_all.append(impact_details)
 
-    elif args.anno_type == "VEP":
-        try:
-            effect_strings_str = var.INFO["CSQ"]
-            effect_strings = effect_strings_str.split(",")
-        except KeyError:
-            sys.stderr.write("WARNING: The input VCF has no VEP annotations. \
-                             Variant impact will be set to unknown\n")
-
-        for effect_string in effect_strings:
-             # nc_transcript_variant&intron_variant|||ENSG00000243485|MIR1302-11|ENST00000
-            each_string = effect_string.split("|")
-            if "&" in each_string[0]:
-                impact_strings = each_string[0].split("&")
-                # impact_strings will be [nc_transcript_variant,
-                # intron_variant]
-                for impact_string in impact_strings:
-                    counter += 1
-                    try:
-                        impact_info = vep.effect_map[impact_string]
-                        impact_details = vep.EffectDetails(
-                            impact_string, impact_info.priority, effect_string, counter,
-                            effect_fields)
-                    except KeyError:
-                        impact_details = vep.EffectDetails(
-                            impact_string, None, effect_string, counter, effect_fields)
-                    impact_all.append(impact_details)
-            # we expect VEP to produce a valid impact label for each_string[0]
-            elif "&" not in each_string[0]:
-                counter += 1
-                impact_string = each_string[0]
-                impact_info = vep.effect_map.get(impact_string)
-                try:
-                    impact_details = vep.EffectDetails(
-                        impact_string, impact_info.priority, effect_string, counter, effect_fields)
-                except AttributeError:
-                    impact_details = vep.EffectDetails(
-                        impact_string, None, effect_string, counter, effect_fields)
-                impact_all.append(impact_details)
-    else:
-        # should not get here, as the valid -t options should be handled
-        # in main()
-        sys.exit("ERROR: Unsupported variant annotation type.\n")
-
-    return impact_all
+    Loaders parsing many variants should keep an EffectParser instead,
+    which also returns the most severe impact.
+    """
+    return EffectParser(args, effect_fields, memo_size=0).parse(var)[0]
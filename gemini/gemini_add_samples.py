@@ -0,0 +1,327 @@
+#!/usr/bin/env python
+"""
+Add the samples of a VCF called at the sites of an existing database to
+that database, without loading the variants again.
+
+The genotypes of the new samples are first staged in a temporary table,
+keyed by the variant_id of the site they were called at. The variants
+and variant_genotypes tables are then rewritten once, in buffers of
+variants: the genotype arrays of each buffer are extended with those of
+the new samples and the genotype counts, call rate, allele frequency,
+HWE and nucleotide diversity of its variants are recomputed with
+whole-matrix numpy reductions.
+"""
+import os
+import re
+import sys
+import sqlite3
+import collections
+import numpy as np
+
+import cyvcf as vcf
+import bcf_reader
+import compression
+import database
+import popgen
+from compression import pack_blob, unpack_genotype_blob
+from gemini_constants import *
+from ped import load_ped_file
+
+# the columns of the variant_genotypes table, the type of their arrays
+# (None for the genotype strings) and the value given to a new sample at
+# a site that is not in its VCF
+GT_COLUMNS = [("gts", None, "./."),
+              ("gt_types", np.int8, UNKNOWN),
+              ("gt_phases", np.bool, False),
+              ("gt_depths", np.int32, -1),
+              ("gt_ref_depths", np.int32, -1),
+              ("gt_alt_depths", np.int32, -1),
+              ("gt_quals", np.float32, -1)]
+
+
+def _get_vcf_reader(args):
+    if bcf_reader.use_pysam(args):
+        return bcf_reader.BcfReader(args.vcf)
+    return vcf.Reader(open(args.vcf), compressed=args.vcf.endswith(".gz"))
+
+
+def _get_variant_keys(cursor):
+    """
+    Map the (chrom, start, ref, alt) of the variants to their variant_ids,
+    in variant_id order, as a site may have been loaded more than once.
+    """
+    keys = {}
+    cursor.execute("select chrom, start, ref, alt, variant_id from variants "
+                   "order by variant_id")
+    for chrom, start, ref, alt, variant_id in cursor:
+        keys.setdefault((chrom, start, ref, alt), collections.deque()).append(variant_id)
+    return keys
+
+
+def _stage_genotypes(cursor, reader, keys):
+    """
+    Store the genotype arrays of each record of the VCF that matches a
+    variant in temp.new_genotypes, the n-th record of a site going to
+    the n-th variant at that site. Returns the number of records matched
+    and of those that were not.
+    """
+    cursor.execute("create temp table new_genotypes "
+                   "(variant_id integer primary key, " +
+                   ", ".join(name + " blob" for name, _, _ in GT_COLUMNS) + ")")
+    insert = "insert into temp.new_genotypes values (%s)" \
+        % ",".join("?" * (len(GT_COLUMNS) + 1))
+
+    def flush(buffer):
+        cursor.execute("BEGIN TRANSACTION")
+        cursor.executemany(insert, buffer)
+        cursor.execute("END")
+
+    matched = unmatched = 0
+    buffer = []
+    for var in reader:
+        chrom = var.CHROM if var.CHROM.startswith("chr") else "chr" + var.CHROM
+        variant_ids = keys.get((chrom, var.start, var.REF, ','.join(var.ALT)))
+        if not variant_ids:
+            unmatched += 1
+            continue
+        variant_id = variant_ids.popleft()
+        matched += 1
+        # the arrays are read back shortly, so they are left uncompressed
+        arrays = [np.array(var.gt_bases, np.str), var.gt_types,
+                  var.gt_phases, var.gt_depths, var.gt_ref_depths,
+                  var.gt_alt_depths, var.gt_quals]
+        buffer.append([variant_id] +
+                      [sqlite3.Binary(compression.pack_genotype_array(
+                          np.asarray(arr), "none")) for arr in arrays])
+        if len(buffer) >= BUFFER_SIZE:
+            flush(buffer)
+            buffer = []
+    if buffer:
+        flush(buffer)
+    return matched, unmatched
+
+
+def _create_table_like(cursor, table, new_table):
+    """
+    Create new_table with the schema of table, including any columns
+    added to it since it was created.
+    """
+    cursor.execute("select sql from sqlite_master where type='table' and name=?",
+                   (table,))
+    sql = cursor.fetchone()[0]
+    cursor.execute("drop table if exists " + new_table)
+    cursor.execute(re.sub(r"^(create\s+table\s+(if\s+not\s+exists\s+)?)%s\b"
+                          % table, r"\g<1>" + new_table, sql.strip(),
+                          flags=re.IGNORECASE))
+
+
+def _extend_buffer(rows, columns, num_old, num_new):
+    """
+    Return the rows of a buffer of variants with the genotypes of the
+    new samples added and the aggregates recomputed, along with the
+    (num_new x 4) genotype counts of the new samples over the buffer.
+    """
+    n = len(rows)
+    width = len(columns)
+    gt_arrays = []
+    for j, (name, dtype, missing) in enumerate(GT_COLUMNS):
+        missing = np.array(missing, dtype or np.str)
+        # variants without a variant_genotypes row have NULL BLOBs: their
+        # genotypes are missing, as those of genotype_matrix.iter_genotypes
+        old_missing = np.repeat(missing, num_old)
+        old = [old_missing if row[columns[name]] is None
+               else unpack_genotype_blob(row[columns[name]]) for row in rows]
+        new_missing = np.repeat(missing, num_new)
+        new = [new_missing if row[width + j] is None
+               else compression.unpack_genotype_array(row[width + j])
+               for row in rows]
+        arr = np.hstack([np.vstack(old).reshape(n, num_old), np.vstack(new)])
+        gt_arrays.append(arr if dtype is None else arr.astype(dtype))
+
+    # tally the genotypes, both per variant and per new sample
+    gt_types = gt_arrays[1]
+    counts = {}
+    sample_counts = np.zeros((num_new, 4), dtype='uint32')
+    for gt_type in (HOM_REF, HET, HOM_ALT, UNKNOWN):
+        is_type = gt_types == gt_type
+        counts[gt_type] = is_type.sum(axis=1)
+        sample_counts[:, gt_type] = is_type[:, num_old:].sum(axis=0)
+
+    called = counts[HOM_REF] + counts[HET] + counts[HOM_ALT]
+    call_rate = called / float(num_old + num_new)
+    # the same definitions as the loader's
+    with np.errstate(divide="ignore", invalid="ignore"):
+        aaf = np.where(called > 0,
+                       (counts[HET] + 2 * counts[HOM_ALT]) / (2.0 * called),
+                       0.0)
+        n_chroms = 2 * called
+        pi_hat = (n_chroms / (n_chroms - 1.0)) * (2 * aaf * (1 - aaf))
+    hwe, inbreeding_coeff = popgen.get_hwe_likelihoods(
+        counts[HOM_REF], counts[HET], counts[HOM_ALT], aaf)
+
+    new_rows = []
+    for i, row in enumerate(rows):
+        row = list(row[:width])
+        for (name, dtype, _), arr in zip(GT_COLUMNS, gt_arrays):
+            if dtype is None:
+                # as wide as the longest genotype string of this variant
+                row[columns[name]] = pack_blob(np.array(arr[i].tolist(), np.str))
+            else:
+                row[columns[name]] = pack_blob(arr[i])
+        row[columns["num_hom_ref"]] = int(counts[HOM_REF][i])
+        row[columns["num_het"]] = int(counts[HET][i])
+        row[columns["num_hom_alt"]] = int(counts[HOM_ALT][i])
+        row[columns["num_unknown"]] = int(counts[UNKNOWN][i])
+        row[columns["call_rate"]] = float(call_rate[i])
+        # the allele frequency is undefined for multi-allelic variants
+        if "," in row[columns["alt"]]:
+            values = (None, None, None, None)
+        else:
+            values = (float(aaf[i]), float(hwe[i]),
+                      None if np.isnan(inbreeding_coeff[i])
+                      else float(inbreeding_coeff[i]),
+                      float(pi_hat[i]))
+        (row[columns["aaf"]], row[columns["hwe"]],
+         row[columns["inbreeding_coeff"]], row[columns["pi"]]) = values
+        new_rows.append(row)
+    return new_rows, sample_counts
+
+
+def _rewrite_variants(conn, cursor, num_old, num_new):
+    """
+    Write the variants and, with those of the new samples, their genotypes
+    to the tables variants_new and variant_genotypes_new. Returns the
+    genotype counts of the new samples.
+    """
+    _create_table_like(cursor, "variants", "variants_new")
+    _create_table_like(cursor, "variant_genotypes", "variant_genotypes_new")
+    select_cursor = conn.cursor()
+    select_cursor.execute("select v.*, " +
+                          ", ".join("g." + name for name, _, _ in GT_COLUMNS) +
+                          ", " +
+                          ", ".join("n." + name for name, _, _ in GT_COLUMNS) +
+                          " from variants v"
+                          " left join variant_genotypes g"
+                          " on g.variant_id = v.variant_id"
+                          " left join temp.new_genotypes n"
+                          " on n.variant_id = v.variant_id"
+                          " order by v.variant_id")
+    names = [d[0] for d in select_cursor.description][:-len(GT_COLUMNS)]
+    columns = dict((name, i) for i, name in enumerate(names))
+    # the rows hold the variants columns followed by the genotype columns
+    num_columns = len(names) - len(GT_COLUMNS)
+    insert = "insert into variants_new values (%s)" % ",".join("?" * num_columns)
+    insert_genotypes = "insert into variant_genotypes_new values (%s)" \
+        % ",".join("?" * (len(GT_COLUMNS) + 1))
+
+    sample_counts = np.zeros((num_new, 4), dtype='uint32')
+    total = 0
+    while True:
+        rows = select_cursor.fetchmany(BUFFER_SIZE)
+        if not rows:
+            break
+        new_rows, buffer_counts = _extend_buffer(rows, columns,
+                                                 num_old, num_new)
+        sample_counts += buffer_counts
+        cursor.execute("BEGIN TRANSACTION")
+        cursor.executemany(insert, [row[:num_columns] for row in new_rows])
+        cursor.executemany(insert_genotypes,
+                           [[row[columns["variant_id"]]] + row[num_columns:]
+                            for row in new_rows])
+        cursor.execute("END")
+        total += len(rows)
+        print "rewrote", total, "variants"
+    select_cursor.close()
+    return sample_counts
+
+
+def _get_sample_rows(cursor, samples, first_id, ped_file):
+    """
+    Return the samples table rows of the new samples, numbered from
+    first_id, with the fields of the PED file if one is given.
+    """
+    cursor.execute("select * from samples limit 0")
+    num_columns = len(cursor.description)
+    ped_hash = load_ped_file(ped_file) if ped_file is not None else {}
+    sample_rows = []
+    for i, sample in enumerate(samples):
+        if sample in ped_hash:
+            row = [first_id + i] + ped_hash[sample]
+        elif ped_hash:
+            sys.exit("EXITING: sample %s found in the VCF but "
+                     "not in the PED file.\n" % (sample))
+        else:
+            row = [first_id + i, None, sample]
+        if len(row) > num_columns:
+            sys.exit("EXITING: the PED file has more columns than the samples "
+                     "table of the database.\n")
+        sample_rows.append(row + [None] * (num_columns - len(row)))
+    return sample_rows
+
+
+def add_samples(parser, args):
+    if args.db is None or args.vcf is None:
+        parser.print_help()
+        exit("ERROR: add_samples needs both a VCF file and a database file\n")
+    if not os.path.exists(args.db):
+        sys.exit("ERROR: cannot find database file %s.\n" % args.db)
+
+    conn = sqlite3.connect(args.db)
+    conn.isolation_level = None
+    c = conn.cursor()
+    c.execute('PRAGMA synchronous = OFF')
+    c.execute('PRAGMA journal_mode=MEMORY')
+    if not database.has_variant_genotypes(c):
+        sys.exit("ERROR: %s stores its genotypes in the variants table. Run "
+                 "`gemini migrate_genotypes %s` first.\n" % (args.db, args.db))
+
+    reader = _get_vcf_reader(args)
+    old_samples = database.get_sample_names(c)
+    new_samples = list(reader.samples)
+    if not new_samples:
+        sys.exit("ERROR: %s has no samples.\n" % args.vcf)
+    already = set(old_samples).intersection(new_samples)
+    if already:
+        sys.exit("ERROR: samples already in the database: %s\n"
+                 % ", ".join(sorted(already)))
+    c.execute("select gt_types from variant_genotypes limit 1")
+    first = c.fetchone()
+    if first is None or first[0] is None:
+        sys.exit("ERROR: %s has no genotypes to add samples to.\n" % args.db)
+    # keep the genotype codec of the database
+    compression.set_genotype_codec(compression.get_blob_codec(first[0])
+                                   or compression.DEFAULT_GT_CODEC)
+
+    matched, unmatched = _stage_genotypes(c, reader, _get_variant_keys(c))
+    print "{0} records of {1} match variants of the database, " \
+          "{2} do not and are skipped.".format(matched, args.vcf, unmatched)
+    sample_counts = _rewrite_variants(conn, c, len(old_samples),
+                                      len(new_samples))
+
+    c.execute("select max(sample_id) from samples")
+    first_id = (c.fetchone()[0] or 0) + 1
+    sample_rows = _get_sample_rows(c, new_samples, first_id, args.ped_file)
+    c.execute("select sql from sqlite_master where type='index' "
+              "and tbl_name in ('variants', 'variant_genotypes') "
+              "and sql is not null")
+    index_sqls = [row[0] for row in c.fetchall()]
+
+    # replace the variants and add the samples at once
+    c.execute("BEGIN TRANSACTION")
+    for table in ("variants", "variant_genotypes"):
+        c.execute("drop table " + table)
+        c.execute("alter table %s_new rename to %s" % (table, table))
+    for sql in index_sqls:
+        c.execute(sql)
+    c.executemany("insert into samples values (%s)"
+                  % ",".join("?" * len(sample_rows[0])), sample_rows)
+    c.executemany("insert into sample_genotype_counts values (?,?,?,?,?)",
+                  [[len(old_samples) + i, int(counts[HOM_REF]),
+                    int(counts[HET]), int(counts[HOM_ALT]),
+                    int(counts[UNKNOWN])]
+                   for i, counts in enumerate(sample_counts)])
+    database.set_load_id(c)
+    c.execute("END")
+    c.execute("drop table temp.new_genotypes")
+    conn.close()
+    print "Added {0} samples to {1}.".format(len(new_samples), args.db)
@@ -2,16 +2,20 @@
 
 import os
 import sys
+import shutil
 import sqlite3
+import tempfile
+import multiprocessing
 from collections import defaultdict, namedtuple
+from itertools import groupby, izip, tee
 import json
-import subprocess
 
 import numpy as np
 from scipy.stats import mode
 import pysam
 
-from gemini.annotations import annotations_in_region, guess_contig_naming
+from gemini.annotations import annotations_in_region, guess_contig_naming, \
+    get_chrom_name
 from database import database_transaction
 
 def add_requested_columns(args, update_cursor, col_names, col_types=None):
@@ -75,6 +79,9 @@ def _annotate_variants(args, conn, get_val_fn, col_names=None, col_types=None, c
     select_cursor = conn.cursor()
     update_cursor = conn.cursor()
     add_requested_columns(args, select_cursor, col_names, col_types)
+    if getattr(args, "sweep", False):
+        return _sweep_variants(conn, anno, naming, get_val_fn,
+                               col_names, col_types)
 
     last_id = 0
     current_id = 0
@@ -120,6 +127,123 @@ def _update_variants(to_update, col_names, cursor):
         cursor.executemany(update_qry, to_update)
 
 
+def _get_chrom_hits(anno, chrom, naming):
+    """
+    Yield the (start, end, hit) of the annotations of a chromosome, in the
+    order of the file, reading it sequentially from the first of them.
+    """
+    try:
+        hits = anno.fetch(str(get_chrom_name(chrom, naming)),
+                          parser=pysam.asTuple())
+    # the chromosome is not in the annotation file
+    except (ValueError, KeyError):
+        hits = []
+    last_start = 0
+    for hit in hits:
+        start, end = int(hit[1]), int(hit[2])
+        if start < last_start:
+            sys.exit("EXITING: The annotation file is not sorted by position "
+                     "on %s.\n" % chrom)
+        last_start = start
+        yield start, end, hit
+
+
+def _sweep_chrom(variants, intervals):
+    """
+    Merge the variants of a chromosome, sorted by start, with its
+    (start, end, hit) annotation intervals, sorted by start, and yield
+    each variant with the hits overlapping it, in file order.
+
+    The intervals starting up to the end of a variant are kept in an
+    active list, from which those ending before the variant starts are
+    dropped, as they cannot overlap any of the following variants. As
+    with the Tabix queries of the default mode, an interval starting at
+    the end of a variant overlaps it.
+    """
+    intervals = iter(intervals)
+    pending = next(intervals, None)
+    active = []
+    for var in variants:
+        start, end = var["start"], var["end"]
+        while pending is not None and pending[0] <= end:
+            active.append(pending)
+            pending = next(intervals, None)
+        active = [interval for interval in active if interval[1] > start]
+        yield var, [hit for i_start, _, hit in active if i_start <= end]
+
+
+def _sweep_variants(conn, anno, naming, get_val_fn, col_names, col_types=None):
+    """
+    Annotate the variants with a single pass over the annotation file,
+    merge-joining the variants, streamed by chromosome and position, with
+    the annotations of each chromosome. The values are staged in a
+    temporary table and applied to the variants with one UPDATE.
+    """
+    CHUNK_SIZE = 100000
+    col_types = col_types or ["integer"] * len(col_names)
+    cursor = conn.cursor()
+    cursor.execute("DROP TABLE IF EXISTS temp.anno_values")
+    cursor.execute("CREATE TEMP TABLE anno_values (variant_id integer primary key, %s)"
+                   % ", ".join("%s %s" % col for col in zip(col_names, col_types)))
+    insert = "INSERT INTO temp.anno_values VALUES (%s)" \
+        % ",".join("?" * (len(col_names) + 1))
+
+    def flush(to_update):
+        cursor.execute("BEGIN TRANSACTION")
+        cursor.executemany(insert, to_update)
+        cursor.execute("END TRANSACTION")
+
+    select_cursor = conn.cursor()
+    select_cursor.execute("SELECT chrom, start, end, variant_id FROM variants "
+                          "ORDER BY chrom, start")
+    total = 0
+    to_update = []
+    for chrom, variants in groupby(select_cursor, lambda row: row["chrom"]):
+        for var, hits in _sweep_chrom(variants,
+                                      _get_chrom_hits(anno, chrom, naming)):
+            update_data = get_val_fn(hits)
+            if len(update_data) > 0:
+                to_update.append([var["variant_id"]] + update_data)
+            if len(to_update) >= CHUNK_SIZE:
+                flush(to_update)
+                total += len(to_update)
+                print "staged", total, "variants"
+                to_update = []
+    if to_update:
+        flush(to_update)
+        total += len(to_update)
+    select_cursor.close()
+
+    cursor.execute("BEGIN TRANSACTION")
+    _update_from_temp(cursor, "anno_values", col_names)
+    cursor.execute("END TRANSACTION")
+    cursor.execute("DROP TABLE temp.anno_values")
+    print "updated", total, "variants"
+
+
+def _update_from_temp(cursor, table, col_names):
+    """
+    Copy the columns col_names of the temporary table, keyed by
+    variant_id, to the variants with a single UPDATE.
+    """
+    cursor.execute("UPDATE variants SET %s WHERE variant_id IN "
+                   "(SELECT variant_id FROM temp.%s)"
+                   % (", ".join("%s = (SELECT %s FROM temp.%s t "
+                                "WHERE t.variant_id = variants.variant_id)"
+                                % (col_name, col_name, table)
+                                for col_name in col_names), table))
+
+
+def _has_hit(hits):
+    for hit in hits:
+        return [1]
+    return [0]
+
+
+def _get_hit_count(hits):
+    return [len(list(hits))]
+
+
 def annotate_variants_bool(args, conn, col_names):
     """
     Populate a new, user-defined column in the variants
@@ -127,12 +251,7 @@ def annotate_variants_bool(args, conn, col_names):
     overlaps were detected between the variant and the
     annotation file.
     """
-    def has_hit(hits):
-        for hit in hits:
-            return [1]
-        return [0]
-
-    return _annotate_variants(args, conn, has_hit, col_names)
+    return _annotate_variants(args, conn, _has_hit, col_names)
 
 
 def annotate_variants_count(args, conn, col_names):
@@ -142,10 +261,7 @@ def annotate_variants_count(args, conn, col_names):
     between the variant and the
     annotation file.
     """
-    def get_hit_count(hits):
-        return [len(list(hits))]
-
-    return _annotate_variants(args, conn, get_hit_count, col_names)
+    return _annotate_variants(args, conn, _get_hit_count, col_names)
 
 
 def annotate_variants_extract(args, conn, col_names, col_types, col_ops, col_idxs):
@@ -154,6 +270,16 @@ def annotate_variants_extract(args, conn, col_names, col_types, col_ops, col_idx
     table based on the value(s) from a specific column.
     in the annotation file.
     """
+    return _annotate_variants(args, conn,
+                              _get_summarize_fn(args, col_types, col_ops, col_idxs),
+                              col_names, col_types, col_ops)
+
+
+def _get_summarize_fn(args, col_types, col_ops, col_idxs):
+    """
+    Return the function summarizing the values of the extracted columns
+    of the annotations overlapping a variant.
+    """
 
     def _map_list_types(hit_list, col_type):
         try:
@@ -224,48 +350,50 @@ def annotate_variants_extract(args, conn, col_names, col_types, col_ops, col_idx
                 vals.append(val)
 
         return vals
-    return _annotate_variants(args, conn, summarize_hits,
-                              col_names, col_types, col_ops)
+    return summarize_hits
 
-def annotate(parser, args):
 
-    def _validate_args(args):
-        if (args.col_operations or args.col_types or args.col_extracts):
-            sys.exit('EXITING: You may only specify a column name (-c) when '
-                     'using \"-a boolean\" or \"-a count\".\n')
-
-        col_names = args.col_names.split(',')
-        if len(col_names) > 1:
-            sys.exit('EXITING: You may only specify a single column name (-c) '
-                     'when using \"-a boolean\" or \"-a count\".\n')
-        return col_names
-
-    def _validate_extract_args(args):
-        col_ops = args.col_operations.split(',')
-        col_names = args.col_names.split(',')
-        col_types = args.col_types.split(',')
-        col_idxs = args.col_extracts.split(',')
-
-        supported_types = ['text', 'float', 'integer']
-        for col_type in col_types:
-            if col_type not in supported_types:
-                sys.exit('EXITING: Column type [%s] not supported.\n' %
-                         (col_type))
-
-        supported_ops = ['mean', 'median', 'mode', 'min', 'max', 'first',
-                         'last', 'list', 'uniq_list']
-        for col_op in col_ops:
-            if col_op not in supported_ops:
-                sys.exit('EXITING: Column operation [%s] not supported.\n' %
-                         (col_op))
-
-        if not (len(col_ops) == len(col_names) ==
-                len(col_types) == len(col_idxs)):
-            sys.exit('EXITING: The number of column names, numbers, types, and '
-                     'operations must match: [%s], [%s], [%s], [%s]\n' %
-                     (args.col_names, args.col_extracts, args.col_types, args.col_operations))
-
-        return col_names, col_types, col_ops, col_idxs
+def _validate_args(args):
+    if (args.col_operations or args.col_types or args.col_extracts):
+        sys.exit('EXITING: You may only specify a column name (-c) when '
+                 'using \"-a boolean\" or \"-a count\".\n')
+
+    col_names = args.col_names.split(',')
+    if len(col_names) > 1:
+        sys.exit('EXITING: You may only specify a single column name (-c) '
+                 'when using \"-a boolean\" or \"-a count\".\n')
+    return col_names
+
+
+def _validate_extract_args(args):
+    col_ops = args.col_operations.split(',')
+    col_names = args.col_names.split(',')
+    col_types = args.col_types.split(',')
+    col_idxs = args.col_extracts.split(',')
+
+    supported_types = ['text', 'float', 'integer']
+    for col_type in col_types:
+        if col_type not in supported_types:
+            sys.exit('EXITING: Column type [%s] not supported.\n' %
+                     (col_type))
+
+    supported_ops = ['mean', 'median', 'mode', 'min', 'max', 'first',
+                     'last', 'list', 'uniq_list']
+    for col_op in col_ops:
+        if col_op not in supported_ops:
+            sys.exit('EXITING: Column operation [%s] not supported.\n' %
+                     (col_op))
+
+    if not (len(col_ops) == len(col_names) ==
+            len(col_types) == len(col_idxs)):
+        sys.exit('EXITING: The number of column names, numbers, types, and '
+                 'operations must match: [%s], [%s], [%s], [%s]\n' %
+                 (args.col_names, args.col_extracts, args.col_types, args.col_operations))
+
+    return col_names, col_types, col_ops, col_idxs
+
+
+def annotate(parser, args):
 
     if (args.db is None):
         parser.print_help()
@@ -273,6 +401,11 @@ def annotate(parser, args):
     if not os.path.exists(args.db):
         sys.stderr.write("Error: cannot find database file.")
         exit(1)
+    if getattr(args, "manifest", None) is not None:
+        return annotate_manifest(args)
+    if args.anno_file is None or args.col_names is None:
+        parser.print_help()
+        exit(1)
     if not os.path.exists(args.anno_file):
         sys.stderr.write("Error: cannot find annotation file.")
         exit(1)
@@ -302,84 +435,293 @@ def annotate(parser, args):
     # index on the newly created columns
     for col_name in col_names:
         with database_transaction(args.db) as c:
-            c.execute('''create index %s on variants(%s)''' % (col_name + "idx", col_name))
+            c.execute('''create index if not exists %s on variants(%s)'''
+                      % (col_name + "idx", col_name))
 
-# ## Automate addition of extra fields to database
+# ## Annotation with a manifest of annotation files
 
-def add_extras(gemini_db, chunk_dbs):
-    """Annotate gemini database with extra columns from processed chunks, if available.
-    """
-    extra_files = []
-    header_files = []
-    for chunk in chunk_dbs:
-        extra_file, header_file = get_extra_files(chunk)
-        if os.path.exists(extra_file):
-            extra_files.append(extra_file)
-            assert os.path.exists(header_file)
-            header_files.append(header_file)
-    if header_files:
-        header, types = _merge_headers(header_files)
-        ops = ["first" for t in types]
-        extra_beds = [_json_to_bed(x, header) for x in extra_files]
-        final_bed = _merge_beds(extra_beds, gemini_db)
-        Args = namedtuple("Args", "db,anno_file,anno_type,col_operations,col_names,col_types,col_extracts")
-        args = Args(gemini_db, final_bed, "extract", ",".join(ops),
-                    ",".join(header), ",".join(types),
-                    ",".join([str(i + 4) for i in range(len(header))]))
-        annotate(None, args)
-        for fname in extra_beds + [final_bed, final_bed + ".tbi"] + header_files + extra_files:
-            if os.path.exists(fname):
-                os.remove(fname)
-
-def _merge_beds(in_beds, final_db):
-    """Merge BED files into a final sorted output file.
-    """
-    if len(in_beds) == 1:
-        out_file = in_beds[0]
-    else:
-        out_file = "%s.bed" % os.path.splitext(final_db)[0]
-        cmd = "cat %s | sort -k1,1 -k2,2n > %s" % (" ".join(in_beds), out_file)
-        subprocess.check_call(cmd, shell=True)
-    subprocess.check_call(["bgzip", "-f", out_file])
-    bgzip_out = out_file + ".gz"
-    subprocess.check_call(["tabix", "-p", "bed", "-f", bgzip_out])
-    return bgzip_out
-
-def _json_to_bed(fname, header):
-    """Convert JSON output into a BED file in preparation for annotation.
-    """
-    out_file = "%s.bed" % os.path.splitext(fname)[0]
+Annotation = namedtuple("Annotation", "anno_file anno_type col_names "
+                                      "col_extracts col_types col_operations")
+
+
+def read_manifest(fname):
+    """
+    Read the annotations of a manifest, a tab-delimited file with a line
+    per annotation file giving, as for a single `gemini annotate` run, the
+    file (-f), the annotation type (-a) and the column names (-c),
+    followed by the extracted columns (-e), types (-t) and operations (-o)
+    for the extract type. Relative paths are relative to the manifest.
+    """
+    base_dir = os.path.dirname(os.path.abspath(fname))
+    annotations = []
     with open(fname) as in_handle:
-        with open(out_file, "w") as out_handle:
-            for line in in_handle:
-                cur_info = json.loads(line)
-                parts = [str(cur_info.get(h, "")) for h in ["chrom", "start", "end"] + header]
-                out_handle.write("\t".join(parts) + "\n")
-    return out_file
-
-def _merge_headers(header_files):
-    """Merge a set of header files into a single final header for annotating.
-    """
-    ignore = set(["chrom", "start", "end"])
-    ctype_order = ["text", "float", "integer", None]
-    out = {}
-    for h in header_files:
-        with open(h) as in_handle:
-            header = json.loads(in_handle.read())
-            for column, ctype in header.items():
-                if column not in ignore:
-                    cur_ctype = sorted([ctype, out.get(column)], key=lambda x: ctype_order.index(x))[0]
-                    out[column] = cur_ctype
-    headers = []
-    types = []
-    for header in sorted(out.keys()):
-        headers.append(header)
-        types.append(out[header])
-    return headers, types
-
-def get_extra_files(gemini_db):
-    """Retrieve extra file names associated with a gemini database, for flexible loading.
-    """
-    extra_file = "%s-extra.json" % os.path.splitext(gemini_db)[0]
-    extraheader_file = "%s-extraheader.json" % os.path.splitext(gemini_db)[0]
-    return extra_file, extraheader_file
+        for line_num, line in enumerate(in_handle, 1):
+            if not line.strip() or line.startswith("#"):
+                continue
+            fields = [f.strip() or None for f in line.rstrip("\r\n").split("\t")]
+            if len(fields) not in (3, 6):
+                sys.exit("EXITING: line %d of the manifest %s should have 3 "
+                         "(file, type, column) or 6 (file, type, columns, "
+                         "numbers, types, operations) fields.\n"
+                         % (line_num, fname))
+            anno = Annotation(*(fields + [None] * (6 - len(fields))))
+            annotations.append(anno._replace(
+                anno_file=os.path.join(base_dir, anno.anno_file)))
+    if not annotations:
+        sys.exit("EXITING: the manifest %s lists no annotation files.\n" % fname)
+    return annotations
+
+
+def _get_annotation_columns(anno):
+    """
+    Validate an annotation of a manifest and return its column names,
+    column types and the function computing its values from the hits.
+    """
+    if anno.anno_type in ("boolean", "count"):
+        col_names = _validate_args(anno)
+        val_fn = _has_hit if anno.anno_type == "boolean" else _get_hit_count
+        return col_names, ["integer"], val_fn
+    elif anno.anno_type == "extract":
+        if None in (anno.col_extracts, anno.col_types, anno.col_operations):
+            sys.exit("EXITING: %s needs the columns to extract, their types "
+                     "and operations.\n" % anno.anno_file)
+        col_names, col_types, col_ops, col_idxs = _validate_extract_args(anno)
+        return col_names, col_types, \
+            _get_summarize_fn(anno, col_types, col_ops, col_idxs)
+    sys.exit("Unknown annotation type: %s\n" % anno.anno_type)
+
+
+def _get_partitions(conn):
+    """
+    Return the (chrom, first variant_id, last variant_id) of each
+    chromosome, so that its variants can be read by variant_id range.
+    """
+    return conn.execute("SELECT chrom, min(variant_id), max(variant_id) "
+                        "FROM variants GROUP BY chrom").fetchall()
+
+
+def _annotate_partition(task):
+    """
+    Annotate the variants of a chromosome with all of the annotation files
+    in a single pass over its variants, sweeping each file in step, and
+    write the values of each file to its own table of a staging database.
+    """
+    db, (chrom, first_id, last_id), annotations, staging_db = task
+    try:
+        conn = sqlite3.connect(db)
+        conn.row_factory = sqlite3.Row
+        out = sqlite3.connect(staging_db)
+        out.isolation_level = None
+        out_cursor = out.cursor()
+        out_cursor.execute('PRAGMA synchronous = OFF')
+
+        val_fns = []
+        inserts = []
+        sweeps = []
+        select_cursor = conn.cursor()
+        select_cursor.execute("SELECT chrom, start, end, variant_id FROM variants "
+                              "WHERE variant_id BETWEEN ? AND ? AND chrom = ? "
+                              "ORDER BY start", (first_id, last_id, chrom))
+        for i, (anno, variants) in enumerate(zip(annotations,
+                                                 tee(select_cursor, len(annotations)))):
+            col_names, col_types, val_fn = _get_annotation_columns(anno)
+            out_cursor.execute("CREATE TABLE anno_values_%d (variant_id integer primary key, %s)"
+                               % (i, ", ".join("%s %s" % col
+                                               for col in zip(col_names, col_types))))
+            inserts.append("INSERT INTO anno_values_%d VALUES (%s)"
+                           % (i, ",".join("?" * (len(col_names) + 1))))
+            val_fns.append(val_fn)
+            tabix = pysam.Tabixfile(anno.anno_file)
+            sweeps.append(_sweep_chrom(variants, _get_chrom_hits(
+                tabix, chrom, guess_contig_naming(tabix))))
+
+        CHUNK_SIZE = 100000
+        to_update = [[] for anno in annotations]
+
+        def flush():
+            out_cursor.execute("BEGIN TRANSACTION")
+            for insert, rows in zip(inserts, to_update):
+                out_cursor.executemany(insert, rows)
+                del rows[:]
+            out_cursor.execute("END TRANSACTION")
+
+        total = 0
+        # the sweeps consume the variants in step, so that the tee
+        # holds only a few of them
+        for results in izip(*sweeps):
+            for val_fn, rows, (var, hits) in zip(val_fns, to_update, results):
+                update_data = val_fn(hits)
+                if len(update_data) > 0:
+                    rows.append([var["variant_id"]] + update_data)
+            total += 1
+            if total % CHUNK_SIZE == 0:
+                flush()
+        flush()
+        conn.close()
+        out.close()
+    except SystemExit as e:
+        # let the parent exit, rather than leaving the pool hanging
+        return chrom, 0, str(e.code)
+    return chrom, total, None
+
+
+def _apply_staged_values(db, staging_dbs, annotations, annotation_columns):
+    """
+    Apply the values of the staging databases of the partitions with a
+    single UPDATE per annotation file, then index all of the new columns.
+    """
+    conn = sqlite3.connect(db)
+    conn.isolation_level = None
+    c = conn.cursor()
+    c.execute('PRAGMA synchronous = OFF')
+    for i, (col_names, col_types, _) in enumerate(annotation_columns):
+        c.execute("CREATE TEMP TABLE anno_values_%d (variant_id integer primary key, %s)"
+                  % (i, ", ".join("%s %s" % col for col in zip(col_names, col_types))))
+    for staging_db in staging_dbs:
+        c.execute("ATTACH DATABASE ? AS partition", (staging_db,))
+        c.execute("BEGIN TRANSACTION")
+        for i in range(len(annotations)):
+            c.execute("INSERT INTO temp.anno_values_%d SELECT * FROM "
+                      "partition.anno_values_%d" % (i, i))
+        c.execute("END TRANSACTION")
+        c.execute("DETACH DATABASE partition")
+
+    c.execute("BEGIN TRANSACTION")
+    for i, (col_names, _, _) in enumerate(annotation_columns):
+        _update_from_temp(c, "anno_values_%d" % i, col_names)
+    c.execute("END TRANSACTION")
+
+    # index on the newly created columns
+    c.execute("BEGIN TRANSACTION")
+    for col_names, _, _ in annotation_columns:
+        for col_name in col_names:
+            c.execute('''create index if not exists %s on variants(%s)'''
+                      % (col_name + "idx", col_name))
+    c.execute("END TRANSACTION")
+    conn.close()
+
+
+def annotate_manifest(args):
+    """
+    Annotate the variants with all of the annotation files of a manifest
+    at once. The chromosomes are annotated by a pool of processes, each
+    writing the values of its chromosome to a staging database, and the
+    values are then applied to the variants table in a final step.
+    """
+    annotations = read_manifest(args.manifest)
+    for anno in annotations:
+        if not os.path.exists(anno.anno_file):
+            sys.exit("EXITING: cannot find annotation file %s.\n" % anno.anno_file)
+    annotation_columns = [_get_annotation_columns(anno) for anno in annotations]
+    all_col_names = [col_name for col_names, _, _ in annotation_columns
+                     for col_name in col_names]
+    if len(set(all_col_names)) < len(all_col_names):
+        sys.exit("EXITING: the manifest lists a column more than once.\n")
+
+    conn = sqlite3.connect(args.db)
+    conn.isolation_level = None
+    c = conn.cursor()
+    for anno, (col_names, col_types, _) in zip(annotations, annotation_columns):
+        add_requested_columns(anno, c, col_names, col_types)
+    partitions = _get_partitions(conn)
+    conn.close()
+
+    staging_dir = tempfile.mkdtemp(prefix="annotate_",
+                                   dir=os.path.dirname(os.path.abspath(args.db)))
+    try:
+        tasks = [(args.db, partition, annotations,
+                  os.path.join(staging_dir, "partition%d.db" % i))
+                 for i, partition in enumerate(partitions)]
+        cores = min(getattr(args, "cores", 1) or 1, max(1, len(tasks)))
+        if cores > 1:
+            pool = multiprocessing.Pool(cores)
+            results = pool.imap_unordered(_annotate_partition, tasks)
+        else:
+            pool = None
+            results = (_annotate_partition(task) for task in tasks)
+        total = 0
+        for chrom, num_variants, error in results:
+            if error is not None:
+                if pool is not None:
+                    pool.terminate()
+                sys.exit(error)
+            total += num_variants
+            print "annotated", total, "variants (%s done)" % chrom
+        if pool is not None:
+            pool.close()
+            pool.join()
+        _apply_staged_values(args.db, [task[-1] for task in tasks],
+                             annotations, annotation_columns)
+    finally:
+        shutil.rmtree(staging_dir)
+    print "Annotated {0} variants with {1} files.".format(total, len(annotations))
+
+# ## Automate addition of extra fields to database
+
+def _get_field_type(val, cur_type):
+    start_checking = False
+    for name, check_fn in [("integer", int), ("float", float), ("text", str)]:
+        if name == cur_type:
+            start_checking = True
+        if start_checking:
+            try:
+                check_fn(val)
+                break
+            except:
+                continue
+    return name
+
+def _get_extra_columns(cursor):
+    """Retrieve the names and types of the extra fields staged in variant_extras.
+    """
+    headers = {}
+    cursor.execute("SELECT fields FROM variant_extras")
+    for (fields,) in cursor:
+        for field, val in json.loads(fields).items():
+            headers[field] = _get_field_type(val, headers.get(field, "integer"))
+    col_names = sorted(headers.keys())
+    return col_names, [headers[col_name] for col_name in col_names]
+
+def add_extras(gemini_db):
+    """Add the extra fields staged in the variant_extras table, if any, as columns.
+
+    The values are copied to a temporary table with a column per field,
+    which a single UPDATE then joins to the variants by variant_id.
+    """
+    conn = sqlite3.connect(gemini_db)
+    conn.isolation_level = None
+    c = conn.cursor()
+    c.execute("SELECT name FROM sqlite_master "
+              "WHERE type='table' AND name='variant_extras'")
+    if c.fetchone() is None:
+        conn.close()
+        return
+    col_names, col_types = _get_extra_columns(c)
+    if col_names:
+        # e.g. from an earlier load of a database being appended to
+        existing = set(col[1] for col in c.execute("PRAGMA table_info(variants)"))
+        new_cols = [col for col in zip(col_names, col_types) if col[0] not in existing]
+        if new_cols:
+            Args = namedtuple("Args", "anno_type")
+            add_requested_columns(Args("extract"), c, *zip(*new_cols))
+        c.execute("CREATE TEMP TABLE extra_values (variant_id integer primary key, %s)"
+                  % ", ".join("%s %s" % col for col in zip(col_names, col_types)))
+
+        select_cursor = conn.cursor()
+        select_cursor.execute("SELECT variant_id, fields FROM variant_extras")
+        rows = ([variant_id] + [fields.get(col_name) for col_name in col_names]
+                for variant_id, fields in ((row[0], json.loads(row[1]))
+                                           for row in select_cursor))
+        c.execute("BEGIN TRANSACTION")
+        c.executemany("INSERT INTO temp.extra_values VALUES (%s)"
+                      % ",".join("?" * (len(col_names) + 1)), rows)
+        _update_from_temp(c, "extra_values", col_names)
+        c.execute("END TRANSACTION")
+        select_cursor.close()
+        c.execute("DROP TABLE temp.extra_values")
+        # index on the newly created columns
+        for col_name in col_names:
+            c.execute('''create index if not exists %s on variants(%s)'''
+                      % (col_name + "idx", col_name))
+    c.execute("DROP TABLE variant_extras")
+    conn.close()
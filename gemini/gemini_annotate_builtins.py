@@ -0,0 +1,325 @@
+#!/usr/bin/env python
+"""
+Fill the columns of GEMINI's built-in annotation sources (dbSNP, ClinVar,
+ESP, 1000G, CADD, GERP, ENCODE, ...) for the variants of a database, e.g.
+one loaded with `gemini load --defer-annotations`.
+
+The variants are read chromosome by chromosome in position order, in
+buffers. Each buffer is annotated with the same compiled indexes, region
+tracks and Tabix lookups as the loader, by worker processes when more
+than one core is used, and its columns are then written with the bulk
+UPDATE of gemini_annotate. Only this process writes to the database.
+"""
+import sys
+import sqlite3
+import collections
+import multiprocessing
+import Queue
+import traceback
+
+import annotations
+import annotation_index
+import annotation_tracks
+import database
+from gemini_annotate import _update_variants
+from gemini_constants import BUFFER_SIZE
+
+# the minimal record the annotations.get_* functions need, built from the
+# variants table rather than from the VCF
+Variant = collections.namedtuple("Variant", "CHROM POS start end REF ALT")
+
+
+def _clinvar_columns(clinvar):
+    return (clinvar.clinvar_in_omim, clinvar.clinvar_sig,
+            clinvar.clinvar_disease_name, clinvar.clinvar_dbsource,
+            clinvar.clinvar_dbsource_id, clinvar.clinvar_origin,
+            clinvar.clinvar_dsdb, clinvar.clinvar_dsdbid,
+            clinvar.clinvar_disease_acc, clinvar.clinvar_in_locus_spec_db,
+            clinvar.clinvar_on_diag_assay)
+
+# source -> (lookup function, variants columns, function returning the
+# values of the columns from the looked up value), as stored by the loader
+BUILTIN_SOURCES = collections.OrderedDict([
+    ("pfam_domain", (annotations.get_pfamA_domains, ["pfam_domain"], None)),
+    ("cytoband", (annotations.get_cyto_info, ["cyto_band"], None)),
+    ("dbsnp", (annotations.get_dbsnp_info, ["in_dbsnp", "rs_ids"],
+               lambda rs_ids: (0 if rs_ids is None else 1, rs_ids))),
+    ("clinvar", (annotations.get_clinvar_info,
+                 ["in_omim", "clinvar_sig", "clinvar_disease_name",
+                  "clinvar_dbsource", "clinvar_dbsource_id", "clinvar_origin",
+                  "clinvar_dsdb", "clinvar_dsdbid", "clinvar_disease_acc",
+                  "clinvar_in_locus_spec_db", "clinvar_on_diag_assay"],
+                 _clinvar_columns)),
+    ("rmsk", (annotations.get_rmsk_info, ["rmsk"], None)),
+    ("cpg_island", (annotations.get_cpg_island_info, ["in_cpg_island"], None)),
+    ("segdup", (annotations.get_segdup_info, ["in_segdup"], None)),
+    ("conserved", (annotations.get_conservation_info, ["is_conserved"], None)),
+    ("gerp_bp", (annotations.get_gerp_bp, ["gerp_bp_score"], None)),
+    ("gerp_elements", (annotations.get_gerp_elements,
+                       ["gerp_element_pval"], None)),
+    ("recomb", (annotations.get_recomb_info, ["recomb_rate"], None)),
+    ("esp", (annotations.get_esp_info,
+             ["in_esp", "aaf_esp_ea", "aaf_esp_aa", "aaf_esp_all",
+              "exome_chip"], tuple)),
+    ("1000g", (annotations.get_1000G_info,
+               ["in_1kg", "aaf_1kg_all", "aaf_1kg_amr", "aaf_1kg_asn",
+                "aaf_1kg_afr", "aaf_1kg_eur"], tuple)),
+    ("grc", (annotations.get_grc, ["grc"], None)),
+    ("gms", (annotations.get_gms,
+             ["gms_illumina", "gms_solid", "gms_iontorrent"], tuple)),
+    ("cse", (annotations.get_cse, ["in_cse"], None)),
+    ("encode_tfbs", (annotations.get_encode_tfbs, ["encode_tfbs"], None)),
+    ("encode_dnase1", (annotations.get_encode_dnase_clusters,
+                       ["encode_dnaseI_cell_count", "encode_dnaseI_cell_list"],
+                       tuple)),
+    ("encode_consensus_segs", (annotations.get_encode_consensus_segs,
+                               ["encode_consensus_gm12878",
+                                "encode_consensus_h1hesc",
+                                "encode_consensus_helas3",
+                                "encode_consensus_hepg2",
+                                "encode_consensus_huvec",
+                                "encode_consensus_k562"], tuple)),
+    ("vista_enhancers", (annotations.get_vista_enhancers,
+                         ["vista_enhancers"], None)),
+    ("cosmic", (annotations.get_cosmic_info, ["cosmic_ids"], None)),
+    ("cadd_score", (annotations.get_cadd_scores,
+                    ["cadd_raw", "cadd_scaled"], tuple)),
+])
+
+
+def open_sources(sources):
+    """
+    Open the annotation files, compiled indexes and region tracks of the
+    built-in sources among sources. Returns the names of those that could
+    be opened, i.e. that are installed, in BUILTIN_SOURCES order.
+    """
+    annotations.load_annos(sources)
+    annotation_index.load_indexes()
+    annotation_tracks.load_tracks()
+    return [name for name in BUILTIN_SOURCES if name in annotations.annos]
+
+
+def get_columns(sources):
+    """Return the variants columns filled by sources, in order."""
+    return [column for name in sources for column in BUILTIN_SOURCES[name][1]]
+
+
+def get_updates(rows, sources):
+    """
+    Return the UPDATE parameters, the values of the columns of sources
+    followed by the variant_id, of a buffer of (variant_id, chrom, start,
+    end, ref, alt) rows.
+    """
+    variants = [Variant(chrom, start + 1, start, end, ref, alt.split(","))
+                for _, chrom, start, end, ref, alt in rows]
+    # the sources with a compiled index or a track are looked up at once
+    batch_annos = annotation_index.get_batch_annotations(variants)
+    for var_annos, track_annos in \
+            zip(batch_annos, annotation_tracks.get_batch_annotations(variants)):
+        var_annos.update(track_annos)
+
+    updates = []
+    for row, var, var_annos in zip(rows, variants, batch_annos):
+        values = []
+        for name in sources:
+            get_fn, _, to_columns = BUILTIN_SOURCES[name]
+            value = var_annos[name] if name in var_annos else get_fn(var)
+            values.extend(to_columns(value) if to_columns else (value,))
+        values.append(row[0])
+        updates.append(values)
+    return updates
+
+
+def _get_variant_buffers(conn):
+    """
+    Yield the (variant_id, chrom, start, end, ref, alt) of the variants in
+    buffers of BUFFER_SIZE, chromosome by chromosome in position order.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT variant_id, chrom, start, end, ref, alt "
+                   "FROM variants ORDER BY chrom, start")
+    while True:
+        rows = cursor.fetchmany(BUFFER_SIZE)
+        if not rows:
+            break
+        yield rows
+    cursor.close()
+
+
+def _annotate_worker(sources, task_queue, result_queue):
+    """
+    Worker process: annotate the buffers taken from task_queue until a
+    None sentinel arrives. Sends ("updates", updates) for each buffer,
+    then ("done", None), or ("failed", traceback) if annotating raises.
+    """
+    try:
+        # each worker needs its own file handles rather than the parent's
+        open_sources(sources)
+        for rows in iter(task_queue.get, None):
+            result_queue.put(("updates", get_updates(rows, sources)))
+    except Exception:
+        result_queue.put(("failed", traceback.format_exc()))
+        sys.exit(1)
+    result_queue.put(("done", None))
+
+
+def _write_updates(conn, updates, columns):
+    cursor = conn.cursor()
+    cursor.execute("BEGIN TRANSACTION")
+    _update_variants(updates, columns, cursor)
+    cursor.execute("END TRANSACTION")
+    cursor.close()
+
+
+def annotate_variants(conn, sources, cores=1):
+    """
+    Fill the columns of the built-in sources for the variants and return
+    the number of variants updated. With more than one core the buffers
+    are annotated by worker processes as this one reads and writes the
+    database. Exits if a worker fails or dies.
+    """
+    columns = get_columns(sources)
+    buffers = _get_variant_buffers(conn)
+
+    total = 0
+    if cores <= 1:
+        for rows in buffers:
+            _write_updates(conn, get_updates(rows, sources), columns)
+            total += len(rows)
+            print "updated", total, "variants"
+        return total
+
+    # bound the buffers in flight, the workers return them as they are done
+    task_queue = multiprocessing.Queue(2 * cores)
+    result_queue = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_annotate_worker,
+                                       args=(sources, task_queue, result_queue))
+               for _ in range(cores)]
+    for worker in workers:
+        worker.start()
+
+    def fail(reason):
+        for worker in workers:
+            worker.terminate()
+        sys.exit("ERROR: annotating the variants failed:\n%s" % reason)
+
+    def check_workers():
+        for worker in workers:
+            if worker.exitcode not in (None, 0):
+                # the traceback of a worker that raised is among the
+                # results, one that was killed sends none
+                reason = "an annotation worker exited with code %s.\n" \
+                    % worker.exitcode
+                try:
+                    while True:
+                        status, detail = result_queue.get(True, 1)
+                        if status == "failed":
+                            reason = detail
+                            break
+                except Queue.Empty:
+                    pass
+                fail(reason)
+
+    def handle(message):
+        """
+        Write the updates of message and return their number, or None
+        once a worker is done.
+        """
+        status, detail = message
+        if status == "failed":
+            fail(detail)
+        elif status == "done":
+            return None
+        _write_updates(conn, detail, columns)
+        return len(detail)
+
+    def put(task):
+        while True:
+            try:
+                task_queue.put(task, True, 1)
+                return
+            except Queue.Full:
+                check_workers()
+
+    for rows in buffers:
+        put(rows)
+        while True:
+            try:
+                message = result_queue.get_nowait()
+            except Queue.Empty:
+                break
+            total += handle(message)
+            print "updated", total, "variants"
+    for worker in workers:
+        put(None)
+    running = len(workers)
+    while running:
+        try:
+            message = result_queue.get(True, 1)
+        except Queue.Empty:
+            check_workers()
+            continue
+        updated = handle(message)
+        if updated is None:
+            running -= 1
+            continue
+        total += updated
+        print "updated", total, "variants"
+    for worker in workers:
+        worker.join()
+    return total
+
+
+def _annotate_db(db, sources, cores):
+    """
+    Fill the columns of sources for the variants of db and replace their
+    entries in its resources table.
+    """
+    conn = sqlite3.connect(db)
+    conn.isolation_level = None
+    c = conn.cursor()
+    c.execute('PRAGMA synchronous = OFF')
+    print "Annotating with: " + ", ".join(sources)
+    total = annotate_variants(conn, sources, cores)
+
+    # record the sources now in the database
+    resources = annotations.get_resources(sources)
+    c.executemany("DELETE FROM resources WHERE name = ?",
+                  [(name,) for name, _ in resources])
+    database.insert_resources(c, resources)
+    conn.close()
+    print "Annotated {0} variants.".format(total)
+
+
+def annotate_builtins(parser, args):
+    if args.db is None:
+        parser.print_help()
+        exit("ERROR: annotate_builtins needs a database file\n")
+    sources = open_sources(annotations.get_sources(args))
+    if not sources:
+        sys.exit("ERROR: none of the selected annotation sources "
+                 "is installed.\n")
+    _annotate_db(args.db, sources, args.cores)
+
+
+def reannotate(parser, args):
+    """
+    Refresh the columns of some built-in sources, e.g. after installing
+    new releases of their files with `gemini update --dataonly`, without
+    loading the VCF again.
+    """
+    if args.db is None or args.sources is None:
+        parser.print_help()
+        exit("ERROR: reannotate needs a database file and --sources\n")
+    names = [name.strip() for name in args.sources.split(",") if name.strip()]
+    unknown = [name for name in names if name not in BUILTIN_SOURCES]
+    if unknown:
+        sys.exit("ERROR: %s cannot be re-annotated. The sources are: %s\n"
+                 % (", ".join(unknown), ", ".join(BUILTIN_SOURCES)))
+    sources = open_sources(set(names))
+    missing = [name for name in names if name not in sources]
+    if missing:
+        sys.exit("ERROR: the annotation files of %s are not installed. "
+                 "Run `gemini update --dataonly` to install them.\n"
+                 % ", ".join(missing))
+    _annotate_db(args.db, sources, args.cores)
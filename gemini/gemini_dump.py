@@ -1,12 +1,11 @@
 #!/usr/bin/env python
 import sqlite3
-import numpy as np
-import zlib
 import re
 import os
-import cPickle
 
 import gemini_utils as util
+import compression
+import database
 from GeminiQuery import GeminiQuery
 
 
@@ -44,6 +43,7 @@ def get_genotypes(c, args):
                      v.gts \
              FROM    variants v \
              ORDER BY chrom, start"
+    database.join_genotypes(c)
     c.execute(query)
 
     # build a list of all the column indices that are NOT
@@ -56,7 +56,7 @@ def get_genotypes(c, args):
     if args.use_header:
         print args.separator.join(col for col in col_names)
     for row in c:
-        gts = np.array(cPickle.loads(zlib.decompress(row['gts'])))
+        gts = compression.unpack_genotype_blob(row['gts'])
         for idx, gt in enumerate(gts):
             # xrange(len(row)-1) to avoid printing v.gts
             print args.separator.join(str(row[i]) for i in xrange(len(row)-1)),
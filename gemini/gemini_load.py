@@ -3,18 +3,41 @@
 # native Python imports
 import os.path
 import sys
+import shutil
+import argparse
 import sqlite3
+import cyvcf
 
 import annotations
+import annotation_cache
+import annotation_index
+import annotation_tracks
+import load_profile
 import subprocess
+import multiprocessing
+import copy
+import traceback
 from cluster_helper.cluster import cluster_view
 import database as gemini_db
-from gemini_load_chunk import GeminiLoader
+from gemini_load_chunk import GeminiLoader, load_chunk_db, peak_memory_mb, \
+    get_load_checkpoint, check_append_samples, LoadCheckpoint
 import gemini_annotate
+import gemini_merge_chunks
+import genotype_matrix
+import vcf_split
+import bcf_reader
 import uuid
 import time
+import resource
 import datetime
 
+# chunks handed out per core during a multicore load
+CHUNKS_PER_CORE = 4
+# units weighed per chunk when planning a multicore load
+UNITS_PER_CHUNK = 8
+# fraction of its target cost after which a chunk ends at a chromosome change
+CHROM_BREAK_SLACK = 0.5
+
 
 def load(parser, args):
 
@@ -27,6 +50,12 @@ def load(parser, args):
         exit("ERROR: load needs both a VCF file and a database file\n")
 
     annos = annotations.get_anno_files()
+    sources = annotations.get_sources(args)
+    # CADD and GERP per bp may also be left out through the source lists
+    if "cadd_score" not in sources:
+        args.skip_cadd = True
+    if "gerp_bp" not in sources:
+        args.skip_gerp_bp = True
     # force skipping CADD and GERP if the data files have not been installed
     if args.skip_cadd is False:
         if 'cadd_score' not in annos:
@@ -45,51 +74,187 @@ def load(parser, args):
             args.skip_gerp_bp = True
         else:
             sys.stderr.write("GERP per bp is being loaded (to skip use:--skip-gerp-bp).\n")
+    if (args.scheduler or args.cores > 1) and bcf_reader.use_pysam(args):
+        if bcf_reader.get_index_file(args.vcf) is None:
+            sys.exit("ERROR: {0} must be indexed (e.g., with `bcftools index` "
+                     "or `tabix -p vcf`) to be split for a parallel "
+                     "load.\n".format(args.vcf))
+    elif (args.scheduler or args.cores > 1) and \
+            not vcf_split.is_splittable(args.vcf):
+        sys.exit("ERROR: {0} is compressed with gzip rather than bgzip and "
+                 "cannot be split for a parallel load. Recompress it with "
+                 "bgzip or decompress it.\n".format(args.vcf))
+    if args.append:
+        check_append(args)
+    if args.profile:
+        load_profile.enable()
+        if args.scheduler:
+            sys.stderr.write("WARNING: --profile does not time the chunks "
+                             "loaded through --scheduler.\n")
     # collect of the the add'l annotation files
-    annotations.load_annos()
+    with load_profile.timer("open_annotations"):
+        annotations.load_annos(sources)
+        annotation_index.load_indexes()
+
+    # the genotype matrix of an earlier database at the same path
+    if not args.append and not getattr(args, "resume", False):
+        matrix_dir = genotype_matrix.get_matrix_dir(args.db)
+        if os.path.exists(matrix_dir):
+            shutil.rmtree(matrix_dir)
 
     if args.scheduler:
-        load_ipython(args)
+        num_flushes = load_ipython(args)
     elif args.cores > 1:
-        load_multicore(args)
+        num_flushes = load_multicore(args)
     else:
-        load_singlecore(args)
+        num_flushes = load_singlecore(args)
+    set_load_id(args.db)
+
+    if getattr(args, "build_matrix", False):
+        if args.no_genotypes or args.no_load_genotypes:
+            sys.stderr.write("WARNING: --build-matrix is ignored when no "
+                             "genotypes are loaded.\n")
+        else:
+            with load_profile.timer("build_matrix"):
+                genotype_matrix.build_matrix(args.db)
 
     end = time.time()
     print "time measured: ", end - start, "seconds"
-
-
+    if args.defer_annotations:
+        print "Run `gemini annotate_builtins {0}` to add the " \
+              "annotations.".format(args.db)
+    if num_flushes is not None:
+        # the load workers are child processes, the merge runs here
+        print "buffers flushed: {0}, peak memory: {1:.0f} MB".format(
+            num_flushes, max(peak_memory_mb(),
+                             peak_memory_mb(resource.RUSAGE_CHILDREN)))
+    if args.profile:
+        load_profile.record("load", end - start)
+        load_profile.write_report(args.profile)
+        print "Wrote the load profile to {0}.".format(args.profile)
+
+
+
+def set_load_id(db):
+    """Identify the genotypes now in db, see database.set_load_id."""
+    conn = sqlite3.connect(db)
+    conn.isolation_level = None
+    gemini_db.set_load_id(conn.cursor())
+    conn.close()
+
+
+def check_append(args):
+    """
+    Exit unless the VCF can be appended to args.db: the database must
+    exist and have the samples of the VCF, in the same order.
+    """
+    if not os.path.exists(args.db):
+        sys.exit("ERROR: cannot append to {0}, which does not "
+                 "exist.\n".format(args.db))
+    conn = sqlite3.connect(args.db)
+    if not gemini_db.has_variant_genotypes(conn.cursor()):
+        sys.exit("ERROR: cannot append to {0}, which stores its genotypes in "
+                 "the variants table. Run `gemini migrate_genotypes {0}` "
+                 "first.\n".format(args.db))
+    conn.close()
+    if args.ped_file is not None:
+        sys.stderr.write("WARNING: the PED file is ignored when appending. "
+                         "Use `gemini amend --sample` to update the "
+                         "samples table.\n")
+    # the loader checks the samples of a VCF read from STDIN
+    if args.vcf == "-":
+        return
+    if args.no_genotypes or args.no_load_genotypes:
+        samples = []
+    elif bcf_reader.use_pysam(args):
+        samples = bcf_reader.BcfReader(args.vcf).samples
+    else:
+        samples = cyvcf.Reader(open(args.vcf),
+                               compressed=args.vcf.endswith(".gz")).samples
+    conn = sqlite3.connect(args.db)
+    check_append_samples(conn.cursor(), samples)
+    conn.close()
 
 def load_singlecore(args):
+    with load_profile.timer("open_annotations"):
+        annotation_tracks.load_tracks()
+    start_annotation_cache(args)
     # create a new gemini loader and populate
     # the gemini db and files from the VCF
     gemini_loader = GeminiLoader(args)
-    gemini_loader.store_resources()
-    gemini_loader.store_version()
+    if gemini_loader.checkpoint is not None and gemini_loader.checkpoint.complete:
+        print "{0} is already loaded.".format(args.db)
+        return 0
+    if gemini_loader.checkpoint is None and not args.append:
+        gemini_loader.store_resources()
+        gemini_loader.store_version()
     gemini_loader.populate_from_vcf()
 
 
-    if not args.skip_gene_tables and not args.test_mode:
+    if not args.skip_gene_tables and not args.test_mode and not args.append:
         gemini_loader.update_gene_table()
     if not args.test_mode:
-        gemini_loader.build_indices_and_disconnect()
+        with load_profile.timer("index_database"):
+            gemini_loader.build_indices_and_disconnect()
 
     if not args.no_genotypes and not args.no_load_genotypes:
         gemini_loader.store_sample_gt_counts()
-    gemini_annotate.add_extras(args.db, [args.db])
+    with load_profile.timer("add_extras"):
+        gemini_annotate.add_extras(args.db)
+    gemini_loader.mark_load_complete()
+    return gemini_loader.num_flushes
 
 def load_multicore(args):
-    grabix_file = bgzip(args.vcf)
-    chunks = load_chunks_multicore(grabix_file, args)
-    merge_chunks_multicore(chunks, args.db)
-    gemini_annotate.add_extras(args.db, chunks)
+    if getattr(args, "resume", False) and not args.append:
+        # the chunk databases are gone once they are merged
+        checkpoint = get_load_checkpoint(args.db)
+        if checkpoint is not None and checkpoint.complete:
+            print "{0} is already loaded.".format(args.db)
+            return 0
+    start_annotation_cache(args)
+    chunks, num_flushes = load_chunks_multicore(args)
+    merge_chunks_multicore(chunks, args.db, args.append)
+    with load_profile.timer("add_extras"):
+        gemini_annotate.add_extras(args.db)
+    mark_load_complete(args.db)
+    return num_flushes
+
+def start_annotation_cache(args):
+    """
+    Make the whole load one generation of the annotation cache, however
+    many chunks it is loaded in.
+    """
+    if getattr(args, "annotation_cache", None):
+        args.annotation_cache_generation = \
+            annotation_cache.new_generation(args.annotation_cache)
+
+def mark_load_complete(db):
+    """
+    Record in db, merged from the chunks of a multicore load, that the
+    load is complete, so that resuming it has nothing left to do.
+    """
+    conn = sqlite3.connect(db)
+    conn.isolation_level = None
+    c = conn.cursor()
+    gemini_db.create_load_checkpoint(c)
+    c.execute("select min(variant_id), max(variant_id) from variants")
+    first_variant_id, variant_id = c.fetchone()
+    gemini_db.update_load_checkpoint(
+        c, LoadCheckpoint(first_variant_id or 1, variant_id or 0, None, None,
+                          None, None, None, True))
+    conn.close()
 
 def load_ipython(args):
-    grabix_file = bgzip(args.vcf)
     with cluster_view(*get_ipython_args(args)) as view:
-        chunks = load_chunks_ipython(grabix_file, args, view)
-        merge_chunks_ipython(chunks, args.db, view)
-    gemini_annotate.add_extras(args.db, chunks)
+        chunks = load_chunks_ipython(args, view)
+        if args.append:
+            # merge the chunks as usual, then add the result to args.db
+            merged = get_temp_dbs(1, os.path.dirname(chunks[0]))[0]
+            merge_chunks_ipython(chunks, merged, view)
+            merge_chunks_multicore([merged], args.db, append=True)
+        else:
+            merge_chunks_ipython(chunks, args.db, view)
+    gemini_annotate.add_extras(args.db)
 
 def merge_chunks(chunks, db):
     cmd = get_merge_chunks_cmd(chunks, db)
@@ -114,37 +279,40 @@ def merge_chunks_ipython(chunks, db, view):
         view.map(merge_chunks, sub_merges, tmp_dbs)
         merge_chunks_ipython(tmp_dbs, db, view)
 
-def merge_chunks_multicore(chunks, db):
-    if len(chunks) <= 1:
-        ts = time.time()
-        st = datetime.datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
-        print st, "indexing final database."
-
+def merge_chunks_multicore(chunks, db, append=False):
+    """
+    Merge all of the chunk databases into db in a single pass
+    and index the result. With append, the variants of the chunks
+    are added to those of the existing db, whose indexes are updated
+    as they are inserted.
+    """
+    ts = time.time()
+    st = datetime.datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
+    print st, "merging", len(chunks), "chunks."
+    if len(chunks) == 1 and not append:
         os.rename(chunks[0], db)
-        main_conn = sqlite3.connect(db)
-        main_conn.isolation_level = None
-        main_curr = main_conn.cursor()
-        main_curr.execute('PRAGMA synchronous = OFF')
-        main_curr.execute('PRAGMA journal_mode=MEMORY')
-        
-        gemini_db.create_indices(main_curr)
-        
-        main_conn.commit()
-        main_curr.close()
-        return db
     else:
-        ts = time.time()
-        st = datetime.datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
-        print st, "merging", len(chunks), "chunks."
-        procs = []
-        sub_merges = get_chunks_to_merge(chunks)
-        tmp_dbs = get_temp_dbs(len(sub_merges), os.path.dirname(sub_merges[0][0]))
-        for sub_merge, tmp_db in zip(sub_merges, tmp_dbs):
-            cmd = get_merge_chunks_cmd(sub_merge, tmp_db)
-            procs.append(subprocess.Popen(cmd, shell=True))
-        wait_until_finished(procs)
+        merge_args = argparse.Namespace(db=db, chunkdbs=[[c] for c in chunks],
+                                        append=append)
+        with load_profile.timer("merge_chunks"):
+            gemini_merge_chunks.merge_db_chunks(merge_args)
         cleanup_temp_db_files(chunks)
-        merge_chunks_multicore(tmp_dbs, db)
+
+    ts = time.time()
+    st = datetime.datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
+    print st, "indexing final database."
+    main_conn = sqlite3.connect(db)
+    main_conn.isolation_level = None
+    main_curr = main_conn.cursor()
+    main_curr.execute('PRAGMA synchronous = OFF')
+    main_curr.execute('PRAGMA journal_mode=MEMORY')
+
+    with load_profile.timer("index_database"):
+        gemini_db.create_indices(main_curr)
+
+    main_conn.commit()
+    main_curr.close()
+    return db
 
 def get_chunks_to_merge(chunks):
     sublist = list_to_sublists(chunks, 2)
@@ -164,9 +332,162 @@ def get_temp_dbs(n, tmp_dir):
 def get_chunk_name(chunk):
     return "--chunkdb " + chunk
 
-def load_chunks_multicore(grabix_file, args):
+def load_chunks_multicore(args):
+    """
+    Load each chunk of the VCF into its own database with a pool of
+    worker processes. Every worker opens the annotation files once and
+    then takes chunks from a shared queue until none are left, so a
+    worker that finishes early picks up the remaining work. A chunk
+    whose load raises, or whose worker dies, is handed out again up to
+    args.retries times. Returns the chunk databases and the number of
+    buffers of variants flushed to them.
+    """
     cores = args.cores
+    vcf = get_chunk_prefix(args.vcf)
+    # the steps come costliest first; the workers take them in that order
+    chunk_steps = get_chunk_steps(args.vcf, args)
+    chunks = dict(chunk_steps)
+    chunk_dbs = [vcf + ".chunk" + str(chunk_num) + ".db"
+                 for chunk_num in sorted(chunks)]
+
+    # chunks loaded completely by an earlier run of a resumed load
+    loaded = set()
+    if getattr(args, "resume", False):
+        for chunk_num, chunk in chunk_steps:
+            checkpoint = get_load_checkpoint(chunk_dbs[chunk_num], chunk)
+            if checkpoint is not None and checkpoint.complete:
+                loaded.add(chunk_num)
+        print "Resuming: {0} of {1} chunks are already loaded.".format(
+            len(loaded), len(chunk_steps))
+
+    task_queue = multiprocessing.Queue()
+    for chunk_num, chunk in chunk_steps:
+        if chunk_num not in loaded:
+            task_queue.put((chunk_num, chunk))
+
+    def start_worker():
+        # results come back over a pipe per worker, so that a worker
+        # dying mid-write cannot block the others. The worker records the
+        # chunk it is loading (or loaded last) in current_chunk, so that
+        # the chunk can be recovered if it dies.
+        current_chunk = multiprocessing.Value('i', -1)
+        results, worker_results = multiprocessing.Pipe(duplex=False)
+        worker = multiprocessing.Process(target=load_chunks_worker,
+                                         args=(vcf, args,
+                                               task_queue, worker_results,
+                                               current_chunk))
+        worker.start()
+        worker_results.close()
+        return worker, current_chunk, results
+
+    def stop_workers():
+        for worker, _, _ in workers:
+            worker.terminate()
+
+    def retry(chunk_num, reason):
+        attempts[chunk_num] += 1
+        if attempts[chunk_num] > args.retries:
+            stop_workers()
+            sys.exit("ERROR: chunk %d failed to load after %d attempts:\n%s"
+                     % (chunk_num, attempts[chunk_num], reason))
+        sys.stderr.write("WARNING: chunk %d failed to load (%s). Retrying.\n"
+                         % (chunk_num, reason.strip().splitlines()[-1]))
+        task_queue.put((chunk_num, chunks[chunk_num]))
+
+    workers = [start_worker()
+               for _ in range(min(cores, len(chunk_steps) - len(loaded)))]
+    attempts = dict((chunk_num, 0) for chunk_num, _ in chunk_steps)
+    chunk_flushes = {}
+    while len(loaded) < len(chunk_steps):
+        for i, (worker, current_chunk, results) in enumerate(workers):
+            message = None
+            if results.poll(0.1):
+                try:
+                    message = results.recv()
+                except EOFError:
+                    worker.join()
+            if message is not None:
+                status, chunk_num, detail = message
+                if status == "done" and chunk_num not in loaded:
+                    loaded.add(chunk_num)
+                    chunk_flushes[chunk_num], chunk_stats = detail
+                    # the timings of the chunk, if profiling
+                    load_profile.merge_stats([chunk_stats])
+                elif status == "failed":
+                    retry(chunk_num, detail)
+            elif not worker.is_alive():
+                # replace the dead worker and hand its chunk out again.
+                # one that fails after reporting its chunk done may not
+                # have left it intact either
+                chunk_num = current_chunk.value
+                if chunk_num >= 0 and (chunk_num not in loaded
+                                       or worker.exitcode != 0):
+                    loaded.discard(chunk_num)
+                    retry(chunk_num, "the worker loading chunk %d exited "
+                                     "with code %s" % (chunk_num,
+                                                       worker.exitcode))
+                elif worker.exitcode != 0:
+                    stop_workers()
+                    sys.exit("ERROR: a load worker exited with code %s "
+                             "before loading any chunk." % worker.exitcode)
+                results.close()
+                workers[i] = start_worker()
+
+    for _ in workers:
+        task_queue.put(None)
+    # a worker can still fail on its way out, after its last chunk
+    for worker, current_chunk, _ in workers:
+        worker.join()
+        if worker.exitcode != 0:
+            stop_workers()
+            if current_chunk.value < 0:
+                sys.exit("ERROR: a load worker exited with code %s "
+                         "before loading any chunk." % worker.exitcode)
+            sys.exit("ERROR: the worker that loaded chunk %d exited with "
+                     "code %s." % (current_chunk.value, worker.exitcode))
+    print "Done loading {0} chunks.".format(len(chunk_dbs))
+    return chunk_dbs, sum(chunk_flushes.values())
+
+def load_chunks_worker(vcf, args, task_queue, results, current_chunk):
+    """
+    Worker process for load_chunks_multicore: load chunks taken from
+    task_queue until a None sentinel arrives.
+    """
+    # each worker needs its own file handles rather than the parent's
+    annotations.load_annos(annotations.get_sources(args))
+    annotation_index.load_indexes()
+    annotation_tracks.load_tracks()
+    for chunk_num, chunk in iter(task_queue.get, None):
+        current_chunk.value = chunk_num
+        print "Loading chunk " + str(chunk_num) + "."
+        if load_profile.is_enabled():
+            # time each chunk on its own; the parent adds them up
+            load_profile.enable()
+        try:
+            with load_profile.timer("load_chunk"):
+                num_flushes = load_chunk_range(vcf, args, chunk_num, chunk)
+        except Exception:
+            results.send(("failed", chunk_num, traceback.format_exc()))
+        else:
+            results.send(("done", chunk_num,
+                          (num_flushes, load_profile.get_stats())))
 
+def load_chunk_range(vcf, args, chunk_num, chunk):
+    """
+    Load the lines of the VCF within chunk, a (start, stop) range of
+    vcf_split positions (bcf_reader positions for a VCF read with pysam),
+    into the database of chunk chunk_num. Returns the number of buffers
+    of variants flushed to it.
+    """
+    chunk_args = copy.copy(args)
+    chunk_args.db = vcf + ".chunk" + str(chunk_num) + ".db"
+    # the merge numbers the variants of each chunk after the previous ones
+    chunk_args.offset = 1
+    chunk_args.append = False
+    chunk_args.split_range = chunk
+    return load_chunk_db(chunk_args)
+
+def load_chunks_ipython(args, view):
     # specify the PED file if given one
     ped_file = ""
     if args.ped_file is not None:
@@ -192,7 +513,7 @@ def load_chunks_multicore(grabix_file, args):
     skip_gene_tables = ""
     if args.skip_gene_tables is True:
         skip_gene_tables = "--skip-gene-tables"
-
+    
     skip_cadd = ""
     if args.skip_cadd is True:
         skip_cadd = "--skip-cadd"
@@ -209,80 +530,36 @@ def load_chunks_multicore(grabix_file, args):
     if args.skip_info_string is True:
         skip_info_string = "--skip-info-string"
 
-    submit_command = "{cmd}"
-    vcf, _ = os.path.splitext(grabix_file)
-    chunk_steps = get_chunk_steps(grabix_file, args)
-    chunk_vcfs = []
-    chunk_dbs = []
-    procs = []
+    gt_codec = "--gt-codec " + args.gt_codec
 
-    for chunk_num, chunk in chunk_steps:
-        start, stop = chunk
-        print "Loading chunk " + str(chunk_num) + "."
-        gemini_load = gemini_pipe_load_cmd().format(**locals())
-        procs.append(subprocess.Popen(submit_command.format(cmd=gemini_load),
-                                      shell=True))
+    resume = ""
+    if args.resume is True:
+        resume = "--resume"
 
-        chunk_vcf = vcf + ".chunk" + str(chunk_num)
-        chunk_vcfs.append(chunk_vcf)
-        chunk_dbs.append(chunk_vcf + ".db")
+    buffer_size = "--buffer-size {0} --buffer-memory {1}".format(
+        args.buffer_size, args.buffer_memory)
 
-    wait_until_finished(procs)
-    print "Done loading {0} variants in {1} chunks.".format(stop, chunk_num+1)
-    return chunk_dbs
+    reader = ""
+    if args.reader is not None:
+        reader = "--reader " + args.reader
 
-def load_chunks_ipython(grabix_file, args, view):
-    # specify the PED file if given one
-    ped_file = ""
-    if args.ped_file is not None:
-        ped_file = "-p " + args.ped_file
+    annotation_sources = ""
+    if args.annotations is not None:
+        annotation_sources += " --annotations " + args.annotations
+    if args.skip_annotations is not None:
+        annotation_sources += " --skip-annotations " + args.skip_annotations
+    if args.defer_annotations is True:
+        annotation_sources += " --defer-annotations"
 
-    # specify the annotation type if given one
-    anno_type = ""
-    if args.anno_type is not None:
-        anno_type = "-t " + args.anno_type
-
-    no_genotypes = ""
-    if args.no_genotypes is True:
-        no_genotypes = "--no-genotypes"
-
-    no_load_genotypes = ""
-    if args.no_load_genotypes is True:
-        no_load_genotypes = "--no-load-genotypes"
 
-    skip_gerp_bp = ""
-    if args.skip_gerp_bp is True:
-        skip_gerp_bp = "--skip-gerp-bp"
-
-    skip_gene_tables = ""
-    if args.skip_gene_tables is True:
-        skip_gene_tables = "--skip-gene-tables"
-    
-    skip_cadd = ""
-    if args.skip_cadd is True:
-        skip_cadd = "--skip-cadd"
-    
-    test_mode = ""
-    if args.test_mode is True:
-        test_mode = "--test-mode"
-
-    passonly = ""
-    if args.passonly is True:
-        passonly = "--passonly"
-
-    skip_info_string = ""
-    if args.skip_info_string is True:
-        skip_info_string = "--skip-info-string"
-
-
-    vcf, _ = os.path.splitext(grabix_file)
-    chunk_steps = get_chunk_steps(grabix_file, args)
+    vcf = get_chunk_prefix(args.vcf)
+    chunk_steps = get_chunk_steps(args.vcf, args)
     total_chunks = len(chunk_steps)
     scheduler, queue, cores = get_ipython_args(args)
     load_args = {"ped_file": ped_file,
                  "anno_type": anno_type,
                  "vcf": vcf,
-                 "grabix_file": grabix_file,
+                 "vcf_file": args.vcf,
                  "no_genotypes": no_genotypes,
                  "no_load_genotypes": no_load_genotypes,
                  "skip_gerp_bp": skip_gerp_bp,
@@ -290,8 +567,17 @@ def load_chunks_ipython(grabix_file, args, view):
                  "skip_cadd": skip_cadd,
                  "test_mode": test_mode,
                  "passonly": passonly,
-                 "skip_info_string": skip_info_string}
+                 "skip_info_string": skip_info_string,
+                 "gt_codec": gt_codec,
+                 "buffer_size": buffer_size,
+                 "resume": resume,
+                 "reader": reader,
+                 "annotation_sources": annotation_sources}
     chunk_dbs = view.map(load_chunk, chunk_steps, [load_args] * total_chunks)
+    # the databases come back costliest first, like chunk_steps: the merge
+    # needs them in file order
+    chunk_dbs = [chunk_db for (chunk_num, chunk), chunk_db
+                 in sorted(zip(chunk_steps, chunk_dbs))]
 
     print "Done loading variants in {0} chunks.".format(total_chunks)
     return chunk_dbs
@@ -305,86 +591,69 @@ def load_chunk(chunk_step, kwargs):
     chunk_db = args["vcf"] + ".chunk" + str(chunk_num) + ".db"
     return chunk_db
 
-def wait_until_finished(procs):
-    [p.wait() for p in procs]
-
 def cleanup_temp_db_files(chunk_dbs):
     for chunk_db in chunk_dbs:
         os.remove(chunk_db)
 
 def gemini_pipe_load_cmd():
-    grabix_cmd = "grabix grab {grabix_file} {start} {stop}"
-    gemini_load_cmd = ("gemini load_chunk -v - {anno_type} {ped_file}"
+    gemini_load_cmd = ("gemini load_chunk -v {vcf_file} {anno_type} {ped_file}"
                        " {no_genotypes} {no_load_genotypes} {no_genotypes}"
                        " {skip_gerp_bp} {skip_gene_tables} {skip_cadd}"
-                       " {passonly} {skip_info_string} {test_mode}"
-                       " -o {start} {vcf}.chunk{chunk_num}.db")
-    return " | ".join([grabix_cmd, gemini_load_cmd])
-
-def get_chunk_steps(grabix_file, args):
-    index_file = grabix_index(grabix_file)
-    num_lines = get_num_lines(index_file)
-    chunk_size = int(num_lines) / int(args.cores)
-    print "Breaking {0} into {1} chunks.".format(grabix_file, args.cores)
-
-    starts = []
-    stops = []
-    for chunk in range(0, int(args.cores)):
-        start = (chunk * chunk_size) + 1
-        stop  = start + chunk_size - 1
-        # make sure the last chunk covers the remaining lines
-        if chunk >= (args.cores - 1) and stop < num_lines:
-            stop = num_lines
-        starts.append(start)
-        stops.append(stop)
-    return list(enumerate(zip(starts, stops)))
-
-def get_num_lines(index_file):
-    with open(index_file) as index_handle:
-        index_handle.next()
-        num_lines = int(index_handle.next().strip())
-    print "Loading %d variants." % (num_lines)
-    return num_lines
-
-def grabix_index(fname):
-    if not which("grabix"):
-        print_cmd_not_found_and_exit("grabix")
-    index_file = fname + ".gbi"
-    if file_exists(index_file):
-        return index_file
-    print "Indexing {0} with grabix.".format(fname)
-    subprocess.check_call("grabix index {fname}".format(fname=fname), shell=True)
-    return index_file
-
-def bgzip(fname):
-
-    if not which("bgzip"):
-        print_cmd_not_found_and_exit("bgzip")
-
-    if is_gz_file(fname):
-        return fname
-
-    vcf_time = os.path.getmtime(fname)
-    bgzip_file = fname + ".gz"
-
-    if not file_exists(bgzip_file) or \
-       (file_exists(bgzip_file) and os.path.getmtime(bgzip_file) < vcf_time):
-        print "Bgzipping {0} into {1}.".format(fname, fname + ".gz")
-        subprocess.check_call("bgzip -c {fname} > \
-                              {fname}.gz".format(fname=fname),
-                              shell=True)
-    elif file_exists(bgzip_file) and os.path.getmtime(bgzip_file) > vcf_time:
-        print "Loading with existing bgzip ({0}) version of {1}.".format(fname + ".gz", fname)
-
-    return bgzip_file
-
-
-def is_gz_file(fname):
-    _, ext = os.path.splitext(fname)
-    if ext == ".gz":
-        return True
+                       " {passonly} {skip_info_string} {test_mode} {gt_codec}"
+                       " {buffer_size} {reader} {resume}{annotation_sources}"
+                       " --split-range {start} {stop}"
+                       " -o 1 {vcf}.chunk{chunk_num}.db")
+    return gemini_load_cmd
+
+def get_chunk_steps(vcf_file, args):
+    """
+    Split the VCF into chunks of about equal loading cost, more chunks
+    than cores so that the workers can balance the load between them.
+    Returns (chunk_num, (start, stop)) pairs of vcf_split positions, or
+    of bcf_reader positions for a VCF read with pysam, costliest first;
+    the chunk_nums number the chunks in file order.
+    """
+    num_chunks = int(args.cores) * CHUNKS_PER_CORE
+    if bcf_reader.use_pysam(args):
+        # genomic ranges from the index, which htslib can seek to
+        units = bcf_reader.get_units(vcf_file, num_chunks * UNITS_PER_CHUNK)
     else:
-        return False
+        splitter = vcf_split.VcfSplitter(vcf_file)
+        units = splitter.get_units(num_chunks * UNITS_PER_CHUNK)
+    chunks = plan_chunks(units, num_chunks)
+    print "Breaking {0} into {1} chunks.".format(vcf_file, len(chunks))
+    steps = [(chunk_num, (start, stop))
+             for chunk_num, (start, stop, cost) in enumerate(chunks)]
+    costs = [cost for (start, stop, cost) in chunks]
+    return sorted(steps, key=lambda step: -costs[step[0]])
+
+def plan_chunks(units, num_chunks):
+    """
+    Group consecutive units into about num_chunks (start, stop, cost)
+    chunks of equal cost. A chunk is ended early at a chromosome change
+    once it has CHROM_BREAK_SLACK of the target cost.
+    """
+    target = float(sum(unit[2] for unit in units)) / num_chunks
+    chunks = []
+    start = units[0][0]
+    cost = 0.0
+    for unit_start, unit_stop, unit_cost, ends_chrom in units:
+        cost += unit_cost
+        if cost >= target or (ends_chrom and cost >= CHROM_BREAK_SLACK * target):
+            chunks.append((start, unit_stop, cost))
+            start = unit_stop
+            cost = 0.0
+    if start < units[-1][1]:
+        chunks.append((start, units[-1][1], cost))
+    return chunks
+
+def get_chunk_prefix(vcf_file):
+    """
+    Return the prefix of the chunk database names of a VCF.
+    """
+    if vcf_file.endswith(".gz"):
+        return vcf_file[:-len(".gz")]
+    return vcf_file
 
 def get_submit_command(args):
     return "{cmd}"
@@ -5,8 +5,15 @@ import os.path
 import sys
 import sqlite3
 import numpy as np
+import itertools
 from itertools import repeat
 import json
+import collections
+import threading
+import Queue
+import time
+import resource
+import gzip
 
 # third-party imports
 import cyvcf as vcf
@@ -18,21 +25,235 @@ import gene_table
 import infotag
 import database
 import annotations
+import annotation_index
+import annotation_tracks
+import annotation_cache
 import func_impact
-import severe_impact
+import vcf_split
+import bcf_reader
 import popgen
+import load_profile
 from gemini_constants import *
+import compression
 from compression import pack_blob
 from gemini.config import read_gemini_config
 
 
+# genotype columns and per-variant genotype metrics of one buffered variant
+VariantGenotypes = collections.namedtuple("VariantGenotypes",
+                                          "gt_bases gt_types gt_phases \
+                                           gt_depths gt_ref_depths \
+                                           gt_alt_depths gt_quals \
+                                           hom_ref het hom_alt unknown \
+                                           call_rate aaf pi_hat")
+
+# buffers of variants each stage of the load pipeline may hold
+# waiting for the next stage
+PIPELINE_DEPTH = 2
+
+# a buffer of variants is flushed to the database once it holds
+# DEFAULT_BUFFER_SIZE variants or its parsed records take about
+# DEFAULT_BUFFER_MEMORY MB / (PIPELINE_DEPTH + 2), the number of buffers
+# of parsed records the pipeline can hold at once, whichever comes first
+DEFAULT_BUFFER_SIZE = 10000
+DEFAULT_BUFFER_MEMORY = 1024
+
+# the approximate memory taken by a parsed VCF record: a fixed part, a
+# part per sample (the parsed call and its genotype array entries), and
+# a multiple of the length of its INFO strings (the record, the row and
+# the pickled INFO BLOB each hold a copy)
+RECORD_BYTES = 4096
+GENOTYPE_BYTES = 768
+INFO_STRING_COPIES = 3
+
+# how far the load of a database has got: the first variant_id of the
+# load and the last one committed, the number of input records read up
+# to it (including those skipped by --passonly), the split range of a
+# chunk, the sample genotype counts so far, and whether the load is done
+LoadCheckpoint = collections.namedtuple("LoadCheckpoint",
+                                        "first_variant_id variant_id \
+                                         records skipped \
+                                         split_start split_stop \
+                                         sample_gt_counts complete")
+
+# positions of the BLOB columns in a variants row (the INFO dictionary)
+# and in a variant_genotypes row (gts ... gt_quals)
+VARIANT_BLOB_COLUMNS = [-3]
+GENOTYPE_BLOB_COLUMNS = range(1, 8)
+
+
+class _StageFailed(object):
+    """Sent down the pipeline in place of a buffer when a stage fails."""
+    def __init__(self, exc_info):
+        self.exc_info = exc_info
+
+_STAGE_DONE = object()
+
+
+def _run_stage(stage_fn, items, out_queue, abort):
+    """
+    Body of a pipeline thread: put stage_fn(item) on out_queue for every
+    item, followed by _STAGE_DONE, or by _StageFailed on an exception.
+    Gives up as soon as the abort event is set.
+    """
+    try:
+        for item in items:
+            if not _put(out_queue, stage_fn(item), abort):
+                return
+    except Exception:
+        _put(out_queue, _StageFailed(sys.exc_info()), abort)
+    else:
+        _put(out_queue, _STAGE_DONE, abort)
+
+
+def _put(out_queue, item, abort):
+    while not abort.is_set():
+        try:
+            out_queue.put(item, timeout=0.1)
+            return True
+        except Queue.Full:
+            pass
+    return False
+
+
+def _drain(in_queue, abort):
+    """
+    Yield the items of a pipeline queue until the stage before it is
+    done or the abort event is set, re-raising upstream failures.
+    """
+    while not abort.is_set():
+        try:
+            item = in_queue.get(timeout=0.1)
+        except Queue.Empty:
+            continue
+        if item is _STAGE_DONE:
+            return
+        if isinstance(item, _StageFailed):
+            raise item.exc_info[0], item.exc_info[1], item.exc_info[2]
+        yield item
+
+
+def get_load_checkpoint(db, split_range=None):
+    """
+    Return the LoadCheckpoint of a partially or fully loaded database, or
+    None if there is nothing to resume: no database, no checkpoint, or a
+    checkpoint for another split_range.
+    """
+    if not os.path.exists(db):
+        return None
+    conn = sqlite3.connect(db)
+    try:
+        row = database.get_load_checkpoint(conn.cursor())
+    except sqlite3.DatabaseError:
+        # e.g. a database file cut short
+        row = None
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    checkpoint = LoadCheckpoint(*row)
+    if split_range is None:
+        split_range = (None, None)
+    if (checkpoint.split_start, checkpoint.split_stop) != tuple(split_range):
+        return None
+    return checkpoint
+
+
+def check_append_samples(cursor, samples):
+    """
+    Exit unless samples, those of a VCF being appended to a database,
+    are the samples of the database in the same order.
+    """
+    db_samples = database.get_sample_names(cursor)
+    if list(samples) != db_samples:
+        sys.exit("ERROR: the VCF cannot be appended to the database, as its "
+                 "samples (%d) differ from those of the database (%d) or are "
+                 "in another order.\n" % (len(samples), len(db_samples)))
+
+
+def _skip_records(lines, num_records):
+    """
+    Yield the header lines of a VCF, then its records after the first
+    num_records, without parsing the skipped ones.
+    """
+    lines = iter(lines)
+    for line in lines:
+        if not line.startswith("#"):
+            if num_records == 0:
+                yield line
+            break
+        yield line
+    for line in itertools.islice(lines, max(0, num_records - 1), None):
+        yield line
+
+
+def peak_memory_mb(who=resource.RUSAGE_SELF):
+    """
+    Return the peak resident memory of this process (or of the largest of
+    its finished child processes with RUSAGE_CHILDREN) in MB.
+    """
+    peak = resource.getrusage(who).ru_maxrss
+    # kilobytes on Linux, bytes on OS X
+    if sys.platform == "darwin":
+        return peak / 2.0 ** 20
+    return peak / 2.0 ** 10
+
+
+# gene summary rows parsed once per process (multicore load workers
+# populate many chunk databases from the same table)
+_gene_summary_rows = {}
+
+
+def _read_gene_summary(file):
+    if file not in _gene_summary_rows:
+        #unique identifier for each entry
+        i = 0
+        contents = []
+        for line in open(file, 'r'):
+            col = line.strip().split("\t")
+            if not col[0].startswith("Chromosome"):
+                i += 1
+                table = gene_table.gene_summary(col)
+                # defaul cosmic census to False
+                cosmic_census = 0
+                summary_list = [str(i),table.chrom,table.gene,table.is_hgnc,
+                                table.ensembl_gene_id,table.hgnc_id,
+                                table.transcript_min_start,
+                                table.transcript_max_end,table.strand,
+                                table.synonym,table.rvis,table.mam_phenotype,
+                                cosmic_census]
+                contents.append(summary_list)
+        _gene_summary_rows[file] = contents
+    return _gene_summary_rows[file]
+
+
+def _pack_variant(variant):
+    """
+    Encode the BLOB columns of a variants row in place
+    (see compression.pack_blob).
+    """
+    with load_profile.timer("pack_blob"):
+        for col in VARIANT_BLOB_COLUMNS:
+            variant[col] = pack_blob(variant[col])
+
+
+def _pack_genotypes(genotypes):
+    """
+    Encode the genotype BLOB columns of a variant_genotypes row in place.
+    """
+    with load_profile.timer("pack_blob"):
+        for col in GENOTYPE_BLOB_COLUMNS:
+            genotypes[col] = pack_blob(genotypes[col])
+
+
 class GeminiLoader(object):
     """
     Object for creating and populating a gemini
     database and auxillary data files.
     """
-    def __init__(self, args, buffer_size=10000):
+    def __init__(self, args, buffer_size=None, vcf_stream=None):
         self.args = args
+        self.vcf_stream = vcf_stream
 
         # create the gemini database
         self._create_db()
@@ -51,11 +272,17 @@ class GeminiLoader(object):
         else:
             print 'both genotypes and load_genotypes'
             self.num_samples = 0
+        if self.appending:
+            check_append_samples(self.c,
+                                 self.samples if self.num_samples else [])
 
-        self.buffer_size = buffer_size
+        self._init_buffering(buffer_size)
         self._get_anno_version()
+        compression.set_genotype_codec(getattr(self.args, "gt_codec", None)
+                                       or compression.DEFAULT_GT_CODEC)
         
-        if not args.skip_gene_tables:
+        if not args.skip_gene_tables and self.checkpoint is None \
+                and not self.appending:
             print "not skipping gene_tables..."
             self._get_gene_detailed()
             self._get_gene_summary()
@@ -67,20 +294,45 @@ class GeminiLoader(object):
         else:
             print 'no VEP annotation'
             self._effect_fields = []
+        if self.args.anno_type is not None:
+            self._effect_parser = func_impact.EffectParser(self.args,
+                                                           self._effect_fields)
 
     def store_resources(self):
         """Create table of annotation resources used in this gemini database.
         """
         print 'Creating table of annotation resources used in this gemini database.'
-        database.insert_resources(self.c, annotations.get_resources())
+        database.insert_resources(self.c,
+                                  annotations.get_resources(annotations.annos))
 
     def store_version(self):
         """Create table documenting which gemini version was used for this db.
         """
         database.insert_version(self.c, version.__version__)
 
+    def _init_buffering(self, buffer_size=None):
+        """
+        Set the count and memory limits of each buffer of variants, and
+        size the SQLite page cache to hold the rows of a buffer.
+        """
+        buffer_size = buffer_size or getattr(self.args, "buffer_size", None) \
+            or DEFAULT_BUFFER_SIZE
+        buffer_memory = getattr(self.args, "buffer_memory", None) \
+            or DEFAULT_BUFFER_MEMORY
+        self.buffer_bytes = buffer_memory * 2 ** 20 / (PIPELINE_DEPTH + 2)
+        self.record_bytes = RECORD_BYTES + GENOTYPE_BYTES * self.num_samples
+        # cap the count too, as the genotype arrays of a buffer are
+        # preallocated for that many variants
+        self.buffer_size = max(1, min(buffer_size,
+                                      self.buffer_bytes / self.record_bytes))
+        self.c.execute('PRAGMA cache_size = -%d'
+                       % max(2000, self.buffer_bytes / 1024))
+
     def _get_vid(self):
-        if hasattr(self.args, 'offset'):
+        if self.appending:
+            # continue after the variants already in the database
+            return database.get_max_variant_id(self.c) + 1
+        elif getattr(self.args, 'offset', None) is not None:
             v_id = int(self.args.offset)
         else:
             v_id = 1
@@ -88,82 +340,368 @@ class GeminiLoader(object):
 
     def populate_from_vcf(self):
         """
+        Load the VCF through a pipeline of threads joined by bounded
+        queues: parsing buffers of records, annotating them, packing
+        their BLOB columns and, in this thread, inserting them. zlib
+        and SQLite release the GIL, so packing and inserting overlap
+        with parsing and annotation.
         """
-        import gemini_annotate  # avoid circular dependencies
-        self.v_id = self._get_vid()
+        self.v_id = self.first_variant_id = self._get_vid()
         self.counter = 0
-        self.var_buffer = []
-        self.var_impacts_buffer = []
-        buffer_count = 0
         self.skipped = 0
-        extra_file, extraheader_file = gemini_annotate.get_extra_files(self.args.db)
-        extra_headers = {}
-        with open(extra_file, "w") as extra_handle:
-            # process and load each variant in the VCF file
-            for var in self.vcf_reader:
-                if self.args.passonly and (var.FILTER is not None and var.FILTER != "."):
-                    self.skipped += 1
-                    continue
-                (variant, variant_impacts, extra_fields) = self._prepare_variation(var)
-                if extra_fields:
-                    extra_handle.write("%s\n" % json.dumps(extra_fields))
-                    extra_headers = self._update_extra_headers(extra_headers, extra_fields)
-                # add the core variant info to the variant buffer
-                self.var_buffer.append(variant)
-                # add each of the impact for this variant (1 per gene/transcript)
-                for var_impact in variant_impacts:
-                    self.var_impacts_buffer.append(var_impact)
-
-                buffer_count += 1
-                # buffer full - time to insert into DB
-                if buffer_count >= self.buffer_size:
-                    sys.stderr.write("pid " + str(os.getpid()) + ": " +
-                                     str(self.counter) + " variants processed.\n")
-                    database.insert_variation(self.c, self.var_buffer)
-                    database.insert_variation_impacts(self.c,
-                                                      self.var_impacts_buffer)
-                    # binary.genotypes.append(var_buffer)
-                    # reset for the next batch
-                    self.var_buffer = []
-                    self.var_impacts_buffer = []
-                    buffer_count = 0
-                self.v_id += 1
-                self.counter += 1
-        if extra_headers:
-            with open(extraheader_file, "w") as out_handle:
-                out_handle.write(json.dumps(extra_headers))
+        self.records = 0
+        self.num_flushes = 0
+        if self.checkpoint is not None:
+            self._resume_from_checkpoint()
+            if self.checkpoint.complete:
+                self.v_id -= 1
+                return
         else:
-            os.remove(extra_file)
-        # final load to the database
+            if self.appending and hasattr(self, "sample_gt_counts"):
+                self._read_sample_gt_counts()
+            database.create_load_checkpoint(self.c)
+            database.create_variant_extras(self.c)
+            self._update_checkpoint(self.v_id - 1, (0, 0))
+        self.anno_cache = None
+        if getattr(self.args, "annotation_cache", None):
+            self.anno_cache = annotation_cache.AnnotationCache(
+                self.args.annotation_cache, self.args.annotation_cache_size,
+                getattr(self.args, "annotation_cache_generation", None))
+
+        stages = [("parsed", lambda batch: batch),
+                  ("annotated", self._annotate_batch),
+                  ("packed", self._pack_batch)]
+        queues = []
+        # set once this thread stops consuming, so the stages stop too
+        abort = threading.Event()
+        items = self._parsed_batches()
+        for name, stage_fn in stages:
+            out_queue = Queue.Queue(PIPELINE_DEPTH)
+            thread = threading.Thread(target=_run_stage,
+                                      args=(stage_fn, items, out_queue, abort))
+            thread.daemon = True
+            thread.start()
+            queues.append((name, out_queue))
+            items = _drain(out_queue, abort)
+        depth_totals = dict((name, 0) for name, _ in queues)
+        num_batches = 0
+
+        try:
+            # insert each buffer of variants as it comes out of the pipeline
+            for (var_buffer, gt_buffer, var_impacts_buffer, extras, gt_counts,
+                 progress) in items:
+                if self.num_added_columns:
+                    padding = [None] * self.num_added_columns
+                    var_buffer = [variant + padding for variant in var_buffer]
+                with load_profile.timer("insert.variants"):
+                    database.insert_variation(self.c, var_buffer)
+                if gt_buffer:
+                    with load_profile.timer("insert.variant_genotypes"):
+                        database.insert_variant_genotypes(self.c, gt_buffer)
+                with load_profile.timer("insert.variant_impacts"):
+                    database.insert_variation_impacts(self.c, var_impacts_buffer)
+                if extras:
+                    with load_profile.timer("insert.variant_extras"):
+                        database.insert_variant_extras(self.c, extras)
+                if gt_counts is not None:
+                    self.sample_gt_counts += gt_counts
+                # the checkpoint comes last: when resuming, variants
+                # past it are from a buffer that may be incomplete
+                with load_profile.timer("checkpoint"):
+                    self._update_checkpoint(var_buffer[-1][4], progress)
+                depths = [(name, out_queue.qsize()) for name, out_queue in queues]
+                for name, depth in depths:
+                    depth_totals[name] += depth
+                num_batches += 1
+                sys.stderr.write("pid " + str(os.getpid()) + ": " +
+                                 str(self.counter) + " variants processed "
+                                 "(queued buffers: " +
+                                 ", ".join("%s %d" % d for d in depths) + ").\n")
+        finally:
+            abort.set()
         self.v_id -= 1
-        database.insert_variation(self.c, self.var_buffer)
-        database.insert_variation_impacts(self.c, self.var_impacts_buffer)
+        self.num_flushes = num_batches
         sys.stderr.write("pid " + str(os.getpid()) + ": " +
                          str(self.counter) + " variants processed.\n")
+        sys.stderr.write("pid " + str(os.getpid()) + ": " +
+                         str(num_batches) + " buffers flushed (at most " +
+                         str(self.buffer_size) + " variants or %.1f MB each), "
+                         "peak memory %.0f MB.\n"
+                         % (self.buffer_bytes / 2.0 ** 20, peak_memory_mb()))
+        if num_batches > 0:
+            # a stage whose output queue stays full is faster than the
+            # stages after it; the first stage with an empty output
+            # queue is the bottleneck.
+            sys.stderr.write("pid " + str(os.getpid()) + ": mean queued "
+                             "buffers: " +
+                             ", ".join("%s %.2f" % (name, depth_totals[name] /
+                                                    float(num_batches))
+                                       for name, _ in queues) + ".\n")
         if self.args.passonly:
             sys.stderr.write("pid " + str(os.getpid()) + ": " +
                              str(self.skipped) + " skipped due to having the "
                              "FILTER field set.\n")
+        if self.anno_cache is not None:
+            sys.stderr.write("pid " + str(os.getpid()) + ": " +
+                             str(self.anno_cache.hits) + " variants annotated "
+                             "from the annotation cache, " +
+                             str(self.anno_cache.misses) + " added to it.\n")
+            self.anno_cache.close()
 
-    def _update_extra_headers(self, headers, cur_fields):
-        """Update header information for extra fields.
-        """
-        for field, val in cur_fields.items():
-            headers[field] = self._get_field_type(val, headers.get(field, "integer"))
-        return headers
-
-    def _get_field_type(self, val, cur_type):
-        start_checking = False
-        for name, check_fn in [("integer", int), ("float", float), ("text", str)]:
-            if name == cur_type:
-                start_checking = True
-            if start_checking:
-                try:
-                    check_fn(val)
-                    break
-                except:
-                    continue
-        return name
+    def _update_checkpoint(self, variant_id, progress, complete=False):
+        """
+        Record that the variants up to variant_id are in the database,
+        progress being the (records read, records skipped) of the input
+        up to them.
+        """
+        records, skipped = progress
+        split_range = getattr(self.args, "split_range", None) or (None, None)
+        gt_counts = None
+        if hasattr(self, "sample_gt_counts"):
+            gt_counts = sqlite3.Binary(self.sample_gt_counts.tostring())
+        self.checkpoint = LoadCheckpoint(self.first_variant_id, variant_id,
+                                         records, skipped,
+                                         split_range[0],
+                                         split_range[1], gt_counts, complete)
+        database.update_load_checkpoint(self.c, self.checkpoint)
+
+    def _resume_from_checkpoint(self):
+        """
+        Continue after the last checkpoint of an interrupted load: drop
+        the variants written after it and restore the counters.
+        """
+        checkpoint = self.checkpoint
+        sys.stderr.write("pid " + str(os.getpid()) + ": resuming the load of " +
+                         self.args.db + " after variant " +
+                         str(checkpoint.variant_id) + " (" +
+                         str(checkpoint.records) + " VCF records read).\n")
+        # add_extras drops the staging table once it has applied it, which
+        # an interrupted load may have done before it was marked complete
+        database.create_variant_extras(self.c)
+        self.c.execute("BEGIN TRANSACTION")
+        self.c.execute("delete from variants where variant_id > ?",
+                       (checkpoint.variant_id,))
+        self.c.execute("delete from variant_genotypes where variant_id > ?",
+                       (checkpoint.variant_id,))
+        self.c.execute("delete from variant_impacts where variant_id > ?",
+                       (checkpoint.variant_id,))
+        self.c.execute("delete from variant_extras where variant_id > ?",
+                       (checkpoint.variant_id,))
+        self.c.execute("END")
+        self.first_variant_id = checkpoint.first_variant_id
+        self.v_id = checkpoint.variant_id + 1
+        self.counter = self.v_id - self.first_variant_id
+        self.records = checkpoint.records
+        self.skipped = checkpoint.skipped
+        if checkpoint.sample_gt_counts is not None:
+            self.sample_gt_counts = np.fromstring(
+                str(checkpoint.sample_gt_counts),
+                dtype=self.sample_gt_counts.dtype).reshape(
+                    self.sample_gt_counts.shape).copy()
+
+    def mark_load_complete(self):
+        """
+        Record that every variant has been loaded, so that resuming the
+        load has nothing left to do.
+        """
+        self._update_checkpoint(self.checkpoint.variant_id,
+                                (self.checkpoint.records,
+                                 self.checkpoint.skipped), True)
+
+    def _parsed_batches(self):
+        """
+        Yield buffers of the VCF records to be loaded, each ending once
+        it holds self.buffer_size records or about self.buffer_bytes of
+        them, along with the number of input records read and skipped up
+        to its end.
+        """
+        batch = []
+        batch_bytes = 0
+        started = time.time()
+        for var in self.vcf_reader:
+            self.records += 1
+            if self.args.passonly and (var.FILTER is not None and var.FILTER != "."):
+                self.skipped += 1
+                continue
+            batch.append(var)
+            batch_bytes += self.record_bytes
+            for value in var.INFO.itervalues():
+                if isinstance(value, str):
+                    batch_bytes += INFO_STRING_COPIES * len(value)
+            if len(batch) >= self.buffer_size or batch_bytes >= self.buffer_bytes:
+                load_profile.record("parse_vcf", time.time() - started)
+                yield batch, (self.records, self.skipped)
+                batch = []
+                batch_bytes = 0
+                started = time.time()
+        if batch:
+            load_profile.record("parse_vcf", time.time() - started)
+            yield batch, (self.records, self.skipped)
+
+    def _annotate_batch(self, parsed):
+        """
+        Build the variants, variant_genotypes and variant_impacts rows of
+        a buffer of VCF records, leaving their BLOB columns unpacked.
+        Returns them along with the variant_extras rows of the records
+        with extra fields, the sample genotype counts of the buffer and
+        the number of input records read and skipped up to its end.
+        """
+        batch, progress = parsed
+        var_buffer = []
+        gt_buffer = []
+        var_impacts_buffer = []
+        extras = []
+        if self.anno_cache is not None:
+            with load_profile.timer("annotation_cache.get"):
+                batch_annos = self.anno_cache.get_many(batch)
+        else:
+            batch_annos = [None] * len(batch)
+        misses = [i for i, var_annos in enumerate(batch_annos) if var_annos is None]
+        if misses:
+            miss_annos = self._get_batch_annotations([batch[i] for i in misses])
+            for i, var_annos in zip(misses, miss_annos):
+                batch_annos[i] = var_annos
+        # the annotations looked up one variant at a time are added to
+        # each variant's dictionary by _get_annotation
+        num_annos = [len(var_annos) for var_annos in batch_annos]
+        with load_profile.timer("genotypes"):
+            batch_gts, gt_counts = self._get_batch_genotypes(batch)
+        for var, var_annos, var_gts in zip(batch, batch_annos, batch_gts):
+            (variant, genotypes, variant_impacts, extra_fields) = \
+                self._prepare_variation(var, var_annos, var_gts, pack=False)
+            if extra_fields:
+                extras.append((self.v_id, json.dumps(extra_fields)))
+            # add the core variant info to the variant buffer
+            var_buffer.append(variant)
+            if genotypes is not None:
+                gt_buffer.append(genotypes)
+            # add each of the impact for this variant (1 per gene/transcript)
+            var_impacts_buffer.extend(variant_impacts)
+            self.v_id += 1
+            self.counter += 1
+        if self.anno_cache is not None:
+            # store the misses, and the hits that needed more sources
+            # than were cached (e.g. after an earlier --skip-cadd load)
+            misses = set(misses)
+            new_annos = [(batch[i], batch_annos[i]) for i in xrange(len(batch))
+                         if i in misses or len(batch_annos[i]) > num_annos[i]]
+            with load_profile.timer("annotation_cache.put"):
+                self.anno_cache.put_many(new_annos)
+        return var_buffer, gt_buffer, var_impacts_buffer, extras, gt_counts, progress
+
+    def _pack_batch(self, annotated):
+        """
+        Encode the BLOB columns of a buffer of variants and
+        variant_genotypes rows.
+        """
+        for variant in annotated[0]:
+            _pack_variant(variant)
+        for genotypes in annotated[1]:
+            _pack_genotypes(genotypes)
+        return annotated
+
+    def _get_batch_annotations(self, batch):
+        """
+        Resolve the compiled allele-level sources and the in-memory
+        region tracks for a buffer of variants.
+        """
+        batch_annos = annotation_index.get_batch_annotations(batch)
+        for var_annos, track_annos in \
+                zip(batch_annos, annotation_tracks.get_batch_annotations(batch)):
+            var_annos.update(track_annos)
+        return batch_annos
+
+    def _init_genotype_buffers(self):
+        """
+        Preallocate one (buffer_size x num_samples) array for each
+        numeric genotype column, in one set for every buffer that can be
+        in the load pipeline before its BLOB columns are packed. The sets
+        are refilled in turn.
+        """
+        shape = (self.buffer_size, self.num_samples)
+        self.gt_buffers = []
+        for _ in range(PIPELINE_DEPTH + 2):
+            self.gt_buffers.append((np.empty(shape, np.int8),  # -1, 0, 1, 2
+                                    np.empty(shape, np.bool),  # T F F
+                                    np.empty(shape, np.int32),  # 10 37 0
+                                    np.empty(shape, np.int32),  # 2 21 0 -1
+                                    np.empty(shape, np.int32),  # 8 16 0 -1
+                                    np.empty(shape, np.float32)))  # 10.78 22 99 -1
+        self.gt_buffer_idx = 0
+
+    def _get_batch_genotypes(self, batch):
+        """
+        Load the genotypes of a buffer of variants into 2D arrays and
+        compute the genotype counts, call rate, alternate allele frequency
+        and nucleotide diversity of every variant with whole-matrix numpy
+        reductions. Returns one VariantGenotypes per variant and the
+        (num_samples x 4) genotype counts of the samples over the buffer,
+        or Nones if genotypes are not being loaded.
+        """
+        if self.args.no_genotypes or self.args.no_load_genotypes:
+            return [None] * len(batch), None
+        if not hasattr(self, "gt_buffers"):
+            self._init_genotype_buffers()
+        n = len(batch)
+        (gt_types, gt_phases, gt_depths, gt_ref_depths, gt_alt_depths,
+         gt_quals) = [buf[:n] for buf in self.gt_buffers[self.gt_buffer_idx]]
+        self.gt_buffer_idx = (self.gt_buffer_idx + 1) % len(self.gt_buffers)
+        for i, var in enumerate(batch):
+            gt_types[i] = var.gt_types
+            gt_phases[i] = var.gt_phases
+            gt_depths[i] = var.gt_depths
+            gt_ref_depths[i] = var.gt_ref_depths
+            gt_alt_depths[i] = var.gt_alt_depths
+            gt_quals[i] = var.gt_quals
+
+        # tally the genotypes, both per variant and per sample
+        counts = {}
+        sample_counts = np.zeros_like(self.sample_gt_counts)
+        for gt_type in (HOM_REF, HET, HOM_ALT, UNKNOWN):
+            is_type = gt_types == gt_type
+            counts[gt_type] = is_type.sum(axis=1)
+            sample_counts[:, gt_type] = \
+                is_type.sum(axis=0, dtype=sample_counts.dtype)
+
+        called = counts[HOM_REF] + counts[HET] + counts[HOM_ALT]
+        call_rate = called / float(self.num_samples)
+        # same definitions as cyvcf's aaf and nucl_diversity
+        with np.errstate(divide="ignore", invalid="ignore"):
+            aaf = np.where(called > 0,
+                           (counts[HET] + 2 * counts[HOM_ALT]) / (2.0 * called),
+                           0.0)
+            n_chroms = 2 * called
+            pi_hat = (n_chroms / (n_chroms - 1.0)) * (2 * aaf * (1 - aaf))
+
+        var_gts = []
+        for i, var in enumerate(batch):
+            multi_allelic = len(var.ALT) > 1
+            var_gts.append(VariantGenotypes(
+                np.array(var.gt_bases, np.str),  # 'A/G', './.'
+                gt_types[i], gt_phases[i], gt_depths[i],
+                gt_ref_depths[i], gt_alt_depths[i], gt_quals[i],
+                int(counts[HOM_REF][i]), int(counts[HET][i]),
+                int(counts[HOM_ALT][i]), int(counts[UNKNOWN][i]),
+                float(call_rate[i]),
+                None if multi_allelic else float(aaf[i]),
+                None if multi_allelic else float(pi_hat[i])))
+        return var_gts, sample_counts
+
+    def _get_annotation(self, name, get_fn, var, batch_annos):
+        """
+        Use the annotation looked up for the whole buffer if there is one,
+        otherwise query the Tabix file for this variant. Sources that were
+        not selected for the load are left NULL.
+        """
+        if name not in annotations.annos:
+            return annotations.SKIPPED_VALUES.get(name)
+        if batch_annos is not None and name in batch_annos:
+            return batch_annos[name]
+        with load_profile.timer("annotation." + name):
+            value = get_fn(var)
+        if batch_annos is not None:
+            batch_annos[name] = value
+        return value
 
     def build_indices_and_disconnect(self):
         """
@@ -176,15 +714,39 @@ class GeminiLoader(object):
         database.close_and_commit(self.c, self.conn)
 
     def _get_vcf_reader(self):
+        # the records already loaded when resuming
+        skip = self.checkpoint.records if self.checkpoint is not None else 0
+
+        def lines(source):
+            return _skip_records(source, skip) if skip else source
+
+        # the VCF records are handed to us by a multicore load worker
+        if self.vcf_stream is not None:
+            return vcf.VCFReader(lines(self.vcf_stream), 'rb')
+        # the VCF is a BCF or is read by htslib on request
+        elif bcf_reader.use_pysam(self.args):
+            if getattr(self.args, 'split_range', None) is not None:
+                start, stop = self.args.split_range
+                return bcf_reader.BcfReader(self.args.vcf, start, stop, skip)
+            return bcf_reader.BcfReader(self.args.vcf, skip=skip)
+        # the VCF is one chunk of a larger file
+        elif getattr(self.args, 'split_range', None) is not None:
+            start, stop = self.args.split_range
+            return vcf.VCFReader(lines(vcf_split.chunk_lines(self.args.vcf, start, stop)),
+                                 'rb')
         # the VCF is a proper file
-        if self.args.vcf != "-":
-            if self.args.vcf.endswith(".gz"):
+        elif self.args.vcf != "-":
+            if skip and self.args.vcf.endswith(".gz"):
+                return vcf.VCFReader(lines(gzip.open(self.args.vcf)), 'rb')
+            elif skip:
+                return vcf.VCFReader(lines(open(self.args.vcf)), 'rb')
+            elif self.args.vcf.endswith(".gz"):
                 return vcf.VCFReader(open(self.args.vcf), 'rb', compressed=True)
             else:
                 return vcf.VCFReader(open(self.args.vcf), 'rb')
         # the VCF is being passed in via STDIN
         else:
-            return vcf.VCFReader(sys.stdin, 'rb')
+            return vcf.VCFReader(lines(sys.stdin), 'rb')
 
     def _get_anno_version(self):
         """
@@ -245,23 +807,48 @@ class GeminiLoader(object):
         """
         private method to open a new DB
         and create the gemini schema.
+
+        With --resume, a database holding a checkpoint of an interrupted
+        load of the same input is reopened instead (see self.checkpoint).
+        With --append, the existing database is opened to add variants to.
         """
+        self.appending = getattr(self.args, "append", False)
+        self.checkpoint = None
+        if getattr(self.args, "resume", False):
+            self.checkpoint = get_load_checkpoint(
+                self.args.db, getattr(self.args, "split_range", None))
+            if self.appending and self.checkpoint is not None \
+                    and self.checkpoint.complete:
+                # that of the load (or append) before this append
+                self.checkpoint = None
         # open up a new database
-        if os.path.exists(self.args.db):
+        if self.checkpoint is None and not self.appending \
+                and os.path.exists(self.args.db):
             os.remove(self.args.db)
         self.conn = sqlite3.connect(self.args.db)
         self.conn.isolation_level = None
         self.c = self.conn.cursor()
         self.c.execute('PRAGMA synchronous = OFF')
         self.c.execute('PRAGMA journal_mode=MEMORY')
+        self.num_added_columns = 0
+        if self.checkpoint is not None or self.appending:
+            if self.appending:
+                # columns added since the database was created (e.g. the
+                # extra fields of an earlier load) are NULL for the new variants
+                self.num_added_columns = database.get_num_added_columns(self.c)
+            return
         # create the gemini database tables for the new DB
         database.create_tables(self.c)
         database.create_sample_table(self.c, self.args)
 
-    def _prepare_variation(self, var):
+    def _prepare_variation(self, var, batch_annos=None, var_gts=None, pack=True):
         """private method to collect metrics for a single variant (var) in a VCF file.
 
-        Extracts variant information, variant impacts and extra fields for annotation.
+        Extracts variant information, genotypes (None when they are not
+        loaded), variant impacts and extra fields for annotation.
+        batch_annos and var_gts hold the annotations and genotype information
+        already computed for the buffer this variant belongs to. With
+        pack=False the BLOB columns are left for _pack_variant to encode.
         """
         extra_fields = {}
         # these metric require that genotypes are present in the file
@@ -273,53 +860,90 @@ class GeminiLoader(object):
 
         # only compute certain metrics if genoypes are available
         if not self.args.no_genotypes and not self.args.no_load_genotypes:
-            hom_ref = var.num_hom_ref
-            hom_alt = var.num_hom_alt
-            het = var.num_het
-            unknown = var.num_unknown
-            call_rate = var.call_rate
-            aaf = var.aaf
+            if var_gts is None:
+                batch_gts, gt_counts = self._get_batch_genotypes([var])
+                var_gts = batch_gts[0]
+                self.sample_gt_counts += gt_counts
+            hom_ref = var_gts.hom_ref
+            hom_alt = var_gts.hom_alt
+            het = var_gts.het
+            unknown = var_gts.unknown
+            call_rate = var_gts.call_rate
+            aaf = var_gts.aaf
             hwe_p_value, inbreeding_coeff = \
                 popgen.get_hwe_likelihood(hom_ref, het, hom_alt, aaf)
-            pi_hat = var.nucl_diversity
+            pi_hat = var_gts.pi_hat
         else:
             aaf = infotag.extract_aaf(var)
 
         ############################################################
         # collect annotations from gemini's custom annotation files
         ############################################################
-        pfam_domain = annotations.get_pfamA_domains(var)
-        cyto_band = annotations.get_cyto_info(var)
-        rs_ids = annotations.get_dbsnp_info(var)
-        clinvar_info = annotations.get_clinvar_info(var)
-        in_dbsnp = 0 if rs_ids is None else 1
-        rmsk_hits = annotations.get_rmsk_info(var)
-        in_cpg = annotations.get_cpg_island_info(var)
-        in_segdup = annotations.get_segdup_info(var)
-        is_conserved = annotations.get_conservation_info(var)
-        esp = annotations.get_esp_info(var)
-        thousandG = annotations.get_1000G_info(var)
-        recomb_rate = annotations.get_recomb_info(var)
-        gms = annotations.get_gms(var)
-        grc = annotations.get_grc(var)
-        in_cse = annotations.get_cse(var)
-        encode_tfbs = annotations.get_encode_tfbs(var)
-        encode_dnaseI = annotations.get_encode_dnase_clusters(var)
-        encode_cons_seg = annotations.get_encode_consensus_segs(var)
-        gerp_el = annotations.get_gerp_elements(var)
-        vista_enhancers = annotations.get_vista_enhancers(var)
-        cosmic_ids = annotations.get_cosmic_info(var)
+        pfam_domain = self._get_annotation("pfam_domain",
+                                           annotations.get_pfamA_domains,
+                                           var, batch_annos)
+        cyto_band = self._get_annotation("cytoband", annotations.get_cyto_info,
+                                         var, batch_annos)
+        rs_ids = self._get_annotation("dbsnp", annotations.get_dbsnp_info,
+                                      var, batch_annos)
+        clinvar_info = self._get_annotation("clinvar", annotations.get_clinvar_info,
+                                            var, batch_annos)
+        if "dbsnp" in annotations.annos:
+            in_dbsnp = 0 if rs_ids is None else 1
+        else:
+            in_dbsnp = None
+        rmsk_hits = self._get_annotation("rmsk", annotations.get_rmsk_info,
+                                         var, batch_annos)
+        in_cpg = self._get_annotation("cpg_island", annotations.get_cpg_island_info,
+                                      var, batch_annos)
+        in_segdup = self._get_annotation("segdup", annotations.get_segdup_info,
+                                         var, batch_annos)
+        is_conserved = self._get_annotation("conserved",
+                                            annotations.get_conservation_info,
+                                            var, batch_annos)
+        esp = self._get_annotation("esp", annotations.get_esp_info,
+                                   var, batch_annos)
+        thousandG = self._get_annotation("1000g", annotations.get_1000G_info,
+                                         var, batch_annos)
+        recomb_rate = self._get_annotation("recomb", annotations.get_recomb_info,
+                                           var, batch_annos)
+        gms = self._get_annotation("gms", annotations.get_gms,
+                                   var, batch_annos)
+        grc = self._get_annotation("grc", annotations.get_grc,
+                                   var, batch_annos)
+        in_cse = self._get_annotation("cse", annotations.get_cse,
+                                      var, batch_annos)
+        encode_tfbs = self._get_annotation("encode_tfbs",
+                                           annotations.get_encode_tfbs,
+                                           var, batch_annos)
+        encode_dnaseI = self._get_annotation("encode_dnase1",
+                                             annotations.get_encode_dnase_clusters,
+                                             var, batch_annos)
+        encode_cons_seg = self._get_annotation("encode_consensus_segs",
+                                               annotations.get_encode_consensus_segs,
+                                               var, batch_annos)
+        gerp_el = self._get_annotation("gerp_elements",
+                                       annotations.get_gerp_elements,
+                                       var, batch_annos)
+        vista_enhancers = self._get_annotation("vista_enhancers",
+                                               annotations.get_vista_enhancers,
+                                               var, batch_annos)
+        cosmic_ids = self._get_annotation("cosmic", annotations.get_cosmic_info,
+                                          var, batch_annos)
 
         #load CADD scores by default
         if self.args.skip_cadd is False:
-            (cadd_raw, cadd_scaled) = annotations.get_cadd_scores(var)
+            (cadd_raw, cadd_scaled) = \
+                self._get_annotation("cadd_score", annotations.get_cadd_scores,
+                                     var, batch_annos)
         else:
             (cadd_raw, cadd_scaled) = (None, None)
 
         # load the GERP score for this variant by default.
         gerp_bp = None
         if self.args.skip_gerp_bp is False:
-            gerp_bp = annotations.get_gerp_bp(var)
+            gerp_bp = self._get_annotation("gerp_bp", annotations.get_gerp_bp,
+                                           var, batch_annos)
 
         # impact is a list of impacts for this variant
         impacts = None
@@ -332,9 +956,8 @@ class GeminiLoader(object):
         polyphen_pred = polyphen_score = sift_pred = sift_score = anno_id = None
 
         if self.args.anno_type is not None:
-            impacts = func_impact.interpret_impact(self.args, var, self._effect_fields)
-            severe_impacts = \
-                severe_impact.interpret_severe_impact(self.args, var, self._effect_fields)
+            with load_profile.timer("impacts"):
+                impacts, severe_impacts = self._effect_parser.parse(var)
             if severe_impacts:
                 extra_fields.update(severe_impacts.extra_fields)
                 gene = severe_impacts.gene
@@ -368,28 +991,15 @@ class GeminiLoader(object):
         if var.ID is not None and var.ID != ".":
             vcf_id = var.ID
 
-        # build up numpy arrays for the genotype information.
-        # these arrays will be pickled-to-binary, compressed,
-        # and loaded as SqlLite BLOB values (see compression.pack_blob)
+        # the numpy arrays of genotype information (rows of the buffer's
+        # 2D arrays) will be encoded as typed binary buffers, compressed,
+        # and loaded as SqlLite BLOB values (see _pack_variant)
+        genotypes = None
         if not self.args.no_genotypes and not self.args.no_load_genotypes:
-            gt_bases = np.array(var.gt_bases, np.str)  # 'A/G', './.'
-            gt_types = np.array(var.gt_types, np.int8)  # -1, 0, 1, 2
-            gt_phases = np.array(var.gt_phases, np.bool)  # T F F
-            gt_depths = np.array(var.gt_depths, np.int32)  # 10 37 0
-            gt_ref_depths = np.array(var.gt_ref_depths, np.int32)  # 2 21 0 -1
-            gt_alt_depths = np.array(var.gt_alt_depths, np.int32)  # 8 16 0 -1
-            gt_quals = np.array(var.gt_quals, np.float32)  # 10.78 22 99 -1
-
-            # tally the genotypes
-            self._update_sample_gt_counts(gt_types)
-        else:
-            gt_bases = None
-            gt_types = None
-            gt_phases = None
-            gt_depths = None
-            gt_ref_depths = None
-            gt_alt_depths = None
-            gt_quals = None
+            genotypes = [self.v_id, var_gts.gt_bases, var_gts.gt_types,
+                         var_gts.gt_phases, var_gts.gt_depths,
+                         var_gts.gt_ref_depths, var_gts.gt_alt_depths,
+                         var_gts.gt_quals]
 
         if self.args.skip_info_string is False:
             info = var.INFO
@@ -414,17 +1024,11 @@ class GeminiLoader(object):
 
         # construct the core variant record.
         # 1 row per variant to VARIANTS table
-        if extra_fields:
-            extra_fields.update({"chrom": var.CHROM, "start": var.start, "end": var.end})
         chrom = var.CHROM if var.CHROM.startswith("chr") else "chr" + var.CHROM
         variant = [chrom, var.start, var.end,
                    vcf_id, self.v_id, anno_id, var.REF, ','.join(var.ALT),
                    var.QUAL, filter, var.var_type,
-                   var.var_subtype, pack_blob(gt_bases), pack_blob(gt_types),
-                   pack_blob(gt_phases), pack_blob(gt_depths),
-                   pack_blob(gt_ref_depths), pack_blob(gt_alt_depths),
-                   pack_blob(gt_quals),
-                   call_rate, in_dbsnp,
+                   var.var_subtype, call_rate, in_dbsnp,
                    rs_ids,
                    clinvar_info.clinvar_in_omim,
                    clinvar_info.clinvar_sig,
@@ -476,11 +1080,15 @@ class GeminiLoader(object):
                    encode_cons_seg.k562,
                    vista_enhancers,
                    cosmic_ids,
-                   pack_blob(info),
+                   info,
                    cadd_raw,
                    cadd_scaled]
+        if pack:
+            _pack_variant(variant)
+            if genotypes is not None:
+                _pack_genotypes(genotypes)
 
-        return variant, variant_impacts, extra_fields
+        return variant, genotypes, variant_impacts, extra_fields
 
     def _prepare_samples(self):
         """
@@ -519,7 +1127,8 @@ class GeminiLoader(object):
                 print 'sample_id and set the other required fields to None'
                 sample_list = [i, None, sample]
                 sample_list += list(repeat(None, len(default_ped_fields) - 2))
-            database.insert_sample(self.c, sample_list)
+            if self.checkpoint is None and not self.appending:
+                database.insert_sample(self.c, sample_list)
             
     def _get_gene_detailed(self):
         """
@@ -616,29 +1225,10 @@ class GeminiLoader(object):
         """
         define a gene summary table
         """
-        #unique identifier for each entry
-        i = 0
-        contents = summary_list = []
-        
         config = read_gemini_config()
         path_dirname = config["annotation_dir"]
         file = os.path.join(path_dirname, 'summary_gene_table_v75')
-        
-        for line in open(file, 'r'):
-            col = line.strip().split("\t")
-            if not col[0].startswith("Chromosome"):
-                i += 1
-                table = gene_table.gene_summary(col)
-                # defaul cosmic census to False
-                cosmic_census = 0
-                summary_list = [str(i),table.chrom,table.gene,table.is_hgnc,
-                                table.ensembl_gene_id,table.hgnc_id,
-                                table.transcript_min_start,
-                                table.transcript_max_end,table.strand,
-                                table.synonym,table.rvis,table.mam_phenotype,
-                                cosmic_census]
-                contents.append(summary_list)
-        database.insert_gene_summary(self.c, contents)
+        database.insert_gene_summary(self.c, _read_gene_summary(file))
 
     def update_gene_table(self):
         """
@@ -648,11 +1238,7 @@ class GeminiLoader(object):
     def _init_sample_gt_counts(self):
         """
         Initialize a 2D array of counts for tabulating
-<<<<<<< HEAD
         the count of each genotype type for each sample.
-=======
-        the count of each genotype type for eaxh sample.
->>>>>>> 21164f486cc4cada95efe9e8ad64bea91e9d6caf
 
         The first dimension is one bucket for each sample.
         The second dimension (size=4) is a count for each gt type.
@@ -664,18 +1250,26 @@ class GeminiLoader(object):
         self.sample_gt_counts = np.array(np.zeros((len(self.samples), 4)),
                                          dtype='uint32')
 
-    def _update_sample_gt_counts(self, gt_types):
+    def _read_sample_gt_counts(self):
         """
-        Update the count of each gt type for each sample
+        Start from the genotype counts of the samples stored in the
+        database, e.g. to add those of the variants being appended.
         """
-        for idx, gt_type in enumerate(gt_types):
-            self.sample_gt_counts[idx][gt_type] += 1
+        self.c.execute("select sample_id, num_hom_ref, num_het, num_hom_alt, "
+                       "num_unknown from sample_genotype_counts")
+        for idx, hom_ref, het, hom_alt, unknown in self.c.fetchall():
+            self.sample_gt_counts[idx, HOM_REF] = hom_ref
+            self.sample_gt_counts[idx, HET] = het
+            self.sample_gt_counts[idx, HOM_ALT] = hom_alt
+            self.sample_gt_counts[idx, UNKNOWN] = unknown
 
     def store_sample_gt_counts(self):
         """
         Update the count of each gt type for each sample
         """
         self.c.execute("BEGIN TRANSACTION")
+        # a resumed or appended load stores them again
+        self.c.execute("delete from sample_genotype_counts")
         for idx, gt_counts in enumerate(self.sample_gt_counts):
             self.c.execute("""insert into sample_genotype_counts values \
                             (?,?,?,?,?)""",
@@ -696,13 +1290,27 @@ def load(parser, args):
         exit("\nERROR: Unsupported selection for -t\n")
 
     # collect of the the add'l annotation files
-    annotations.load_annos()
+    annotations.load_annos(annotations.get_sources(args))
+    annotation_index.load_indexes()
+    annotation_tracks.load_tracks()
+    load_chunk_db(args)
 
+
+def load_chunk_db(args, vcf_stream=None):
+    """
+    Populate one chunk database from the VCF named by args.vcf, or from
+    vcf_stream when given. The annotation files must already be open.
+    Returns the number of buffers of variants flushed to the database.
+    """
     # create a new gemini loader and populate
     # the gemini db and files from the VCF
-    gemini_loader = GeminiLoader(args)
-    gemini_loader.store_resources()
-    gemini_loader.store_version()
+    gemini_loader = GeminiLoader(args, vcf_stream=vcf_stream)
+    if gemini_loader.checkpoint is not None and gemini_loader.checkpoint.complete:
+        print "{0} is already loaded.".format(args.db)
+        return 0
+    if gemini_loader.checkpoint is None:
+        gemini_loader.store_resources()
+        gemini_loader.store_version()
 
     gemini_loader.populate_from_vcf()
     gemini_loader.update_gene_table()
@@ -710,3 +1318,5 @@ def load(parser, args):
 
     if not args.no_genotypes and not args.no_load_genotypes:
         gemini_loader.store_sample_gt_counts()
+    gemini_loader.mark_load_complete()
+    return gemini_loader.num_flushes
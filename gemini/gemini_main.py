@@ -10,9 +10,14 @@ import \
     gemini_region, gemini_stats, gemini_dump, \
     gemini_annotate, gemini_windower, \
     gemini_browser, gemini_dbinfo, gemini_merge_chunks, gemini_update, \
-    gemini_amend, gemini_set_somatic, gemini_actionable_mutations
+    gemini_amend, gemini_set_somatic, gemini_actionable_mutations, \
+    gemini_add_samples, gemini_annotate_builtins, gemini_migrate_genotypes
 
 import gemini.version
+import compression
+import annotation_index
+import annotation_cache
+import genotype_matrix
 
 import tool_compound_hets
 import tool_autosomal_recessive
@@ -109,6 +114,24 @@ def main():
                              action='store_true',
                              help='Do not load CADD scores. Loaded by default',
                              default=False)
+    parser_load.add_argument('--annotations',
+                             dest='annotations',
+                             metavar='SOURCES',
+                             default=None,
+                             help='A comma-separated list of the annotation sources '
+                                  'to use (e.g., dbsnp,clinvar,esp). All by default.')
+    parser_load.add_argument('--skip-annotations',
+                             dest='skip_annotations',
+                             metavar='SOURCES',
+                             default=None,
+                             help='A comma-separated list of annotation sources '
+                                  'not to use. Their columns are left NULL.')
+    parser_load.add_argument('--defer-annotations',
+                             dest='defer_annotations',
+                             action='store_true',
+                             help='Do not look up any annotation source, to be able to query '
+                                  'the database sooner. Use `gemini annotate_builtins` to add them.',
+                             default=False)
     parser_load.add_argument('--skip-gene-tables',
                              dest='skip_gene_tables',
                              action='store_true',
@@ -133,6 +156,30 @@ def main():
                              default=1,
                              type=int,
                              help="Number of cores to use to load in parallel.")
+    parser_load.add_argument('--annotation-cache', dest='annotation_cache',
+                             metavar='FILE',
+                             default=None,
+                             help="Reuse the annotations of variants already "
+                                  "seen by earlier loads, kept in the cache "
+                                  "FILE (created if needed).")
+    parser_load.add_argument('--annotation-cache-size',
+                             dest='annotation_cache_size',
+                             metavar='N',
+                             type=int,
+                             default=annotation_cache.DEFAULT_MAX_ENTRIES,
+                             help="Maximum number of variants kept in the "
+                                  "annotation cache (default: %(default)s).")
+    parser_load.add_argument('--profile', dest='profile',
+                             metavar='FILE',
+                             default=None,
+                             help="Write the time spent in each loading stage "
+                                  "to FILE, as JSON if FILE ends in .json and "
+                                  "as TSV otherwise.")
+    parser_load.add_argument('--retries', dest='retries',
+                             default=2,
+                             type=int,
+                             help="Number of times a failed chunk is reloaded "
+                                  "when using --cores.")
     parser_load.add_argument('--scheduler', dest='scheduler', default=None,
                              choices=["lsf", "sge", "slurm", "torque"],
                              action=IPythonAction,
@@ -149,6 +196,51 @@ def main():
                          action='store_true',
                          help='Load in test mode (faster)',
                          default=False)
+    parser_load.add_argument('--gt-codec',
+                             dest='gt_codec',
+                             default=compression.DEFAULT_GT_CODEC,
+                             choices=compression.available_genotype_codecs(),
+                             help='Compressor used for the genotype BLOB columns.')
+    parser_load.add_argument('--buffer-size',
+                             dest='buffer_size',
+                             type=int,
+                             default=gemini_load_chunk.DEFAULT_BUFFER_SIZE,
+                             help='The most variants buffered before they are written to the '
+                                  'database (default: %(default)s).')
+    parser_load.add_argument('--buffer-memory',
+                             dest='buffer_memory',
+                             type=int,
+                             metavar='MB',
+                             default=gemini_load_chunk.DEFAULT_BUFFER_MEMORY,
+                             help='About how much memory the buffered variants of each load '
+                                  'process may take; fewer variants are buffered for VCFs with '
+                                  'many samples (default: %(default)s MB).')
+    parser_load.add_argument('--append',
+                             dest='append',
+                             action='store_true',
+                             default=False,
+                             help='Add the variants of the VCF to an existing database '
+                                  'with the same samples.')
+    parser_load.add_argument('--resume',
+                             dest='resume',
+                             action='store_true',
+                             default=False,
+                             help='Continue an interrupted load of the same VCF into the same '
+                                  'database from its last checkpoint.')
+    parser_load.add_argument('--reader',
+                             dest='reader',
+                             default=None,
+                             choices=['cyvcf', 'pysam'],
+                             help='The VCF parser: cyvcf (the default) or pysam, which reads '
+                                  'through htslib and splits an indexed VCF.gz by region for a '
+                                  'parallel load. BCF files are always read with pysam.')
+    parser_load.add_argument('--build-matrix',
+                             dest='build_matrix',
+                             action='store_true',
+                             default=False,
+                             help='Also write the memory-mapped genotype matrix read by '
+                                  'whole-cohort tools such as stats --mds, roh and burden '
+                                  '(see `gemini build_matrix`).')
 
     parser_load.set_defaults(func=gemini_load.load)
     #########################################
@@ -165,6 +257,46 @@ def main():
                               help='New sample information file to load')
     parser_amend.set_defaults(func=gemini_amend.amend)
 
+    #########################################
+    # $ gemini add_samples
+    #########################################
+    parser_add_samples = subparsers.add_parser('add_samples',
+            help='Add the samples of a VCF called at the same sites to a '
+                 'GEMINI database.')
+    parser_add_samples.add_argument('db',
+                                    metavar='db',
+                                    help='The name of the database to add the samples to.')
+    parser_add_samples.add_argument('-v',
+                                    dest='vcf',
+                                    help='The VCF (or BCF) file of the new samples.')
+    parser_add_samples.add_argument('-p',
+                                    dest='ped_file',
+                                    help='Sample information file in PED+ format.',
+                                    default=None)
+    parser_add_samples.set_defaults(func=gemini_add_samples.add_samples)
+
+    #########################################
+    # $ gemini migrate_genotypes
+    #########################################
+    parser_migrate = subparsers.add_parser('migrate_genotypes',
+            help='Move the genotypes of a database created by an earlier '
+                 'version of GEMINI out of its variants table.')
+    parser_migrate.add_argument('db',
+                                metavar='db',
+                                help='The name of the database to migrate.')
+    parser_migrate.set_defaults(func=gemini_migrate_genotypes.migrate_genotypes)
+
+    #########################################
+    # $ gemini build_matrix
+    #########################################
+    parser_matrix = subparsers.add_parser('build_matrix',
+            help='Write a memory-mapped matrix of the genotypes of a database '
+                 'for the tools that read every sample of every variant.')
+    parser_matrix.add_argument('db',
+                               metavar='db',
+                               help='The name of the database.')
+    parser_matrix.set_defaults(func=genotype_matrix.build)
+
     #########################################
     # $ gemini load_chunk
     #########################################
@@ -188,6 +320,16 @@ def main():
                                   dest='offset',
                                   help='The starting number for the variant_ids',
                                   default=None)
+    parser_loadchunk.add_argument('--split-range',
+                                  dest='split_range',
+                                  nargs=2,
+                                  type=int,
+                                  metavar=('START', 'STOP'),
+                                  default=None,
+                                  help='Load only the lines starting at file positions '
+                                       'START <= pos < STOP (byte offsets, BGZF virtual '
+                                       'offsets for a bgzipped VCF, or contig index << 32 | '
+                                       'position for a VCF read with pysam).')
     parser_loadchunk.add_argument('-p',
                                   dest='ped_file',
                                   help='Sample information file in PED+ format.',
@@ -212,6 +354,24 @@ def main():
                                  action='store_true',
                                  help='Do not load CADD scores. Loaded by default',
                                  default=False)
+    parser_loadchunk.add_argument('--annotations',
+                                  dest='annotations',
+                                  metavar='SOURCES',
+                                  default=None,
+                                  help='A comma-separated list of the annotation sources '
+                                       'to use (e.g., dbsnp,clinvar,esp). All by default.')
+    parser_loadchunk.add_argument('--skip-annotations',
+                                  dest='skip_annotations',
+                                  metavar='SOURCES',
+                                  default=None,
+                                  help='A comma-separated list of annotation sources '
+                                       'not to use. Their columns are left NULL.')
+    parser_loadchunk.add_argument('--defer-annotations',
+                                  dest='defer_annotations',
+                                  action='store_true',
+                                  help='Do not look up any annotation source, to be able to query '
+                                       'the database sooner. Use `gemini annotate_builtins` to add them.',
+                                  default=False)
     parser_loadchunk.add_argument('--skip-gene-tables',
                              dest='skip_gene_tables',
                              action='store_true',
@@ -232,6 +392,38 @@ def main():
                          action='store_true',
                          help='Load in test mode (faster)',
                          default=False)
+    parser_loadchunk.add_argument('--gt-codec',
+                                  dest='gt_codec',
+                                  default=compression.DEFAULT_GT_CODEC,
+                                  choices=compression.available_genotype_codecs(),
+                                  help='Compressor used for the genotype BLOB columns.')
+    parser_loadchunk.add_argument('--buffer-size',
+                                  dest='buffer_size',
+                                  type=int,
+                                  default=gemini_load_chunk.DEFAULT_BUFFER_SIZE,
+                                  help='The most variants buffered before they are written to the '
+                                       'database (default: %(default)s).')
+    parser_loadchunk.add_argument('--buffer-memory',
+                                  dest='buffer_memory',
+                                  type=int,
+                                  metavar='MB',
+                                  default=gemini_load_chunk.DEFAULT_BUFFER_MEMORY,
+                                  help='About how much memory the buffered variants of each load '
+                                       'process may take; fewer variants are buffered for VCFs with '
+                                       'many samples (default: %(default)s MB).')
+    parser_loadchunk.add_argument('--resume',
+                                  dest='resume',
+                                  action='store_true',
+                                  default=False,
+                                  help='Continue an interrupted load of the same VCF into the same '
+                                       'database from its last checkpoint.')
+    parser_loadchunk.add_argument('--reader',
+                                  dest='reader',
+                                  default=None,
+                                  choices=['cyvcf', 'pysam'],
+                                  help='The VCF parser: cyvcf (the default) or pysam, which reads '
+                                       'through htslib and splits an indexed VCF.gz by region for a '
+                                       'parallel load. BCF files are always read with pysam.')
     parser_loadchunk.set_defaults(func=gemini_load_chunk.load)
 
     #########################################
@@ -508,8 +700,77 @@ def main():
                   'in the event that a variant overlaps multiple annotations '
                   'in your annotation file (-f).'
                   'Any of {mean, median, min, max, mode, list, uniq_list, first, last}')
+    parser_get.add_argument('--sweep',
+            dest='sweep',
+            action='store_true',
+            default=False,
+            help='Annotate all the variants in a single sequential pass over '
+                 'the annotation file, rather than with one lookup per variant. '
+                 'Much faster for large databases.')
+    parser_get.add_argument('--manifest',
+            dest='manifest',
+            metavar='FILE',
+            default=None,
+            help='A tab-delimited file listing several annotation files, one per '
+                 'line with the values of -f, -a, -c and, for extract, of -e, -t '
+                 'and -o, to annotate the variants with all of them in one pass.')
+    parser_get.add_argument('--cores',
+            dest='cores',
+            default=1,
+            type=int,
+            help='Number of cores to use to annotate the chromosomes in parallel '
+                 'with --manifest.')
     parser_get.set_defaults(func=gemini_annotate.annotate)
 
+    #########################################
+    # gemini annotate_builtins
+    #########################################
+    parser_builtins = subparsers.add_parser('annotate_builtins',
+            help='Fill the columns of the built-in annotation sources, '
+                 'e.g. after a load with --defer-annotations')
+    parser_builtins.add_argument('db',
+            metavar='db',
+            help='The name of the database to be updated.')
+    parser_builtins.add_argument('--annotations',
+            dest='annotations',
+            metavar='SOURCES',
+            default=None,
+            help='A comma-separated list of the annotation sources '
+                 'to use (e.g., dbsnp,clinvar,esp). All by default.')
+    parser_builtins.add_argument('--skip-annotations',
+            dest='skip_annotations',
+            metavar='SOURCES',
+            default=None,
+            help='A comma-separated list of annotation sources not to use.')
+    parser_builtins.add_argument('--cores',
+            dest='cores',
+            default=1,
+            type=int,
+            help='Number of CPU cores to use for the annotation lookups.')
+    parser_builtins.set_defaults(func=gemini_annotate_builtins.annotate_builtins)
+
+    #########################################
+    # gemini reannotate
+    #########################################
+    parser_reannotate = subparsers.add_parser('reannotate',
+            help='Refresh the columns of built-in annotation sources, '
+                 'e.g. after installing new releases of their files')
+    parser_reannotate.add_argument('db',
+            metavar='db',
+            help='The name of the database to be updated.')
+    parser_reannotate.add_argument('--sources',
+            dest='sources',
+            metavar='SOURCES',
+            default=None,
+            help='A comma-separated list of the annotation sources '
+                 'to refresh (e.g., clinvar,dbsnp).')
+    parser_reannotate.add_argument('--cores',
+            dest='cores',
+            default=1,
+            type=int,
+            help='Number of CPU cores to use for the annotation lookups.')
+    parser_reannotate.set_defaults(func=gemini_annotate_builtins.reannotate)
+
     #########################################
     # gemini windower
     #########################################
@@ -913,6 +1174,26 @@ def main():
     parser_update.set_defaults(func=gemini_update.release)
 
 
+    #########################################
+    # $ gemini compile_annotations
+    #########################################
+    parser_compile = subparsers.add_parser("compile_annotations",
+            help="Compile the dbSNP, ClinVar, ESP, 1000G, COSMIC and GMS "
+                 "annotation files into memory-mapped indexes for faster loading.")
+    parser_compile.add_argument("--sources",
+            dest="sources",
+            metavar="STRING",
+            default=None,
+            help="Comma separated list of the sources to compile (def. all). "
+                 "Any of {%s}" % ", ".join(annotation_index.INDEXED_SOURCES))
+    parser_compile.add_argument("--force",
+            dest="force",
+            action="store_true",
+            default=False,
+            help="Rebuild indexes that are already up to date.")
+    parser_compile.set_defaults(func=annotation_index.compile_annotations)
+
+
     #########################################
     # $ gemini roh
     #########################################
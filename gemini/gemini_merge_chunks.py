@@ -5,44 +5,6 @@ import database as gemini_db
 import gemini_utils as util
 
 
-def append_variant_info(main_curr, chunk_db):
-    """
-    Append the variant and variant_info data from a chunk_db
-    to the main database.
-    """
-
-    cmd = "attach ? as toMerge"
-    main_curr.execute(cmd, (chunk_db, ))
-
-    main_curr.execute("BEGIN TRANSACTION")
-    cmd = "INSERT INTO variants SELECT * FROM toMerge.variants"
-    main_curr.execute(cmd)
-
-    cmd = \
-        "INSERT INTO variant_impacts SELECT * FROM toMerge.variant_impacts"
-    main_curr.execute(cmd)
-    main_curr.execute("END TRANSACTION")
-
-    cmd = "detach toMerge"
-    main_curr.execute(cmd)
-
-
-def append_sample_genotype_counts(main_curr, chunk_db):
-    """
-    Append the sample_genotype_counts from a chunk_db
-    to the main database.
-    """
-    cmd = "attach ? as toMerge"
-    main_curr.execute(cmd, (chunk_db, ))
-
-    cmd = "INSERT INTO sample_genotype_counts \
-           SELECT * FROM toMerge.sample_genotype_counts"
-    main_curr.execute(cmd)
-
-    cmd = "detach toMerge"
-    main_curr.execute(cmd)
-
-
 def append_sample_info(main_curr, chunk_db):
     """
     Append the sample info from a chunk_db
@@ -118,39 +80,120 @@ def append_gene_detailed(main_curr, chunk_db):
     cmd = "detach toMerge"
     main_curr.execute(cmd)
 
-def update_sample_genotype_counts(main_curr, chunk_db):
-    """
-    Update the main sample_genotype_counts table with the
-    counts observed in one of the chunked databases (chunk_db)
-    """
-    curr_db_conn = sqlite3.connect(chunk_db)
-    curr_db_conn.isolation_level = None
-    curr_db_conn.row_factory = sqlite3.Row
-    curr_db_curr = curr_db_conn.cursor()
-
-    cmd = "SELECT sample_id, num_hom_ref, \
-                  num_het, num_hom_alt, \
-                  num_unknown FROM sample_genotype_counts"
-    curr_db_curr.execute(cmd)
-    for row in curr_db_curr:
-        main_curr.execute("""UPDATE sample_genotype_counts
-                          SET num_hom_ref = num_hom_ref + ?,
-                              num_het = num_het + ?,
-                              num_hom_alt = num_hom_alt + ?,
-                              num_unknown = num_unknown + ?
-                          WHERE sample_id= ? """,
-                          (row['num_hom_ref'],
-                           row['num_het'],
-                           row['num_hom_alt'],
-                           row['num_unknown'],
-                           row['sample_id']))
-    curr_db_curr.close()
+def get_attach_limit(main_curr):
+    """
+    Return how many databases this SQLite library lets us attach
+    at once (SQLITE_MAX_ATTACHED, 10 unless compiled otherwise).
+    """
+    limit = 0
+    try:
+        while limit < 125:
+            main_curr.execute("attach ':memory:' as probe%d" % limit)
+            limit += 1
+    except sqlite3.OperationalError:
+        pass
+    for i in range(limit):
+        main_curr.execute("detach probe%d" % i)
+    return limit
+
+
+def get_variant_id_range(chunk_db):
+    conn = sqlite3.connect(chunk_db)
+    first, last = conn.execute("SELECT min(variant_id), max(variant_id) "
+                               "FROM variants").fetchone()
+    conn.close()
+    return first, last
+
+
+def get_variant_id_shifts(chunk_dbs, next_id=1):
+    """
+    Return the number to add to the variant_ids of each of chunk_dbs,
+    given in file order, so that the variants of each chunk follow those
+    of the previous chunks, the first one starting at next_id.
+    """
+    shifts = []
+    for chunk_db in chunk_dbs:
+        first, last = get_variant_id_range(chunk_db)
+        if first is None:
+            shifts.append(0)
+            continue
+        shifts.append(next_id - first)
+        next_id += last - first + 1
+    return shifts
+
+
+def _get_columns(main_curr, table, name):
+    return [col[1] for col in
+            main_curr.execute("PRAGMA %s.table_info(%s)" % (name, table))]
+
+
+def _insert_shifted(main_curr, table, names, shifts):
+    """
+    Insert the rows of a table of each attached chunk into the main
+    database, with the variant_ids of each chunk shifted by its shift.
+    The chunks are given in file order, where their shifted variant_ids
+    follow each other, so inserting them one after the other keeps the
+    rows in variant_id order without sorting them. The columns are
+    named, as the main table may have more of them (e.g. added by gemini
+    annotate before an append).
+    """
+    cols = _get_columns(main_curr, table, names[0])
+    for name, shift in zip(names, shifts):
+        shifted = ["variant_id + %d AS variant_id" % shift if col == "variant_id"
+                   else col for col in cols]
+        main_curr.execute("INSERT INTO %s (%s) SELECT %s FROM %s.%s"
+                          % (table, ", ".join(cols), ", ".join(shifted),
+                             name, table))
+
+
+def merge_variant_info(main_curr, chunk_dbs, shifts):
+    """
+    Stream the variants, variant_genotypes, variant_impacts and
+    variant_extras of a batch of chunk_dbs into the main database, in
+    variant_id order after adding the shift of each chunk.
+    """
+    names = ["chunk%d" % i for i in range(len(chunk_dbs))]
+    for name, chunk_db in zip(names, chunk_dbs):
+        main_curr.execute("attach ? as %s" % name, (chunk_db, ))
+
+    main_curr.execute("BEGIN TRANSACTION")
+    for table in ("variants", "variant_genotypes", "variant_impacts",
+                  "variant_extras"):
+        _insert_shifted(main_curr, table, names, shifts)
+
+    # collect the per-chunk genotype counts; they are summed once at the end
+    cmd = "INSERT INTO temp.chunk_genotype_counts " + \
+          " UNION ALL ".join("SELECT * FROM %s.sample_genotype_counts" % name
+                             for name in names)
+    main_curr.execute(cmd)
+    main_curr.execute("END TRANSACTION")
+
+    for name in names:
+        main_curr.execute("detach %s" % name)
+
+
+def sum_sample_genotype_counts(main_curr):
+    """
+    Fill sample_genotype_counts with the sum of the counts
+    observed in every chunk.
+    """
+    main_curr.execute("""INSERT INTO sample_genotype_counts
+                         SELECT sample_id, sum(num_hom_ref), sum(num_het),
+                                sum(num_hom_alt), sum(num_unknown)
+                         FROM temp.chunk_genotype_counts
+                         GROUP BY sample_id""")
+    main_curr.execute("DROP TABLE temp.chunk_genotype_counts")
 
 
 def merge_db_chunks(args):
+    """
+    Merge the chunk databases args.chunkdbs into a new database args.db
+    or, with args.append, add their variants to the existing args.db.
+    """
+    append = getattr(args, "append", False)
 
     # open up a new database
-    if os.path.exists(args.db):
+    if os.path.exists(args.db) and not append:
         os.remove(args.db)
 
     main_conn = sqlite3.connect(args.db)
@@ -159,28 +202,43 @@ def merge_db_chunks(args):
     main_curr.execute('PRAGMA synchronous = OFF')
     main_curr.execute('PRAGMA journal_mode=MEMORY')
     # create the gemini database tables for the new DB
-    gemini_db.create_tables(main_curr)
+    if not append:
+        gemini_db.create_tables(main_curr)
+    gemini_db.create_variant_extras(main_curr)
+    main_curr.execute("""CREATE TEMP TABLE chunk_genotype_counts
+                         AS SELECT * FROM sample_genotype_counts WHERE 1=0""")
 
     databases = []
     for database in args.chunkdbs:
-        databases.append(database)
-
-    for idx, database in enumerate(databases):
-
-        db = database[0]
-
-        append_variant_info(main_curr, db)
-
+        databases.append(database[0])
+
+    if append:
+        # the counts of the variants already loaded are summed with
+        # those of the chunks
+        main_curr.execute("BEGIN TRANSACTION")
+        main_curr.execute("""INSERT INTO temp.chunk_genotype_counts
+                             SELECT * FROM sample_genotype_counts""")
+        main_curr.execute("DELETE FROM sample_genotype_counts")
+        main_curr.execute("END TRANSACTION")
+        next_id = gemini_db.get_max_variant_id(main_curr) + 1
+    else:
         # we only need to add these tables from one of the chunks.
-        if idx == 0:
-            append_sample_genotype_counts(main_curr, db)
-            append_sample_info(main_curr, db)
-            append_resource_info(main_curr, db)
-            append_version_info(main_curr, db)
-            append_gene_summary(main_curr, db)
-            append_gene_detailed(main_curr, db)
-        else:
-            update_sample_genotype_counts(main_curr, db)
+        append_sample_info(main_curr, databases[0])
+        append_resource_info(main_curr, databases[0])
+        append_version_info(main_curr, databases[0])
+        append_gene_summary(main_curr, databases[0])
+        append_gene_detailed(main_curr, databases[0])
+        next_id = 1
+
+    # the chunks are given in file order; shifting the variant_ids of
+    # each chunk past those of the previous ones and merging batches of
+    # chunks in that order writes each table once, in variant_id order.
+    shifts = get_variant_id_shifts(databases, next_id)
+    batch_size = max(1, get_attach_limit(main_curr))
+    for i in xrange(0, len(databases), batch_size):
+        merge_variant_info(main_curr, databases[i:i + batch_size],
+                           shifts[i:i + batch_size])
+    sum_sample_genotype_counts(main_curr)
 
     main_conn.commit()
     main_curr.close()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""
+Move the genotype BLOBs of a database created before the variant_genotypes
+table out of its variants table, so that scans of the variants that do
+not need the genotypes (e.g. gemini stats, region queries or dump
+--variants) no longer read them.
+
+The genotypes are copied to variant_genotypes and the variants table is
+rebuilt without the genotype columns, keeping any columns added to it
+since it was created and its indexes. The database is then vacuumed to
+return the space of the old table.
+"""
+import os
+import re
+import sys
+import sqlite3
+
+import database
+from database import GENOTYPE_COLUMNS
+
+
+def _drop_genotype_columns(sql):
+    """
+    Remove the definitions of the genotype columns from the CREATE TABLE
+    statement of the variants table.
+    """
+    for col in GENOTYPE_COLUMNS:
+        sql, num = re.subn(r"\b%s\s+blob\s*,\s*" % col, "", sql,
+                           flags=re.IGNORECASE)
+        if num != 1:
+            sys.exit("ERROR: cannot find the definition of the %s column "
+                     "of the variants table.\n" % col)
+    return sql
+
+
+def migrate_genotypes(parser, args):
+    if args.db is None:
+        parser.print_help()
+        exit("ERROR: migrate_genotypes needs a database file\n")
+    if not os.path.exists(args.db):
+        sys.exit("ERROR: cannot find database file %s.\n" % args.db)
+
+    conn = sqlite3.connect(args.db)
+    conn.isolation_level = None
+    c = conn.cursor()
+    c.execute('PRAGMA synchronous = OFF')
+    if database.has_variant_genotypes(c):
+        print "The genotypes of {0} are already in the variant_genotypes " \
+              "table.".format(args.db)
+        return
+
+    c.execute("PRAGMA table_info(variants)")
+    columns = [row[1] for row in c.fetchall() if row[1] not in GENOTYPE_COLUMNS]
+    c.execute("select sql from sqlite_master where type='table' "
+              "and name='variants'")
+    sql = _drop_genotype_columns(c.fetchone()[0])
+    c.execute("select sql from sqlite_master where type='index' "
+              "and tbl_name='variants' and sql is not null")
+    index_sqls = [row[0] for row in c.fetchall()]
+
+    c.execute("BEGIN TRANSACTION")
+    database.create_variant_genotypes(c)
+    c.execute("insert into variant_genotypes select variant_id, " +
+              ", ".join(GENOTYPE_COLUMNS) + " from variants "
+              "where gt_types is not null order by variant_id")
+    num_genotypes = c.rowcount
+    c.execute(re.sub(r"^(create\s+table\s+(if\s+not\s+exists\s+)?)variants\b",
+                     r"\g<1>variants_new", sql.strip(), flags=re.IGNORECASE))
+    c.execute("insert into variants_new (%s) select %s from variants "
+              "order by variant_id" % (", ".join(columns), ", ".join(columns)))
+    c.execute("drop table variants")
+    c.execute("alter table variants_new rename to variants")
+    for index_sql in index_sqls:
+        c.execute(index_sql)
+    c.execute("END")
+
+    print "Moved the genotypes of {0} variants; vacuuming {1}.".format(
+        num_genotypes, args.db)
+    c.execute("VACUUM")
+    conn.close()
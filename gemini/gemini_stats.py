@@ -2,8 +2,6 @@
 import sqlite3
 import os
 import numpy as np
-import cPickle
-import zlib
 import collections
 from collections import Counter
 
@@ -148,35 +146,27 @@ def get_mds(c, args):
     for row in c:
         idx_to_sample[int(row['sample_id']) - 1] = row['name']
 
-    query = "SELECT DISTINCT v.variant_id, v.gt_types\
-    FROM variants v\
-    WHERE v.type = 'snp'"
-    c.execute(query)
-
-    # keep a list of numeric genotype values
-    # for each sample
-    genotypes = collections.defaultdict(list)
-    for row in c:
-
-        gt_types = np.array(cPickle.loads(zlib.decompress(row['gt_types'])))
+    # the genotypes of every SNP at once, from the genotype matrix if the
+    # database has one
+    c.execute("SELECT variant_id FROM variants WHERE type = 'snp'")
+    snp_ids = [row[0] for row in c]
+    gq = GeminiQuery.GeminiQuery(args.db)
+    _, gt_types = gq.get_genotype_matrix("gt_types", variant_ids=snp_ids)
 
-        # at this point, gt_types is a numpy array
-        # idx:  0 1 2 3 4 5 6 .. #samples
-        # type [0 1 2 1 2 0 0 ..         ]
-        for idx, gt_type in enumerate(gt_types):
-            sample = idx_to_sample[idx]
-            genotypes[sample].append(gt_type)
+    # keep an array of numeric genotype values
+    # for each sample. the columns of gt_types
+    # idx:  0 1 2 3 4 5 6 .. #samples
+    # are the samples.
+    genotypes = {}
+    for idx in range(gt_types.shape[1]):
+        genotypes[idx_to_sample[idx]] = gt_types[:, idx]
 
     mds = collections.defaultdict(float)
-    # convert the genotype list for each sample
-    # to a numpy array for performance.
     # masks stores an array of T/F indicating which genotypes are
     # known (True, [0,1,2]) and unknown (False [-1]).
     masks = {}
     for s in genotypes:
         sample = str(s)
-        x = np.array(genotypes[sample])
-        genotypes[sample] = x
         masks[sample] = \
             np.ma.masked_where(genotypes[sample] != UNKNOWN,
                                genotypes[sample]).mask
@@ -0,0 +1,390 @@
+#!/usr/bin/env python
+"""
+A memory-mapped, columnar copy of the genotypes of a database, for the
+tools that look at every sample of every variant (e.g. gemini stats --mds,
+roh and burden) and would otherwise decompress one BLOB per variant.
+
+`gemini build_matrix` (or `gemini load --build-matrix`) writes the
+gt_types, gt_depths and gt_quals of the variants to a directory next to
+the database, in chunks of numpy arrays kept in two layouts:
+
+    <db>.gt/meta.json              the database it was built from, chunking
+    <db>.gt/variant_ids.npy        variant_id of each row, sorted, int64
+    <db>.gt/<field>.v<k>.npy       variant-major chunk k, variants x samples
+    <db>.gt/<field>.s<k>.npy       sample-major chunk k, samples x variants
+
+Reading the variants of a variant_id range touches only the variant-major
+chunks it spans, and reading a few samples across the whole genome only
+their rows of the sample-major chunks. A matrix no longer matching its
+database (e.g. after `gemini load --append` or `gemini add_samples`) is
+ignored until it is rebuilt, and a new load of the database removes it.
+"""
+import os
+import sys
+import json
+import shutil
+import sqlite3
+import numpy as np
+
+import compression
+import database
+from gemini_constants import UNKNOWN
+
+MATRIX_VERSION = 1
+MATRIX_SUFFIX = ".gt"
+# variants per variant-major chunk and samples per sample-major chunk
+VARIANT_CHUNK_SIZE = 65536
+SAMPLE_CHUNK_SIZE = 256
+# variant_ids looked up per query when reading chosen variants' BLOBs
+VARIANT_ID_BATCH_SIZE = 500
+
+# field -> (dtype, value of a missing genotype), as stored by the loader
+FIELDS = {"gt_types": (np.int8, UNKNOWN),
+          "gt_depths": (np.int32, -1),
+          "gt_quals": (np.float32, -1)}
+
+
+def get_matrix_dir(db):
+    return db + MATRIX_SUFFIX
+
+
+def _get_fingerprint(cursor):
+    """
+    The identifier of the load that wrote the genotypes of the database,
+    which changes when it is loaded again or variants or samples are
+    added, and its numbers of samples and variants and largest
+    variant_id, for databases loaded before there was one.
+    """
+    cursor.execute("SELECT count(*) FROM samples")
+    num_samples = cursor.fetchone()[0]
+    cursor.execute("SELECT count(*), max(variant_id) FROM variants")
+    num_variants, max_variant_id = cursor.fetchone()
+    return {"load_id": database.get_load_id(cursor),
+            "samples": num_samples, "variants": num_variants,
+            "max_variant_id": max_variant_id}
+
+
+def _read_meta(db):
+    meta_file = os.path.join(get_matrix_dir(db), "meta.json")
+    if not os.path.exists(meta_file):
+        return None
+    with open(meta_file) as in_handle:
+        return json.load(in_handle)
+
+
+def matrix_is_current(db, cursor):
+    """
+    True if a genotype matrix exists for db and was built from its
+    current variants and samples.
+    """
+    meta = _read_meta(db)
+    return meta is not None and meta.get("version") == MATRIX_VERSION and \
+        meta.get("fingerprint") == _get_fingerprint(cursor)
+
+
+def _check_field(field):
+    if field not in FIELDS:
+        raise ValueError("%s is not in the genotype matrix. Options are: %s"
+                         % (field, ", ".join(sorted(FIELDS))))
+
+
+def _genotype_queries(fields, start, end, variant_ids):
+    """
+    The queries of iter_genotypes: one for a range of variants, or one
+    per batch of the sorted variant_ids.
+    """
+    query = "SELECT variant_id, " + ", ".join(fields) + " FROM variants"
+    if variant_ids is not None:
+        for i in range(0, len(variant_ids), VARIANT_ID_BATCH_SIZE):
+            batch = variant_ids[i:i + VARIANT_ID_BATCH_SIZE]
+            yield (query + " WHERE variant_id IN (%s) ORDER BY variant_id"
+                   % ", ".join("%d" % variant_id for variant_id in batch))
+        return
+    conditions = []
+    if start is not None:
+        conditions.append("variant_id >= %d" % start)
+    if end is not None:
+        conditions.append("variant_id <= %d" % end)
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    yield query + " ORDER BY variant_id"
+
+
+def iter_genotypes(cursor, fields, num_samples, start=None, end=None,
+                   variant_ids=None):
+    """
+    Yield the variant_id and the arrays of fields of the variants, in
+    variant_id order, optionally from start to end (inclusive) or only
+    those in variant_ids, so that the BLOBs of no other variant are
+    decompressed. The genotypes of variants loaded without them are
+    missing values.
+    """
+    if variant_ids is not None:
+        variant_ids = sorted(set(variant_ids))
+    database.join_genotypes(cursor)
+    missing = [np.empty(num_samples, FIELDS[field][0]) for field in fields]
+    for arr, field in zip(missing, fields):
+        arr.fill(FIELDS[field][1])
+    for query in _genotype_queries(fields, start, end, variant_ids):
+        cursor.execute(query)
+        for row in cursor:
+            yield row[0], [compression.unpack_genotype_blob(row[i + 1])
+                           if row[i + 1] is not None else empty
+                           for i, empty in enumerate(missing)]
+
+
+class GenotypeMatrix(object):
+    """
+    The genotype matrix of a database, memory-mapped from disk.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as in_handle:
+            self.meta = json.load(in_handle)
+        self.num_samples = self.meta["fingerprint"]["samples"]
+        self.variant_ids = np.load(os.path.join(path, "variant_ids.npy"),
+                                   mmap_mode="r")
+        self.variant_chunk_size = self.meta["variant_chunk_size"]
+        self.sample_chunk_size = self.meta["sample_chunk_size"]
+        self._chunks = {}
+
+    def _chunk(self, field, layout, k):
+        key = (field, layout, k)
+        if key not in self._chunks:
+            self._chunks[key] = np.load(
+                os.path.join(self.path, "%s.%s%d.npy" % (field, layout, k)),
+                mmap_mode="r")
+        return self._chunks[key]
+
+    def get_rows(self, start=None, end=None):
+        """
+        Return the [lo, hi) rows of the variants from start to end
+        (inclusive).
+        """
+        lo = 0 if start is None else \
+            int(np.searchsorted(self.variant_ids, start, "left"))
+        hi = len(self.variant_ids) if end is None else \
+            int(np.searchsorted(self.variant_ids, end, "right"))
+        return lo, max(lo, hi)
+
+    def find_rows(self, variant_ids):
+        """
+        Return the sorted rows of those of variant_ids in the matrix.
+        """
+        variant_ids = np.unique(np.asarray(variant_ids, dtype=np.int64))
+        rows = np.searchsorted(self.variant_ids, variant_ids)
+        found = rows < len(self.variant_ids)
+        found[found] = self.variant_ids[rows[found]] == variant_ids[found]
+        return rows[found]
+
+    def get(self, field, start=None, end=None, samples=None, by_sample=False,
+            variant_ids=None):
+        """
+        Return the variant_ids of the variants from start to end
+        (inclusive), or of those in variant_ids, and their field values
+        for the sample indices in samples (all by default), as a
+        variants x samples array, or a samples x variants one with
+        by_sample.
+        """
+        _check_field(field)
+        if variant_ids is not None:
+            rows = self.find_rows(variant_ids)
+            if by_sample:
+                values = self._take_by_sample(field, rows, samples)
+            else:
+                values = self._take_by_variant(field, rows, samples)
+            return self.variant_ids[rows], values
+        lo, hi = self.get_rows(start, end)
+        if by_sample:
+            values = self._get_by_sample(field, lo, hi, samples)
+        else:
+            values = self._get_by_variant(field, lo, hi, samples)
+        return self.variant_ids[lo:hi], values
+
+    def _get_by_variant(self, field, lo, hi, samples):
+        size = self.variant_chunk_size
+        parts = []
+        for k in range(lo // size, (hi - 1) // size + 1 if hi > lo else 0):
+            chunk = self._chunk(field, "v", k)
+            part = chunk[max(lo - k * size, 0):hi - k * size]
+            parts.append(part if samples is None else part[:, samples])
+        if len(parts) == 1:
+            return parts[0]
+        if not parts:
+            num_samples = self.num_samples if samples is None else len(samples)
+            return np.empty((0, num_samples), FIELDS[field][0])
+        return np.concatenate(parts)
+
+    def _get_by_sample(self, field, lo, hi, samples):
+        size = self.sample_chunk_size
+        if samples is None:
+            samples = range(self.num_samples)
+        rows = [self._chunk(field, "s", idx // size)[idx % size, lo:hi]
+                for idx in samples]
+        if not rows:
+            return np.empty((0, hi - lo), FIELDS[field][0])
+        return np.vstack(rows)
+
+    def _take_by_variant(self, field, rows, samples):
+        size = self.variant_chunk_size
+        chunk_of = rows // size
+        parts = []
+        for k in np.unique(chunk_of):
+            part = self._chunk(field, "v", k)[rows[chunk_of == k] - k * size]
+            parts.append(part if samples is None else part[:, samples])
+        if not parts:
+            num_samples = self.num_samples if samples is None else len(samples)
+            return np.empty((0, num_samples), FIELDS[field][0])
+        return np.concatenate(parts)
+
+    def _take_by_sample(self, field, rows, samples):
+        size = self.sample_chunk_size
+        if samples is None:
+            samples = range(self.num_samples)
+        values = [self._chunk(field, "s", idx // size)[idx % size][rows]
+                  for idx in samples]
+        if not values:
+            return np.empty((0, len(rows)), FIELDS[field][0])
+        return np.vstack(values)
+
+
+def open_matrix(db, cursor):
+    """
+    Return the GenotypeMatrix of db, or None if it has none or it is out
+    of date.
+    """
+    path = get_matrix_dir(db)
+    if not os.path.exists(path):
+        return None
+    if not matrix_is_current(db, cursor):
+        sys.stderr.write("WARNING: the genotype matrix of %s is out of date "
+                         "and is not used. Run `gemini build_matrix %s` to "
+                         "rebuild it.\n" % (db, db))
+        return None
+    return GenotypeMatrix(path)
+
+
+def read_matrix(cursor, num_samples, fields, start=None, end=None,
+                samples=None, by_sample=False, variant_ids=None):
+    """
+    Same as GenotypeMatrix.get for each of fields, from the genotype BLOBs
+    of the database for those without a genotype matrix: the BLOBs of
+    each variant are read once for all of them. Returns the variant_ids
+    and a list of one array per field.
+    """
+    for field in fields:
+        _check_field(field)
+    ids = []
+    rows = [[] for field in fields]
+    for variant_id, arrays in iter_genotypes(cursor, fields, num_samples,
+                                             start, end, variant_ids):
+        ids.append(variant_id)
+        for field_rows, values in zip(rows, arrays):
+            field_rows.append(values if samples is None else values[samples])
+    num_cols = num_samples if samples is None else len(samples)
+    matrices = []
+    for field, field_rows in zip(fields, rows):
+        values = np.array(field_rows, dtype=FIELDS[field][0]).reshape(
+            len(field_rows), num_cols)
+        matrices.append(values.T if by_sample else values)
+    return np.array(ids, dtype=np.int64), matrices
+
+
+def build_matrix(db):
+    """
+    Write the genotype matrix of db, replacing any earlier one, and return
+    the number of variants it holds.
+    """
+    conn = sqlite3.connect(db)
+    c = conn.cursor()
+    fingerprint = _get_fingerprint(c)
+    num_samples = fingerprint["samples"]
+    num_variants = fingerprint["variants"]
+    if num_samples == 0 or num_variants == 0:
+        sys.exit("ERROR: %s has no genotypes to build a matrix from.\n" % db)
+    fields = sorted(FIELDS)
+
+    out_dir = get_matrix_dir(db)
+    tmp_dir = out_dir + ".tmp"
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+
+    def open_chunk(field, layout, k, shape):
+        return np.lib.format.open_memmap(
+            os.path.join(tmp_dir, "%s.%s%d.npy" % (field, layout, k)),
+            mode="w+", dtype=FIELDS[field][0], shape=shape)
+
+    # the sample-major chunks are filled as the variant-major ones are
+    # written, so the genotypes are read once
+    by_sample = {}
+    for field in fields:
+        by_sample[field] = [
+            open_chunk(field, "s", k,
+                       (min(SAMPLE_CHUNK_SIZE,
+                            num_samples - k * SAMPLE_CHUNK_SIZE), num_variants))
+            for k in range(-(-num_samples // SAMPLE_CHUNK_SIZE))]
+
+    variant_ids = np.empty(num_variants, dtype=np.int64)
+    by_variant = None
+    row = 0
+    for variant_id, arrays in iter_genotypes(c, fields, num_samples):
+        k, offset = divmod(row, VARIANT_CHUNK_SIZE)
+        if offset == 0:
+            _flush_chunk(by_variant, by_sample, row)
+            shape = (min(VARIANT_CHUNK_SIZE, num_variants - row), num_samples)
+            by_variant = dict((field, open_chunk(field, "v", k, shape))
+                              for field in fields)
+        variant_ids[row] = variant_id
+        for field, values in zip(fields, arrays):
+            by_variant[field][offset] = values
+        row += 1
+    _flush_chunk(by_variant, by_sample, row)
+    for chunks in by_sample.values():
+        for chunk in chunks:
+            chunk.flush()
+    conn.close()
+
+    np.save(os.path.join(tmp_dir, "variant_ids.npy"), variant_ids)
+    meta = {"version": MATRIX_VERSION,
+            "fingerprint": fingerprint,
+            "fields": fields,
+            "variant_chunk_size": VARIANT_CHUNK_SIZE,
+            "sample_chunk_size": SAMPLE_CHUNK_SIZE}
+    with open(os.path.join(tmp_dir, "meta.json"), "w") as out_handle:
+        json.dump(meta, out_handle)
+
+    if os.path.exists(out_dir):
+        shutil.rmtree(out_dir)
+    os.rename(tmp_dir, out_dir)
+    return num_variants
+
+
+def _flush_chunk(by_variant, by_sample, row):
+    """
+    Copy the variant-major chunks ending at row to the sample-major ones
+    and write them.
+    """
+    if by_variant is None:
+        return
+    for field, chunk in by_variant.items():
+        lo = row - len(chunk)
+        for k, sample_chunk in enumerate(by_sample[field]):
+            first = k * SAMPLE_CHUNK_SIZE
+            sample_chunk[:, lo:row] = \
+                chunk[:, first:first + len(sample_chunk)].T
+        chunk.flush()
+
+
+def build(parser, args):
+    """
+    Entry point for `gemini build_matrix`.
+    """
+    if args.db is None:
+        parser.print_help()
+        exit("ERROR: build_matrix needs a database file\n")
+    if not os.path.exists(args.db):
+        sys.exit("ERROR: cannot find database file %s.\n" % args.db)
+    num_variants = build_matrix(args.db)
+    print "Wrote the genotypes of {0} variants to {1}.".format(
+        num_variants, get_matrix_dir(args.db))
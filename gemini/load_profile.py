@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+"""
+Opt-in timers for the stages of `gemini load --profile`.
+
+The loader wraps each stage with
+
+    with load_profile.timer("annotation.dbsnp"):
+        ...
+
+which costs nothing more than entering a no-op context manager unless
+profiling was turned on with enable(). Durations are kept per stage as
+a call count, a total, a maximum and a log-scale histogram, so that the
+statistics of many chunks can be merged and their p50/p99 estimated
+without keeping every sample.
+"""
+import json
+import math
+import time
+import collections
+
+# the histogram has BUCKETS_PER_DOUBLING buckets for every doubling of
+# the duration, the first one ending at MIN_SECONDS. A percentile is
+# reported as the upper bound of its bucket, i.e. within ~19% above.
+MIN_SECONDS = 1e-6
+BUCKETS_PER_DOUBLING = 4
+
+# dictionary of stage name -> StageStats while profiling is enabled
+_stats = None
+
+
+class StageStats(object):
+    """
+    The durations recorded for one stage.
+    """
+    __slots__ = ("calls", "total", "max", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = {}
+
+    def add(self, seconds):
+        self.calls += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if seconds > MIN_SECONDS:
+            bucket = int(math.ceil(BUCKETS_PER_DOUBLING *
+                                   math.log(seconds / MIN_SECONDS, 2)))
+        else:
+            bucket = 0
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def merge(self, other):
+        self.calls += other.calls
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+
+    def percentile(self, q):
+        """
+        Estimate the duration below which a fraction q of the calls fall.
+        """
+        if self.calls == 0:
+            return None
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= q * self.calls:
+                upper = MIN_SECONDS * 2 ** (float(bucket) / BUCKETS_PER_DOUBLING)
+                return min(upper, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {"calls": self.calls, "total": self.total, "max": self.max,
+                "buckets": dict((str(b), c) for b, c in self.buckets.items())}
+
+    @classmethod
+    def from_dict(cls, d):
+        stats = cls()
+        stats.calls = d["calls"]
+        stats.total = d["total"]
+        stats.max = d["max"]
+        stats.buckets = dict((int(b), c) for b, c in d["buckets"].items())
+        return stats
+
+
+class _Timer(object):
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.time()
+
+    def __exit__(self, *exc_info):
+        record(self.name, time.time() - self.start)
+
+
+class _NullTimer(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+_NULL_TIMER = _NullTimer()
+
+
+def enable():
+    """Start collecting timings, discarding any collected so far."""
+    global _stats
+    _stats = {}
+
+
+def is_enabled():
+    return _stats is not None
+
+
+def timer(name):
+    """
+    Return a context manager that times its block as the stage name.
+    """
+    if _stats is None:
+        return _NULL_TIMER
+    return _Timer(name)
+
+
+def record(name, seconds):
+    """
+    Add one duration to the stage name. Each stage is only ever timed
+    from one thread of the load pipeline, so no locking is needed.
+    """
+    if _stats is None:
+        return
+    stats = _stats.get(name)
+    if stats is None:
+        stats = _stats.setdefault(name, StageStats())
+    stats.add(seconds)
+
+
+def get_stats():
+    """
+    Return the timings collected so far as a JSON-serializable dict
+    (see merge_stats).
+    """
+    if _stats is None:
+        return {}
+    return dict((name, stats.to_dict()) for name, stats in _stats.items())
+
+
+def merge_stats(stats_dicts):
+    """
+    Combine the get_stats() dictionaries of several processes (e.g.
+    the chunks of a multicore load) into the current timings.
+    """
+    if _stats is None:
+        return
+    for stats_dict in stats_dicts:
+        for name, d in stats_dict.items():
+            other = StageStats.from_dict(d)
+            if name in _stats:
+                _stats[name].merge(other)
+            else:
+                _stats[name] = other
+
+
+REPORT_FIELDS = ["stage", "calls", "total_s", "mean_ms", "p50_ms", "p99_ms",
+                 "max_ms"]
+
+
+def _report_rows():
+    rows = []
+    for name, stats in sorted(_stats.items(), key=lambda x: -x[1].total):
+        rows.append([name, stats.calls, stats.total,
+                     1000 * stats.total / stats.calls,
+                     1000 * stats.percentile(0.5),
+                     1000 * stats.percentile(0.99),
+                     1000 * stats.max])
+    return rows
+
+
+def write_report(fname):
+    """
+    Write the collected timings to fname, as JSON if its name ends in
+    .json and as tab-separated values otherwise, costliest stage first.
+    """
+    rows = _report_rows()
+    with open(fname, "w") as out_handle:
+        if fname.endswith(".json"):
+            json.dump([collections.OrderedDict(zip(REPORT_FIELDS, row))
+                       for row in rows],
+                      out_handle, indent=1)
+            out_handle.write("\n")
+        else:
+            out_handle.write("\t".join(REPORT_FIELDS) + "\n")
+            for row in rows:
+                out_handle.write("\t".join([row[0], str(row[1])] +
+                                           ["%.6f" % row[2]] +
+                                           ["%.4f" % x for x in row[3:]]) +
+                                 "\n")
@@ -1,3 +1,5 @@
+import numpy as np
+
 import stats
 
 
@@ -33,3 +35,31 @@ def get_hwe_likelihood(obs_hom_ref, obs_het, obs_hom_alt, aaf):
     inbreeding_coeff = (
         1.0 - (float(obs_het) / (float(exp_het)))) if obs_het > 0 else None
     return stats.lchisqprob(x2_statistic, 1), inbreeding_coeff
+
+
+def get_hwe_likelihoods(obs_hom_ref, obs_het, obs_hom_alt, aaf):
+    """
+    get_hwe_likelihood for arrays of genotype counts and alternate allele
+    frequencies, e.g. those of a buffer of variants. Returns arrays of the
+    p-values and of the inbreeding coefficients, the latter NaN where
+    there are no hets.
+    """
+    hom_ref = np.asarray(obs_hom_ref, dtype=float)
+    het = np.asarray(obs_het, dtype=float)
+    hom_alt = np.asarray(obs_hom_alt, dtype=float)
+    aaf = np.asarray(aaf, dtype=float)
+    total = hom_ref + het + hom_alt
+    raf = 1.0 - aaf
+    exp_hom_ref = (raf ** 2) * total
+    exp_het = (2.0 * (raf * aaf)) * total
+    exp_hom_alt = (aaf ** 2) * total
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x2_hom_ref = np.where(exp_hom_ref > 0,
+                              ((hom_ref - exp_hom_ref) ** 2) / exp_hom_ref, 0)
+        x2_hom_alt = np.where(exp_hom_alt > 0,
+                              ((hom_alt - exp_hom_alt) ** 2) / exp_hom_alt, 0)
+        x2_het = np.where(exp_het > 0, ((het - exp_het) ** 2) / exp_het, 0)
+        inbreeding_coeff = np.where(het > 0, 1.0 - het / exp_het, np.nan)
+    x2_statistic = x2_hom_ref + x2_hom_alt + x2_het
+    p_values = np.array([stats.lchisqprob(x2, 1) for x2 in x2_statistic])
+    return p_values, inbreeding_coeff
@@ -163,7 +163,7 @@ def _cleanup_problem_files(venv_dir):
 def install_tools(fab_cmd, fabfile, fabricrc):
     """Install 3rd party tools used by Gemini using a custom CloudBioLinux flavor.
     """
-    tools = ["tabix", "grabix", "samtools", "bedtools"]
+    tools = ["tabix", "samtools", "bedtools"]
     flavor_dir = os.path.join(os.getcwd(), "gemini-flavor")
     if not os.path.exists(flavor_dir):
         os.makedirs(flavor_dir)
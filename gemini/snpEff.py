@@ -12,6 +12,12 @@ from collections import defaultdict
 
 
 class EffectDetails(object):
+    __slots__ = ("effect_name", "anno_id", "effect_severity", "impact", "codon",
+                 "aa_change", "extra_fields", "aa_length", "gene", "biotype",
+                 "coding", "transcript", "exon", "warnings", "codon_change",
+                 "is_exonic", "is_coding", "is_lof", "polyphen_pred",
+                 "polyphen_score", "sift_pred", "sift_score", "consequence", "so")
+
     def __init__(self, name, severity, detail_string, counter, snp_eff_version):
         fields = detail_string.split("|")
         self.effect_name = name
@@ -94,6 +100,15 @@ class EffectDetails(object):
     def __repr__(self):
         return self.__str__()
 
+    def with_anno_id(self, anno_id):
+        """Return a copy of this effect with another anno_id.
+        """
+        other = object.__new__(EffectDetails)
+        for name in self.__slots__:
+            setattr(other, name, getattr(self, name))
+        other.anno_id = anno_id
+        return other
+
 
 exonic_impacts = ["CODON_CHANGE",
                   "CODON_CHANGE_PLUS_CODON_DELETION",
@@ -393,6 +408,9 @@ def gatk_effect_details(info):
             gene=info.get("SNPEFF_GENE_NAME", ""),
             biotype=info.get("SNPEFF_GENE_BIOTYPE", ""),
             coding="",
-            transcript=info.get("SNPEFF_TRANSCRIPT", ""),
+            transcript=info.get("SNPEFF_TRANSCRIPT_ID",
+                                info.get("SNPEFF_TRANSCRIPT", "")),
             exon=info.get("SNPEFF_EXON_ID", ""))
-        return EffectDetails(name, effect.priority, detail_string, 0)
+        # the details are laid out as by snpEff before version 3, and the
+        # one transcript is the first row of the variant in variant_impacts
+        return EffectDetails(name, effect.priority, detail_string, 1, None)
@@ -1,5 +1,5 @@
 import math
-from collections import Counter, defaultdict
+from collections import Counter, OrderedDict, defaultdict
 import numpy as np
 from scipy.stats import binom, norm, chi2
 from pandas import DataFrame
@@ -11,13 +11,15 @@ from scipy.misc import comb
 
 
 import GeminiQuery
+from gemini_constants import HET, HOM_ALT
+from genotype_matrix import VARIANT_CHUNK_SIZE
 
 
 def burden_by_gene(args):
     """
     calculates per sample the total genetic burden for each gene
     """
-    query = ("SELECT gene from variants WHERE "
+    query = ("SELECT variant_id, gene from variants WHERE "
              "is_coding=1 and (impact_severity = 'HIGH' or "
              "polyphen_pred = 'probably_damaging')")
     _summarize_by_gene_and_sample(args, query)
@@ -246,19 +248,32 @@ def _calculate_counts(gq, samples):
 
 def _summarize_by_gene_and_sample(args, query):
     gq = GeminiQuery.GeminiQuery(args.db)
-    gq.run(query, show_variant_samples=True)
-    burden = defaultdict(Counter)
-    for row in gq:
-        gene_name = row['gene']
-        if not gene_name:
-            continue
-        new_counts = Counter(row["HET_samples"])
-        # Counter can't do scalar multiplication
-        new_counts = new_counts + Counter(row["HOM_ALT_samples"])
-        new_counts = new_counts + Counter(row["HOM_ALT_samples"])
-
-        del new_counts['']
-        burden[gene_name] += new_counts
+    gq.run(query)
+    variants = sorted((row['variant_id'], row['gene']) for row in gq
+                      if row['gene'])
+
+    # the number of alternate alleles of each sample, summed by gene, from
+    # the genotypes of a block of the variants at a time. The genes are kept
+    # in the order they are first seen, which sets the order of the output.
+    totals = OrderedDict()
+    for start in range(0, len(variants), VARIANT_CHUNK_SIZE):
+        block = variants[start:start + VARIANT_CHUNK_SIZE]
+        variant_ids = [v for v, _ in block]
+        ids, gt_types = gq.get_genotype_matrix("gt_types",
+                                               variant_ids=variant_ids)
+        gt_types = gt_types[np.searchsorted(ids, variant_ids)]
+        alleles = (gt_types == HET) + 2 * (gt_types == HOM_ALT)
+        for (_, gene_name), counts in zip(block, alleles):
+            if gene_name in totals:
+                totals[gene_name] += counts
+            else:
+                totals[gene_name] = counts.astype(np.int64)
+
+    burden = {}
+    for gene_name, counts in totals.items():
+        burden[gene_name] = Counter(dict((gq.idx_to_sample[idx], count)
+                                         for idx, count in enumerate(counts)
+                                         if count > 0))
 
     df = DataFrame({})
     for gene_name, counts in burden.items():
@@ -1,5 +1,6 @@
 import os
 import sys
+import numpy as np
 from collections import defaultdict 
 from gemini_constants import *
 import GeminiQuery
@@ -150,7 +151,7 @@ def get_homozygosity_runs(args):
     ###########################################################################
     # Phase 1. Retrieve the variants for each chrom/sample
     ###########################################################################
-    query  = "SELECT chrom, start, end, gt_types, gt_depths \
+    query  = "SELECT variant_id, chrom, end \
               FROM variants \
               WHERE type = 'snp' \
               AND   filter is NULL \
@@ -158,7 +159,7 @@ def get_homozygosity_runs(args):
               " ORDER BY chrom, end"
 
     sys.stderr.write("LOG: Querying and ordering variants by chromosomal position.\n")
-    gq.run(query, needs_genotypes=True)
+    gq.run(query)
 
     print "\t".join(['chrom',
         'start', 'end', 'sample', 
@@ -166,7 +167,7 @@ def get_homozygosity_runs(args):
         'run_length_in_bp'])  
     
     variants_seen = 0
-    samples = defaultdict(list)
+    sites = []
     prev_chrom = None
     curr_chrom = None
     for row in gq:
@@ -175,36 +176,52 @@ def get_homozygosity_runs(args):
             sys.stderr.write("LOG: Loaded %d variants. Current variant on %s, position %d.\n" \
                 % (variants_seen, row['chrom'], row['end']))
 
-        gt_types = row['gt_types']
-        gt_depths = row['gt_depths']
         curr_chrom = row['chrom']
 
         # the chromosome has changed. search for ROHs in the previous chrom
         if curr_chrom != prev_chrom and prev_chrom is not None:
-            sweep_genotypes_for_rohs(args, prev_chrom, samples)
-            samples = defaultdict(list)
+            sweep_genotypes_for_rohs(args, prev_chrom,
+                                     _get_chrom_samples(args, gq, sm_index, sites))
+            sites = []
+
+        sites.append((row['variant_id'], int(row['end'])))
+        prev_chrom = curr_chrom
+
+    # search for ROHs in the final chromosome
+    sweep_genotypes_for_rohs(args, curr_chrom,
+                             _get_chrom_samples(args, gq, sm_index, sites))
 
-        # associate the genotype for the variant with each sample
-        for idx in sm_index:
-            sample = idx2smp[idx]
-            gt_type = gt_types[idx]
-            depth = gt_depths[idx]
 
-            # the genotype must have had sufficient depth to be considered
+def _get_chrom_samples(args, gq, sm_index, sites):
+    """
+    Associate the genotype of each of the (variant_id, end) sites of a
+    chromosome with each sample, reading the genotypes of all of the
+    sites at once.
+    """
+    samples = defaultdict(list)
+    if not sites:
+        return samples
+    variant_ids = [variant_id for variant_id, _ in sites]
+    names = [gq.idx_to_sample[idx] for idx in sm_index]
+    ids, (gt_types, gt_depths) = gq.get_genotype_matrices(
+        ["gt_types", "gt_depths"], samples=names, variant_ids=variant_ids)
+    rows = np.searchsorted(ids, variant_ids)
+
+    for col, sample in enumerate(names):
+        sample_types = gt_types[rows, col]
+        # the genotype must have had sufficient depth to be considered
+        sample_depths = gt_depths[rows, col]
+        for (_, end), gt_type, depth in zip(sites, sample_types, sample_depths):
             if depth < args.min_genotype_depth:
                 continue
 
             if (gt_type == HOM_ALT or gt_type == HOM_REF):
-                samples[sample].append(row['end'])
+                samples[sample].append(end)
             elif gt_type == HET:
                 samples[sample].append('H')
             elif gt_type == UNKNOWN:
                 samples[sample].append('U')
-
-        prev_chrom = curr_chrom
-
-    # search for ROHs in the final chromosome
-    sweep_genotypes_for_rohs(args, curr_chrom, samples)
+    return samples
 
 
 def run(parser, args):
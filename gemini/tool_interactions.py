@@ -9,8 +9,6 @@
 import os
 import sys
 import sqlite3
-import numpy as np
-import zlib
 import cPickle
 from gemini.config import read_gemini_config
 from pygraph.classes.graph import graph
@@ -21,14 +19,16 @@ from pygraph.classes.exceptions import AdditionError
 from pygraph.algorithms.filters.radius import radius
 from pygraph.classes.digraph import digraph
 import gemini_utils as util
+import compression
+import database
 from gemini_constants import *
 from collections import defaultdict
 
 def get_variant_genes(c, args, idx_to_sample):
     samples = defaultdict(list)
     for r in c:
-        gt_types = np.array(cPickle.loads(zlib.decompress(r['gt_types'])))
-        gts      = np.array(cPickle.loads(zlib.decompress(r['gts'])))
+        gt_types = compression.unpack_genotype_blob(r['gt_types'])
+        gts      = compression.unpack_genotype_blob(r['gts'])
         var_id = str(r['variant_id'])
         chrom = str(r['chrom'])
         start = str(r['start'])
@@ -56,8 +56,8 @@ def get_variant_genes(c, args, idx_to_sample):
 def get_lof_genes(c, args, idx_to_sample):
     lof = defaultdict(list)
     for r in c:
-        gt_types = np.array(cPickle.loads(zlib.decompress(r['gt_types'])))
-        gts      = np.array(cPickle.loads(zlib.decompress(r['gts'])))
+        gt_types = compression.unpack_genotype_blob(r['gt_types'])
+        gts      = compression.unpack_genotype_blob(r['gts'])
         gene     = str(r['gene'])
 
         for idx, gt_type in enumerate(gt_types):
@@ -233,6 +233,7 @@ def sample_variants(c, args):
                     in_dbsnp, clinvar_sig, clinvar_disease_name, aaf_1kg_all, aaf_esp_all, chrom, \
                     start, end  \
              FROM variants"
+    database.join_genotypes(c)
     c.execute(query)
 
     if args.command == 'interactions':
@@ -260,6 +261,7 @@ def sample_lof_variants(c, args, samples):
                              gt_types, gts, gene \
              FROM variants \
              WHERE is_lof='1'"
+    database.join_genotypes(c)
     c.execute(query)
 
     #header
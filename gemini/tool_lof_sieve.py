@@ -5,9 +5,8 @@ import re
 import sqlite3
 import gemini_utils as util
 from gemini_constants import *
-import numpy as np
-import cPickle
-import zlib
+import compression
+import database
 
 
 def get_ind_lof(c, args):
@@ -23,6 +22,7 @@ def get_ind_lof(c, args):
              AND i.is_lof='1' \
              AND v.type = 'snp'"
 
+    database.join_genotypes(c)
     c.execute(query)
 
     # header
@@ -32,8 +32,8 @@ def get_ind_lof(c, args):
                      'sample', 'genotype', 'gene', 'transcript', 'trans_type'])
 
     for r in c:
-        gt_types = np.array(cPickle.loads(zlib.decompress(r['gt_types'])))
-        gts = np.array(cPickle.loads(zlib.decompress(r['gts'])))
+        gt_types = compression.unpack_genotype_blob(r['gt_types'])
+        gts = compression.unpack_genotype_blob(r['gts'])
         gene = str(r['gene'])
         trans = str(r['transcript'])
 
@@ -3,12 +3,11 @@
 import os
 import sys
 import sqlite3
-import numpy as np
-import cPickle
-import zlib
 from collections import defaultdict
 from gemini.config import read_gemini_config
 import gemini_utils as util
+import compression
+import database
 from gemini_constants import *
 
 
@@ -72,8 +71,8 @@ def _report_variant_pathways(c, args, idx_to_sample):
     (agn_paths, hgnc_paths, ensembl_paths) = get_pathways(args)
 
     for r in c:
-        gt_types = np.array(cPickle.loads(zlib.decompress(r['gt_types'])))
-        gts      = np.array(cPickle.loads(zlib.decompress(r['gts'])))
+        gt_types = compression.unpack_genotype_blob(r['gt_types'])
+        gts      = compression.unpack_genotype_blob(r['gts'])
         gene     = str(r['gene'])
         trans    = str(r['transcript'])
 
@@ -106,6 +105,7 @@ def get_ind_pathways(c, args):
              FROM variants v, variant_impacts i \
              WHERE v.variant_id = i.variant_id"
 
+    database.join_genotypes(c)
     c.execute(query)
 
     # header
@@ -127,6 +127,7 @@ def get_ind_lof_pathways(c, args):
              WHERE v.variant_id = i.variant_id \
              AND i.is_lof='1'"
 
+    database.join_genotypes(c)
     c.execute(query)
 
     # header
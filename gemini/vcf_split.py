@@ -0,0 +1,317 @@
+#!/usr/bin/env python
+"""
+Split a VCF into chunks that can be loaded independently, without
+external tools and without reading the whole file.
+
+A chunk is a range [start, stop) of file positions and holds the lines
+that start within it. Positions are byte offsets for a plain-text VCF
+and BGZF virtual offsets (compressed block offset << 16 | offset within
+the decompressed block) for a bgzipped one, so every chunk can be read
+on its own by seeking to its start. Chunk boundaries are placed at line
+starts found by jumping to a byte offset, finding the next BGZF block
+and skipping the partial line there; only these few blocks are read
+while planning, and each loader then decompresses its own range.
+"""
+import os
+import zlib
+import struct
+
+BGZF_MAGIC = "\x1f\x8b\x08\x04"
+GZIP_MAGIC = "\x1f\x8b"
+# a BGZF block holds at most 64KB of compressed data
+MAX_BLOCK_SIZE = 65536
+
+
+def _read_header(handle):
+    """
+    Read the gzip header of the BGZF block at the current position and
+    return its total size, or None if there is no valid block header.
+    """
+    header = handle.read(12)
+    if len(header) < 12 or not header.startswith(BGZF_MAGIC):
+        return None
+    xlen = struct.unpack("<H", header[10:12])[0]
+    extra = handle.read(xlen)
+    # the BC extra subfield holds the block size - 1
+    i = 0
+    while i + 4 <= len(extra):
+        slen = struct.unpack("<H", extra[i + 2:i + 4])[0]
+        if extra[i:i + 2] == "BC" and slen == 2:
+            return struct.unpack("<H", extra[i + 4:i + 6])[0] + 1
+        i += 4 + slen
+    return None
+
+
+def _read_block(handle):
+    """
+    Return (block size, decompressed data) of the BGZF block at the current
+    position, or (0, "") at the end of the file.
+    """
+    block_start = handle.tell()
+    block_size = _read_header(handle)
+    if block_size is None:
+        handle.seek(block_start)
+        if handle.read(1) == "":
+            return 0, ""
+        raise IOError("Invalid BGZF block at offset %d of %s"
+                      % (block_start, handle.name))
+    header_size = handle.tell() - block_start
+    cdata = handle.read(block_size - header_size)
+    # deflate data, then the CRC32 and uncompressed size
+    return block_size, zlib.decompress(cdata[:-8], -15)
+
+
+def is_bgzf(fname):
+    with open(fname, "rb") as handle:
+        return _read_header(handle) is not None
+
+
+def is_splittable(fname):
+    """
+    A VCF can be split unless it is compressed with plain gzip.
+    """
+    with open(fname, "rb") as handle:
+        magic = handle.read(2)
+    return magic != GZIP_MAGIC or is_bgzf(fname)
+
+
+class BgzfLineReader(object):
+    """
+    Read the lines of a BGZF file starting at a virtual offset.
+    """
+    def __init__(self, fname, voffset=0):
+        self.handle = open(fname, "rb")
+        self._load_block(voffset >> 16)
+        self.pos = voffset & 0xFFFF
+
+    def _load_block(self, block_offset):
+        self.handle.seek(block_offset)
+        self.block_offset = block_offset
+        self.block_size, self.data = _read_block(self.handle)
+        self.pos = 0
+
+    def tell(self):
+        """
+        Return the virtual offset of the next line. The end of a block
+        is reported as the start of the next one, so that each line start
+        has a single virtual offset.
+        """
+        while self.pos >= len(self.data) and self.block_size:
+            self._load_block(self.block_offset + self.block_size)
+        return (self.block_offset << 16) | self.pos
+
+    def readline(self):
+        parts = []
+        while True:
+            if self.pos >= len(self.data):
+                if not self.block_size:
+                    break
+                self._load_block(self.block_offset + self.block_size)
+                continue
+            end = self.data.find("\n", self.pos)
+            if end >= 0:
+                parts.append(self.data[self.pos:end + 1])
+                self.pos = end + 1
+                break
+            parts.append(self.data[self.pos:])
+            self.pos = len(self.data)
+        return "".join(parts)
+
+    def close(self):
+        self.handle.close()
+
+
+class PlainLineReader(object):
+    """
+    Read the lines of an uncompressed file starting at a byte offset.
+    """
+    def __init__(self, fname, offset=0):
+        self.handle = open(fname, "rb")
+        self.handle.seek(offset)
+        self.readline = self.handle.readline
+        self.tell = self.handle.tell
+
+    def close(self):
+        self.handle.close()
+
+
+def _chrom(line):
+    return line.split("\t", 1)[0] if line else None
+
+
+class VcfSplitter(object):
+    """
+    Find line-aligned split positions in a plain-text or bgzipped VCF.
+    """
+    def __init__(self, fname):
+        self.fname = fname
+        self.bgzf = is_bgzf(fname)
+        self.file_size = os.path.getsize(fname)
+        self.end = self.file_size << 16 if self.bgzf else self.file_size
+        reader = self.open_reader(0)
+        self.header = []
+        self.data_start = reader.tell()
+        line = reader.readline()
+        while line.startswith("#"):
+            self.header.append(line)
+            self.data_start = reader.tell()
+            line = reader.readline()
+        reader.close()
+
+    def open_reader(self, position):
+        if self.bgzf:
+            return BgzfLineReader(self.fname, position)
+        return PlainLineReader(self.fname, position)
+
+    def byte_offset(self, position):
+        """Return the offset in the file of a position."""
+        return position >> 16 if self.bgzf else position
+
+    def _find_block(self, handle, offset):
+        """
+        Return the offset of the first BGZF block at or after offset.
+        """
+        handle.seek(offset)
+        window = handle.read(MAX_BLOCK_SIZE + 18)
+        i = window.find(BGZF_MAGIC)
+        while i >= 0:
+            candidate = offset + i
+            handle.seek(candidate)
+            block_size = _read_header(handle)
+            # the magic bytes could occur in compressed data; a block
+            # is only real if it ends at another block or the file end
+            if block_size is not None:
+                handle.seek(candidate + block_size)
+                next_magic = handle.read(4)
+                if next_magic in ("", BGZF_MAGIC):
+                    return candidate
+            i = window.find(BGZF_MAGIC, i + 1)
+        return self.file_size
+
+    def line_after(self, offset):
+        """
+        Return the (position, chromosome) of the first variant line
+        starting at or after byte offset offset; the chromosome is None
+        at the end of the file.
+        """
+        if offset <= self.byte_offset(self.data_start):
+            position = self.data_start
+        elif self.bgzf:
+            with open(self.fname, "rb") as handle:
+                block_offset = self._find_block(handle, offset)
+            if block_offset >= self.file_size:
+                return self.end, None
+            reader = BgzfLineReader(self.fname, block_offset << 16)
+            # the block may start within a line
+            reader.readline()
+            position = reader.tell()
+            reader.close()
+        else:
+            reader = PlainLineReader(self.fname, offset - 1)
+            # skip to just past the end of the line holding offset - 1
+            reader.readline()
+            position = reader.tell()
+            reader.close()
+        return position, self.chrom_at(position)
+
+    def chrom_at(self, position):
+        if position >= self.end:
+            return None
+        reader = self.open_reader(position)
+        chrom = _chrom(reader.readline())
+        reader.close()
+        return chrom
+
+    def last_chrom(self):
+        """
+        Return the chromosome of the last line, reading only the end of
+        the file, or None if it cannot be found there.
+        """
+        position = self.line_after(max(self.byte_offset(self.data_start),
+                                       self.file_size - 4 * MAX_BLOCK_SIZE))[0]
+        reader = self.open_reader(position)
+        chrom = None
+        for line in iter(reader.readline, ""):
+            chrom = _chrom(line)
+        reader.close()
+        return chrom
+
+    def find_chrom_change(self, lo, hi, chrom):
+        """
+        Return the position of the first line after lo, which is on
+        chromosome chrom, to be on another chromosome, looking no further
+        than hi.
+        """
+        # narrow the range down by bisecting on byte offsets ...
+        while self.byte_offset(hi) - self.byte_offset(lo) > 2 * MAX_BLOCK_SIZE:
+            mid, mid_chrom = self.line_after((self.byte_offset(lo) +
+                                              self.byte_offset(hi)) / 2)
+            if mid >= hi:
+                break
+            elif mid_chrom == chrom:
+                lo = mid
+            else:
+                hi = mid
+        # ... then read it line by line
+        reader = self.open_reader(lo)
+        position = lo
+        while position < hi and _chrom(reader.readline()) == chrom:
+            position = reader.tell()
+        reader.close()
+        return min(position, hi)
+
+    def get_units(self, num_units):
+        """
+        Break the variant lines into about num_units (start, stop, cost,
+        ends_chrom) units of equal compressed size, with a unit ending at
+        each chromosome change found between them. The cost of a unit is
+        the number of bytes of the file it spans.
+        """
+        first = self.byte_offset(self.data_start)
+        points = [(self.data_start, self.chrom_at(self.data_start))]
+        for i in range(1, num_units):
+            point = self.line_after(first + (self.file_size - first) * i / num_units)
+            if point[0] > points[-1][0] and point[0] < self.end:
+                points.append(point)
+        points.append((self.end, self.last_chrom() or points[-1][1]))
+
+        units = []
+        for (start, chrom), (stop, next_chrom) in zip(points[:-1], points[1:]):
+            # end a unit at every chromosome change up to stop; next_chrom
+            # is the chromosome of the last line when stop is the end
+            while chrom != next_chrom:
+                change = self.find_chrom_change(start, stop, chrom)
+                if change >= stop:
+                    break
+                units.append(self._unit(start, change, True))
+                start, chrom = change, self.chrom_at(change)
+            if start < stop:
+                units.append(self._unit(start, stop,
+                                        stop < self.end and chrom != next_chrom))
+        if not units:
+            # a file without variant lines is loaded as one empty chunk
+            units.append(self._unit(self.data_start, self.end, True))
+        return units
+
+    def _unit(self, start, stop, ends_chrom):
+        cost = max(1, self.byte_offset(stop) - self.byte_offset(start))
+        return (start, stop, cost, ends_chrom)
+
+
+def chunk_lines(fname, start, stop):
+    """
+    Yield the header of the VCF followed by the lines that start at
+    positions start <= pos < stop, e.g. as the input of a chunk load.
+    """
+    splitter = VcfSplitter(fname)
+    for line in splitter.header:
+        yield line
+    reader = splitter.open_reader(start)
+    try:
+        while reader.tell() < stop:
+            line = reader.readline()
+            if not line:
+                break
+            yield line
+    finally:
+        reader.close()
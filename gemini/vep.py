@@ -11,6 +11,13 @@ from collections import defaultdict, namedtuple
 import itertools
 
 class EffectDetails(object):
+    __slots__ = ("effect_severity", "effect_name", "anno_id", "codon_change",
+                 "aa_change", "ensembl_gene", "hgnc", "gene", "transcript", "exon",
+                 "polyphen", "sift", "aa_length", "biotype", "warnings",
+                 "extra_fields", "consequence", "so", "is_exonic", "is_lof",
+                 "is_coding", "polyphen_pred", "polyphen_score", "sift_pred",
+                 "sift_score")
+
     def __init__(self, impact_string, severity, detail_string, counter, labels):
         fields = self._prep_fields(detail_string, labels)
         self.effect_severity = severity
@@ -60,19 +67,17 @@ class EffectDetails(object):
 
         # parse Polyphen predictions
         if self.polyphen is not None:
-            self.polyphen_b = self.polyphen.split("(")
-            self.polyphen_pred = self.polyphen_b[0]
-            self.polyphen2 = self.polyphen_b[1].split(")")
-            self.polyphen_score = self.polyphen2[0]
+            polyphen_b = self.polyphen.split("(")
+            self.polyphen_pred = polyphen_b[0]
+            self.polyphen_score = polyphen_b[1].split(")")[0]
         else:
             self.polyphen_pred = None
             self.polyphen_score = None
         # parse SIFT predictions
         if self.sift is not None:
-            self.sift_b = self.sift.split("(")
-            self.sift_pred = self.sift_b[0]
-            self.sift2 = self.sift_b[1].split(")")
-            self.sift_score = self.sift2[0]
+            sift_b = self.sift.split("(")
+            self.sift_pred = sift_b[0]
+            self.sift_score = sift_b[1].split(")")[0]
         else:
             self.sift_pred = None
             self.sift_score = None
@@ -101,6 +106,15 @@ class EffectDetails(object):
     def __repr__(self):
         return self.__str__()
 
+    def with_anno_id(self, anno_id):
+        """Return a copy of this effect with another anno_id.
+        """
+        other = object.__new__(EffectDetails)
+        for name in self.__slots__:
+            setattr(other, name, getattr(self, name))
+        other.anno_id = anno_id
+        return other
+
 
 exonic_impacts = ["stop_gained",
                   "stop_lost",
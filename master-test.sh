@@ -38,12 +38,24 @@ bash test-cadd.sh
 # Test loading functionality
 bash test-load.sh
 
+# Test adding samples to a database
+bash test-add-samples.sh
+
 # Test genotype BLOB functionality
 bash test-genotypes.sh
 
+# Test the genotype BLOB codecs
+bash test-compression.sh
+
+# Test the memory-mapped genotype matrix
+bash test-matrix.sh
+
 # Test ClinVar attributes
 bash test-clinvar.sh
 
+# Test filling and refreshing the built-in annotations
+bash test-annotate-builtins.sh
+
 # Test population_gen metrics
 bash test-pop.sh
 
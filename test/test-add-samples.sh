@@ -0,0 +1,63 @@
+###########################################################################################
+#1. Test adding the samples of a second VCF called at the same sites
+###########################################################################################
+cut -f1-11 test4.vep.snpeff.vcf > test4.first_samples.vcf
+cut -f1-9,12-13 test4.vep.snpeff.vcf > test4.last_samples.vcf
+
+gemini load --skip-gene-tables --test-mode -v test4.first_samples.vcf --skip-gerp-bp --skip-cadd \
+    -t snpEff add_samples.db
+
+echo "    add_samples.t1...\c"
+echo "9 records of test4.last_samples.vcf match variants of the database, 0 do not and are skipped.
+rewrote 9 variants
+Added 2 samples to add_samples.db." > exp
+gemini add_samples -v test4.last_samples.vcf add_samples.db > obs
+check obs exp
+rm obs exp
+
+echo "    add_samples.t2...\c"
+echo "1	None	M10475	None	None	None	None
+2	None	M10478	None	None	None	None
+3	None	M10500	None	None	None	None
+4	None	M128215	None	None	None	None" > exp
+gemini query -q "select * from samples" add_samples.db > obs
+check obs exp
+rm obs exp
+
+###########################################################################################
+#2. Test the genotypes and the columns derived from them once the samples are added
+###########################################################################################
+echo "    add_samples.t3...\c"
+echo "chr10	1142207	0	4	0	1.0	C/C,C/C,C/C,C/C	3,3,3,3
+chr10	48003991	2	1	0	0.5	T/T,C/T,C/T,C/C	3,1,1,0
+chr10	52004314	0	2	2	1.0	./.,./.,C/C,C/C	2,2,3,3
+chr10	52497528	0	2	2	1.0	./.,C/C,C/C,./.	2,3,3,2
+chr10	126678091	1	0	0	0.125	G/G,G/G,G/G,G/A	0,0,0,1
+chr10	135210790	0	2	0	0.5	T/T,C/C,C/C,T/T	0,3,3,0
+chr10	135336655	0	2	2	1.0	./.,A/A,./.,A/A	2,3,2,3
+chr10	135369531	2	0	0	0.25	T/T,T/C,T/C,T/T	0,1,1,0
+chr16	72057434	1	0	0	0.125	C/T,C/C,C/C,C/C	1,0,0,0" > exp
+gemini query -q "select chrom, start, num_het, num_hom_alt, num_unknown, aaf, gts, gt_types \
+                 from variants" add_samples.db > obs
+check obs exp
+rm obs exp
+
+echo "    add_samples.t4...\c"
+echo "1142207	C/C	3	24
+52004314	./.	3	1
+135336655	./.	3	-1" > exp
+gemini query -q "select start, gts.M10475, gt_types.M128215, gt_depths.M10500 from variants" \
+    --gt-filter "gt_types.M128215 == HOM_ALT" add_samples.db > obs
+check obs exp
+rm obs exp
+
+echo "    add_samples.t5...\c"
+echo "sample	num_hom_ref	num_het	num_hom_alt	num_unknown	total
+M10475	3	1	2	3	9
+M10478	2	2	4	1	9
+M10500	2	2	4	1	9
+M128215	4	1	3	1	9" > exp
+gemini stats --gts-by-sample add_samples.db > obs
+check obs exp
+rm obs exp
+rm test4.first_samples.vcf test4.last_samples.vcf
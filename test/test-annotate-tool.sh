@@ -511,7 +511,8 @@ tabix -p bed anno.bed.gz
 # create a new column in the database using the new annotation
 echo "usage: gemini annotate [-h] [-f ANNO_FILE] [-c COL_NAMES]
                        [-a {boolean,count,extract}] [-e COL_EXTRACTS]
-                       [-t COL_TYPES] [-o COL_OPERATIONS]
+                       [-t COL_TYPES] [-o COL_OPERATIONS] [--sweep]
+                       [--manifest FILE] [--cores CORES]
                        db
 gemini annotate: error: argument -a: invalid choice: 'distract' (choose from 'boolean', 'count', 'extract')" > exp
 
@@ -544,3 +545,143 @@ gemini annotate -f anno.bed.gz -a extract -c anno27,anno28 -e 4,5 -t text,float
 check obs exp
 #rm obs exp
 rm *.gz*
+
+
+###########################################################################################
+#18. Test annotating variants using the "boolean" function with --sweep
+###########################################################################################
+echo "    annotate-tool.t18...\c"
+
+# make a dunnmy TABIX'ed annotation file
+echo "chr1	30547	30548
+chr1	30922	30923" > anno.bed
+bgzip anno.bed
+tabix -p bed anno.bed.gz
+
+# create a new column in the database using the new annotation
+gemini annotate --sweep -f anno.bed.gz -c sweep_anno -a boolean test.snpeff.vcf.db
+
+echo "chr1	30548	1
+chr1	30860	0
+chr1	30869	0
+chr1	30895	0
+chr1	30923	1
+chr1	69270	0
+chr1	69428	0
+chr1	69511	0
+chr1	69761	0
+chr1	69871	0" > exp
+
+gemini query -q "select chrom, end, sweep_anno from variants" \
+	test.snpeff.vcf.db > obs
+check obs exp
+rm obs exp
+rm *.gz*
+
+
+###########################################################################################
+#19. Test annotating variants using the "count" function with --sweep
+###########################################################################################
+echo "    annotate-tool.t19...\c"
+
+# make a dunnmy TABIX'ed annotation file
+echo "chr1	30547	30548
+chr1	30920	30925
+chr1	30922	30923" > anno.bed
+bgzip anno.bed
+tabix -p bed anno.bed.gz
+
+# create a new column in the database using the new annotation
+gemini annotate --sweep -f anno.bed.gz -c sweep_anno2 -a count test.snpeff.vcf.db
+
+echo "chr1	30548	1
+chr1	30860	0
+chr1	30869	0
+chr1	30895	0
+chr1	30923	2
+chr1	69270	0
+chr1	69428	0
+chr1	69511	0
+chr1	69761	0
+chr1	69871	0" > exp
+
+gemini query -q "select chrom, end, sweep_anno2 from variants" \
+	test.snpeff.vcf.db > obs
+check obs exp
+rm obs exp
+rm *.gz*
+
+
+###########################################################################################
+#20. Test annotating variants using the "extract" function with --sweep
+###########################################################################################
+echo "    annotate-tool.t20...\c"
+
+# make a dunnmy TABIX'ed annotation file
+echo "chr1	30547	30548	a	0.23
+chr1	30920	30925	b	0.2
+chr1	30922	30923	c	0.4" > anno.bed
+bgzip anno.bed
+tabix -p bed anno.bed.gz
+
+# create a new column in the database using the new annotation
+gemini annotate --sweep -f anno.bed.gz -a extract -c sweep_anno4,sweep_anno5 -e 4,5 \
+	-t text,float -o list,mean test.snpeff.vcf.db
+
+echo "chr1	30548	a	0.23
+chr1	30860	None	None
+chr1	30869	None	None
+chr1	30895	None	None
+chr1	30923	b,c	0.3
+chr1	69270	None	None
+chr1	69428	None	None
+chr1	69511	None	None
+chr1	69761	None	None
+chr1	69871	None	None" > exp
+
+gemini query -q "select chrom, end, sweep_anno4, sweep_anno5 from variants" \
+	test.snpeff.vcf.db > obs
+check obs exp
+rm obs exp
+rm *.gz*
+
+
+###########################################################################################
+#21. Test annotating variants with a manifest of annotation files, one chromosome per core
+###########################################################################################
+echo "    annotate-tool.t21...\c"
+
+# make dunnmy TABIX'ed annotation files
+echo "chr10	1142207	1142208
+chr16	72057434	72057435" > anno1.bed
+bgzip anno1.bed
+tabix -p bed anno1.bed.gz
+echo "chr10	48003000	52100000	x	0.5
+chr10	52004000	52005000	y	0.25
+chr16	72057000	72058000	z	1" > anno2.bed
+bgzip anno2.bed
+tabix -p bed anno2.bed.gz
+
+# file, type and columns, followed by the numbers, types and operations to extract
+echo "anno1.bed.gz	boolean	in_anno1
+anno2.bed.gz	count	num_anno2
+anno2.bed.gz	extract	anno2_names,anno2_score	4,5	text,float	list,max" > manifest.txt
+
+cp test4.snpeff.db manifest.db
+gemini annotate --manifest manifest.txt --cores 2 manifest.db > /dev/null
+
+echo "chr10	1142208	1	0	None	None
+chr10	48003992	0	1	x	0.5
+chr10	52004315	0	2	x,y	0.5
+chr10	52497529	0	0	None	None
+chr10	126678092	0	0	None	None
+chr10	135210791	0	0	None	None
+chr10	135336656	0	0	None	None
+chr10	135369532	0	0	None	None
+chr16	72057435	1	1	z	1.0" > exp
+
+gemini query -q "select chrom, end, in_anno1, num_anno2, anno2_names, anno2_score from variants" \
+	manifest.db > obs
+check obs exp
+rm obs exp
+rm *.gz* manifest.txt
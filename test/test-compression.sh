@@ -0,0 +1,20 @@
+####################################################################
+# 1. Test round trips of the typed genotype BLOBs of each codec
+####################################################################
+echo "    compression.t1...\c"
+echo "ok" > exp
+gemini_python -c "from gemini import compression; \
+                  compression._test_genotype_codecs(); print 'ok'" > obs
+check obs exp
+rm obs exp
+
+####################################################################
+# 2. Test decoding the pickled, zlib compressed BLOBs of earlier
+#    versions
+####################################################################
+echo "    compression.t2...\c"
+echo "ok" > exp
+gemini_python -c "from gemini import compression; \
+                  compression._test_legacy_blobs(); print 'ok'" > obs
+check obs exp
+rm obs exp
@@ -212,4 +212,20 @@ gemini query -q "select anno_id, gene, transcript, impact, impact_severity, biot
 check obs exp
 rm obs exp
 
-###########################################################################
\ No newline at end of file
+###########################################################################
+# 5. Test variants table for severe_impact columns (GATK SNPEFF_* fields)
+###########################################################################
+echo "    effstring.t05...\c"
+echo "anno_id	gene	transcript	impact	impact_so	impact_severity	biotype	is_exonic	is_coding	is_lof
+1	FAM138A	ENST00000417324	downstream	downstream_gene_variant	LOW	protein_coding	0	0	0
+1	OR4F5	ENST00000335137	synonymous_coding	synonymous_variant	LOW	protein_coding	1	1	0
+1	OR4F5	ENST00000335137	non_syn_coding	missense_variant	MED	protein_coding	1	1	0
+1	SAMD11	ENST00000342066	frame_shift	frameshift_variant	HIGH	protein_coding	1	1	1" > exp
+
+gemini query -q "select anno_id, gene, transcript, impact, impact_so, impact_severity, biotype, \
+                    is_exonic, is_coding, is_lof from variants" \
+                    --header \
+                    test.gatk.snpeff.db \
+                    > obs
+check obs exp
+rm obs exp
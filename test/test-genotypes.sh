@@ -217,3 +217,61 @@ gemini query -q "select chrom, end, ref, alt, \
        > obs
 check obs exp
 rm obs exp
+
+
+####################################################################
+# 9. Test reading the genotypes of a database of an earlier version,
+#    stored in its variants table
+####################################################################
+rm -f test.old_genotypes.db
+python -c "import sqlite3, sys; \
+           sqlite3.connect(sys.argv[1]).executescript(open(sys.argv[2]).read())" \
+       test.old_genotypes.db test.old_genotypes.sql
+
+echo "    genotypes.t09...\c"
+echo "chr10	1142207	C/C,C/C,C/C,C/C	3,3,3,3
+chr10	48003991	T/T,C/T,C/T,C/C	3,1,1,0
+chr10	52004314	./.,./.,C/C,C/C	2,2,3,3
+chr10	52497528	./.,C/C,C/C,./.	2,3,3,2
+chr10	126678091	G/G,G/G,G/G,G/A	0,0,0,1
+chr10	135210790	T/T,C/C,C/C,T/T	0,3,3,0
+chr10	135336655	./.,A/A,./.,A/A	2,3,2,3
+chr10	135369531	T/T,T/C,T/C,T/T	0,1,1,0
+chr16	72057434	C/T,C/C,C/C,C/C	1,0,0,0" > exp
+gemini query -q "select chrom, start, gts, gt_types from variants" \
+       test.old_genotypes.db > obs
+check obs exp
+rm obs
+
+
+####################################################################
+# 10. Test moving the genotypes of such a database to the
+#     variant_genotypes table
+####################################################################
+echo "    genotypes.t10...\c"
+echo "Moved the genotypes of 9 variants; vacuuming test.old_genotypes.db." > exp.migrate
+gemini migrate_genotypes test.old_genotypes.db > obs
+check obs exp.migrate
+rm obs exp.migrate
+
+echo "    genotypes.t11...\c"
+gemini query -q "select chrom, start, gts, gt_types from variants" \
+       test.old_genotypes.db > obs
+check obs exp
+rm obs exp
+
+echo "    genotypes.t12...\c"
+echo "1142207	3	29
+52004314	2	-1
+52497528	2	1
+135210790	0	3" > exp
+gemini query -q "select start, gt_types.M10475, gt_depths.M10478 from variants" \
+       --gt-filter "gt_types.M10500 == HOM_ALT" test.old_genotypes.db > obs
+check obs exp
+rm obs exp
+
+echo "    genotypes.t13...\c"
+echo "The genotypes of test.old_genotypes.db are already in the variant_genotypes table." > exp
+gemini migrate_genotypes test.old_genotypes.db > obs
+check obs exp
+rm obs exp
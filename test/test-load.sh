@@ -73,3 +73,181 @@ echo "chr1	1334051	CTAGAG	C" > exp
 gemini query -q "select chrom, start, ref, alt from variants" passonly.db > obs
 check obs exp
 rm obs exp
+
+###########################################################################################
+#5. Test loading a BCF file
+###########################################################################################
+gemini load --skip-gene-tables --test-mode -v test4.vep.snpeff.bcf --skip-gerp-bp --skip-cadd \
+    -t snpEff bcf.db
+
+echo "    load.t5...\c"
+echo "1	chr10	1142207	T	C	WDR37	0	4	1.0	C/C,C/C,C/C,C/C
+2	chr10	48003991	C	T	ASAH2C	2	1	0.5	T/T,C/T,C/T,C/C
+3	chr10	52004314	T	C	ASAH2	0	2	1.0	./.,./.,C/C,C/C
+4	chr10	52497528	G	C	ASAH2B	0	2	1.0	./.,C/C,C/C,./.
+5	chr10	126678091	G	A	CTBP2	1	0	0.125	G/G,G/G,G/G,G/A
+6	chr10	135210790	T	C	MTG1.1	0	2	0.5	T/T,C/C,C/C,T/T
+7	chr10	135336655	G	A	SPRN	0	2	1.0	./.,A/A,./.,A/A
+8	chr10	135369531	T	C	SYCE1	2	0	0.25	T/T,T/C,T/C,T/T
+9	chr16	72057434	C	T	DHODH	1	0	0.125	C/T,C/C,C/C,C/C" > exp
+gemini query -q "select variant_id, chrom, start, ref, alt, gene, num_het, num_hom_alt, aaf, gts \
+                 from variants" bcf.db > obs
+check obs exp
+rm obs
+
+# the parallel load splits the indexed BCF by region
+gemini load --skip-gene-tables --test-mode --cores 2 -v test4.vep.snpeff.bcf --skip-gerp-bp \
+    --skip-cadd -t snpEff bcf.cores.db
+
+echo "    load.t6...\c"
+gemini query -q "select variant_id, chrom, start, ref, alt, gene, num_het, num_hom_alt, aaf, gts \
+                 from variants" bcf.cores.db > obs
+check obs exp
+rm obs exp
+
+###########################################################################################
+#6. Test resuming an interrupted load
+###########################################################################################
+# a load that stopped after the first 5 records of the VCF, with its checkpoint
+# marked incomplete
+grep "^#" test4.vep.snpeff.vcf > test4.first.vcf
+grep -v "^#" test4.vep.snpeff.vcf | head -5 >> test4.first.vcf
+gemini load --skip-gene-tables --test-mode -v test4.first.vcf --skip-gerp-bp --skip-cadd \
+    -t snpEff resume.db
+python -c "import sqlite3, sys; conn = sqlite3.connect(sys.argv[1]); \
+           conn.execute('update load_checkpoint set complete = 0'); conn.commit()" resume.db
+gemini load --skip-gene-tables --test-mode --resume -v test4.vep.snpeff.vcf --skip-gerp-bp \
+    --skip-cadd -t snpEff resume.db
+
+echo "    load.t7...\c"
+echo "1	chr10	1142207	T	C	WDR37	0	4	1.0	C/C,C/C,C/C,C/C
+2	chr10	48003991	C	T	ASAH2C	2	1	0.5	T/T,C/T,C/T,C/C
+3	chr10	52004314	T	C	ASAH2	0	2	1.0	./.,./.,C/C,C/C
+4	chr10	52497528	G	C	ASAH2B	0	2	1.0	./.,C/C,C/C,./.
+5	chr10	126678091	G	A	CTBP2	1	0	0.125	G/G,G/G,G/G,G/A
+6	chr10	135210790	T	C	MTG1.1	0	2	0.5	T/T,C/C,C/C,T/T
+7	chr10	135336655	G	A	SPRN	0	2	1.0	./.,A/A,./.,A/A
+8	chr10	135369531	T	C	SYCE1	2	0	0.25	T/T,T/C,T/C,T/T
+9	chr16	72057434	C	T	DHODH	1	0	0.125	C/T,C/C,C/C,C/C" > exp
+gemini query -q "select variant_id, chrom, start, ref, alt, gene, num_het, num_hom_alt, aaf, gts \
+                 from variants" resume.db > obs
+check obs exp
+rm obs exp
+
+echo "    load.t8...\c"
+echo "sample	num_hom_ref	num_het	num_hom_alt	num_unknown	total
+M10475	3	1	2	3	9
+M10478	2	2	4	1	9
+M10500	2	2	4	1	9
+M128215	4	1	3	1	9" > exp.counts
+gemini stats --gts-by-sample resume.db > obs
+check obs exp.counts
+rm obs exp.counts
+
+# resuming a complete load has nothing left to do
+echo "    load.t9...\c"
+echo "resume.db is already loaded." > exp
+gemini load --skip-gene-tables --test-mode --resume -v test4.vep.snpeff.vcf --skip-gerp-bp \
+    --skip-cadd -t snpEff resume.db | grep "already loaded" > obs
+check obs exp
+rm obs exp
+rm test4.first.vcf
+
+###########################################################################################
+#7. Test appending the variants of a second VCF with the same samples
+###########################################################################################
+grep "^#" test4.vep.snpeff.vcf > test4.first.vcf
+grep -v "^#" test4.vep.snpeff.vcf | head -5 >> test4.first.vcf
+grep "^#" test4.vep.snpeff.vcf > test4.rest.vcf
+grep -v "^#" test4.vep.snpeff.vcf | tail -n +6 >> test4.rest.vcf
+
+gemini load --skip-gene-tables --test-mode -v test4.first.vcf --skip-gerp-bp --skip-cadd \
+    -t snpEff append.db
+gemini load --skip-gene-tables --test-mode --append -v test4.rest.vcf --skip-gerp-bp \
+    --skip-cadd -t snpEff append.db
+
+echo "    load.t10...\c"
+echo "1	chr10	1142207	T	C	WDR37	0	4	1.0	C/C,C/C,C/C,C/C
+2	chr10	48003991	C	T	ASAH2C	2	1	0.5	T/T,C/T,C/T,C/C
+3	chr10	52004314	T	C	ASAH2	0	2	1.0	./.,./.,C/C,C/C
+4	chr10	52497528	G	C	ASAH2B	0	2	1.0	./.,C/C,C/C,./.
+5	chr10	126678091	G	A	CTBP2	1	0	0.125	G/G,G/G,G/G,G/A
+6	chr10	135210790	T	C	MTG1.1	0	2	0.5	T/T,C/C,C/C,T/T
+7	chr10	135336655	G	A	SPRN	0	2	1.0	./.,A/A,./.,A/A
+8	chr10	135369531	T	C	SYCE1	2	0	0.25	T/T,T/C,T/C,T/T
+9	chr16	72057434	C	T	DHODH	1	0	0.125	C/T,C/C,C/C,C/C" > exp
+gemini query -q "select variant_id, chrom, start, ref, alt, gene, num_het, num_hom_alt, aaf, gts \
+                 from variants" append.db > obs
+check obs exp
+rm obs
+
+# the genotype counts of the samples include the appended variants
+echo "    load.t11...\c"
+echo "sample	num_hom_ref	num_het	num_hom_alt	num_unknown	total
+M10475	3	1	2	3	9
+M10478	2	2	4	1	9
+M10500	2	2	4	1	9
+M128215	4	1	3	1	9" > exp.counts
+gemini stats --gts-by-sample append.db > obs
+check obs exp.counts
+rm obs exp.counts
+
+# appending with a parallel load
+gemini load --skip-gene-tables --test-mode -v test4.first.vcf --skip-gerp-bp --skip-cadd \
+    -t snpEff append.cores.db
+gemini load --skip-gene-tables --test-mode --append --cores 2 -v test4.rest.vcf --skip-gerp-bp \
+    --skip-cadd -t snpEff append.cores.db
+
+echo "    load.t12...\c"
+gemini query -q "select variant_id, chrom, start, ref, alt, gene, num_het, num_hom_alt, aaf, gts \
+                 from variants" append.cores.db > obs
+check obs exp
+rm obs exp
+rm test4.first.vcf test4.rest.vcf
+
+###########################################################################################
+#8. Test loading the extra fields of the VEP CSQ field
+###########################################################################################
+gemini load --skip-gene-tables --test-mode -v test.vep.extra.vcf --skip-gerp-bp --skip-cadd \
+    -t VEP vep_extra.db
+
+# CANONICAL is only set for two of the variants: it is NULL for the others
+echo "    load.t13...\c"
+echo "chr10	1142207	WDR37	1	YES
+chr10	48003991	ASAH2C	1	None
+chr10	52004314	ASAH2	1	YES
+chr10	52497528	ASAH2B	1	None
+chr10	126678091	CTBP2	1	None
+chr10	135210790	MTG1	1	None
+chr10	135336655	CYP2E1	1	None
+chr10	135369531	SYCE1	1	None
+chr16	72057434	DHODH	1	None" > exp
+gemini query -q "select chrom, start, gene, vep_allele_num, vep_canonical from variants" \
+    vep_extra.db > obs
+check obs exp
+rm obs
+
+# the extra fields of the chunks of a parallel load
+gemini load --skip-gene-tables --test-mode --cores 2 -v test.vep.extra.vcf --skip-gerp-bp \
+    --skip-cadd -t VEP vep_extra.cores.db
+
+echo "    load.t14...\c"
+gemini query -q "select chrom, start, gene, vep_allele_num, vep_canonical from variants" \
+    vep_extra.cores.db > obs
+check obs exp
+rm obs exp
+
+###########################################################################################
+#9. Test a parallel load of a VCF without variants
+###########################################################################################
+grep "^#" test4.vep.snpeff.vcf > test4.header.vcf
+gemini load --skip-gene-tables --test-mode --cores 2 -v test4.header.vcf --skip-gerp-bp \
+    --skip-cadd -t snpEff header.cores.db
+
+echo "    load.t15...\c"
+echo "0	4" > exp
+gemini query -q "select (select count(*) from variants), (select count(*) from samples)" \
+    header.cores.db > obs
+check obs exp
+rm obs exp
+rm test4.header.vcf
@@ -0,0 +1,82 @@
+###################################################################
+# 1. Test building the genotype matrix of a database
+###################################################################
+cp test.burden.db matrix.burden.db
+
+echo "    matrix.t1...\c"
+echo "Wrote the genotypes of 9 variants to matrix.burden.db.gt." > exp
+gemini build_matrix matrix.burden.db > obs
+check obs exp
+rm obs exp
+
+###################################################################
+# 2. Test high impact burden counts read from the matrix
+###################################################################
+echo "    matrix.t2...\c"
+echo "gene	M10475	M10478	M10500	M128215
+DHODH	1	0	0	0
+WDR37	2	2	2	2
+CTBP2	0	0	0	1" > exp.burden
+gemini burden matrix.burden.db > obs
+check obs exp.burden
+rm obs
+
+###################################################################
+# 3. Test multi-dimensional scaling (mds) read from the matrix
+###################################################################
+gemini load --skip-gene-tables --test-mode -v test5.vep.snpeff.vcf --skip-gerp-bp --skip-cadd \
+    -t snpEff --build-matrix matrix.test5.db > /dev/null
+
+echo "    matrix.t3...\c"
+echo "sample1	sample2	distance
+M10500	M10500	0.0
+M10475	M10475	0.0
+M128215	M10500	2.5
+M10478	M10478	0.0
+M10475	M10500	2.0
+M10500	M128215	2.5
+M10475	M10478	1.25
+M10500	M10475	2.0
+M128215	M10478	1.7143
+M10478	M10500	0.5714
+M10475	M128215	0.5714
+M10478	M128215	1.7143
+M128215	M10475	0.5714
+M128215	M128215	0.0
+M10478	M10475	1.25
+M10500	M10478	0.5714" > exp
+gemini stats --mds matrix.test5.db > obs
+check obs exp
+rm obs exp
+
+###################################################################
+# 4. Test that a matrix is not used once variants are appended
+###################################################################
+grep "^#" test.burden.vcf > burden.first.vcf
+grep -v "^#" test.burden.vcf | head -5 >> burden.first.vcf
+grep "^#" test.burden.vcf > burden.rest.vcf
+grep -v "^#" test.burden.vcf | tail -n +6 >> burden.rest.vcf
+
+gemini load --skip-gene-tables --test-mode -v burden.first.vcf --skip-gerp-bp --skip-cadd \
+    -t VEP -p test.burden.ped --build-matrix matrix.append.db
+gemini load --skip-gene-tables --test-mode --append -v burden.rest.vcf --skip-gerp-bp \
+    --skip-cadd -t VEP matrix.append.db
+
+echo "    matrix.t4...\c"
+echo "WARNING: the genotype matrix of matrix.append.db is out of date and is not used. Run \`gemini build_matrix matrix.append.db\` to rebuild it." > exp
+gemini burden matrix.append.db 2>&1 > /dev/null | grep WARNING > obs
+check obs exp
+rm obs exp
+
+echo "    matrix.t5...\c"
+gemini burden matrix.append.db 2> /dev/null > obs
+check obs exp.burden
+rm obs
+
+echo "    matrix.t6...\c"
+gemini build_matrix matrix.append.db > /dev/null
+gemini burden matrix.append.db > obs
+check obs exp.burden
+rm obs exp.burden
+rm burden.first.vcf burden.rest.vcf
+rm -r ./*.gt
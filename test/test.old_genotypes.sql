@@ -0,0 +1,105 @@
+BEGIN TRANSACTION;
+CREATE TABLE gene_detailed (                          uid integer,                                                           chrom text,                                                            gene text,                                                             is_hgnc bool,                                                          ensembl_gene_id text,                                                  transcript text,                                                       biotype text,                                                          transcript_status text,                                                ccds_id text,                                                          hgnc_id text,                                                          entrez_id text,                                                        cds_length text,                                                       protein_length text,                                                   transcript_start text,                                                 transcript_end text,                                                   strand text,                                                           synonym text,                                                          rvis_pct float,                                                        mam_phenotype_id text,                                                 PRIMARY KEY(uid ASC));
+CREATE TABLE gene_summary (                         uid integer,                                                        chrom text,                                                         gene text,                                                          is_hgnc bool,                                                       ensembl_gene_id text,                                               hgnc_id text,                                                       transcript_min_start text,                                          transcript_max_end text,                                            strand text,                                                        synonym text,                                                       rvis_pct float,                                                     mam_phenotype_id text,                                              in_cosmic_census bool,                                              PRIMARY KEY(uid ASC));
+CREATE TABLE resources (                      name text,                                                   resource text);
+INSERT INTO "resources" VALUES('1000g','ALL.wgs.integrated_phase1_v3.20101123.snps_indels_sv.sites.2012Oct12.vcf.gz');
+INSERT INTO "resources" VALUES('clinvar','clinvar_20140303.vcf.gz');
+INSERT INTO "resources" VALUES('conserved','29way_pi_lods_elements_12mers.chr_specific.fdr_0.1_with_scores.txt.hg19.merged.bed.gz');
+INSERT INTO "resources" VALUES('cosmic','hg19.cosmic.v67.20131024.gz');
+INSERT INTO "resources" VALUES('cpg_island','hg19.CpG.bed.gz');
+INSERT INTO "resources" VALUES('cse','cse-hiseq-8_4-2013-02-20.bed.gz');
+INSERT INTO "resources" VALUES('cytoband','hg19.cytoband.bed.gz');
+INSERT INTO "resources" VALUES('dbsnp','dbsnp.138.vcf.gz');
+INSERT INTO "resources" VALUES('dgv','hg19.dgv.bed.gz');
+INSERT INTO "resources" VALUES('encode_consensus_segs','encode.6celltypes.consensus.bedg.gz');
+INSERT INTO "resources" VALUES('encode_dnase1','stam.125cells.dnaseI.hg19.bed.gz');
+INSERT INTO "resources" VALUES('encode_tfbs','wgEncodeRegTfbsClusteredV2.cell_count.20130213.bed.gz');
+INSERT INTO "resources" VALUES('esp','ESP6500SI.all.snps_indels.vcf.gz');
+INSERT INTO "resources" VALUES('gerp_elements','hg19.gerp.elements.bed.gz');
+INSERT INTO "resources" VALUES('gms','GRCh37-gms-mappability.vcf.gz');
+INSERT INTO "resources" VALUES('grc','GRC_patch_regions.bed.gz');
+INSERT INTO "resources" VALUES('gwas','hg19.gwas.bed.gz');
+INSERT INTO "resources" VALUES('pfam_domain','hg19.pfam.ucscgenes.bed.gz');
+INSERT INTO "resources" VALUES('recomb','genetic_map_HapMapII_GRCh37.gz');
+INSERT INTO "resources" VALUES('rmsk','hg19.rmsk.bed.gz');
+INSERT INTO "resources" VALUES('segdup','hg19.segdup.bed.gz');
+INSERT INTO "resources" VALUES('vista_enhancers','hg19.vista.enhancers.20131108.bed.gz');
+CREATE TABLE sample_genotype_counts (                      sample_id integer,                                                        num_hom_ref integer,                                                      num_het integer,                                                          num_hom_alt integer,                                                      num_unknown integer,                                                      PRIMARY KEY(sample_id ASC));
+INSERT INTO "sample_genotype_counts" VALUES(0,3,1,2,3);
+INSERT INTO "sample_genotype_counts" VALUES(1,2,2,4,1);
+INSERT INTO "sample_genotype_counts" VALUES(2,2,2,4,1);
+INSERT INTO "sample_genotype_counts" VALUES(3,4,1,3,1);
+CREATE TABLE sample_genotypes (                      sample_id integer,                                                   gt_types BLOB,                                                       PRIMARY KEY(sample_id ASC));
+CREATE TABLE samples (sample_id integer, family_id text default NULL,name text default NULL,paternal_id text default NULL,maternal_id text default NULL,sex text default NULL,phenotype text default NULL,PRIMARY KEY(sample_id ASC));
+INSERT INTO "samples" VALUES(1,NULL,'M10475',NULL,NULL,NULL,NULL);
+INSERT INTO "samples" VALUES(2,NULL,'M10478',NULL,NULL,NULL,NULL);
+INSERT INTO "samples" VALUES(3,NULL,'M10500',NULL,NULL,NULL,NULL);
+INSERT INTO "samples" VALUES(4,NULL,'M128215',NULL,NULL,NULL,NULL);
+CREATE TABLE variant_impacts  (                       variant_id integer,                                                   anno_id integer,                                                      gene text,                                                            transcript text,                                                      is_exonic bool,                                                       is_coding bool,                                                       is_lof bool,                                                          exon text,                                                            codon_change text,                                                    aa_change text,                                                       aa_length text,                                                       biotype text,                                                         impact text,                                                          impact_so text,                                                       impact_severity text,                                                 polyphen_pred text,                                                   polyphen_score float,                                                 sift_pred text,                                                       sift_score float,                                                     PRIMARY KEY(variant_id ASC, anno_id ASC));
+INSERT INTO "variant_impacts" VALUES(1,1,'WDR37','ENST00000436154',0,0,0,NULL,NULL,NULL,'208','protein_coding','downstream','downstream_gene_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(1,2,'WDR37','ENST00000263150',0,0,0,NULL,NULL,NULL,'494','protein_coding','intron','intron_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(1,3,'WDR37','ENST00000358220',0,0,0,NULL,NULL,NULL,'494','protein_coding','intron','intron_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(1,4,'WDR37','ENST00000381329',1,1,1,'exon_10_1142110_1142566','Tga/Cga','*250R','249','protein_coding','stop_loss','stop_lost','HIGH',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(2,1,'ASAH2C','ENST00000420079',1,1,0,'exon_10_48003968_48004056','tGt/tAt','C540Y','610','protein_coding','non_syn_coding','missense_variant','MED',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(2,2,'ASAH2C','ENST00000426610',1,1,0,'exon_10_48003968_48004056','tGt/tAt','C552Y','622','protein_coding','non_syn_coding','missense_variant','MED',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(3,1,'ASAH2','ENST00000374028',0,0,0,NULL,NULL,NULL,'240','protein_coding','intron','intron_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(3,2,'ASAH2','ENST00000329428',0,0,0,NULL,NULL,NULL,'726','protein_coding','intron','intron_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(3,3,'ASAH2','ENST00000447815',0,0,0,NULL,NULL,NULL,'745','protein_coding','intron','intron_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(3,4,'ASAH2','ENST00000395526',0,0,0,NULL,NULL,NULL,'780','protein_coding','intron','intron_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(3,5,'ASAH2','ENST00000443575',0,0,0,NULL,NULL,NULL,'622','protein_coding','upstream','upstream_gene_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(4,1,'ASAH2B','ENST00000185907',0,0,0,NULL,NULL,NULL,'160','protein_coding','upstream','upstream_gene_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(4,2,'ASAH2B','ENST00000374007',0,0,0,NULL,NULL,NULL,'160','protein_coding','upstream','upstream_gene_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(4,3,'ASAH2B','ENST00000374006',0,0,0,NULL,NULL,NULL,'165','protein_coding','upstream','upstream_gene_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(4,4,'ASAH2B','ENST00000483649',0,0,0,NULL,NULL,NULL,NULL,'processed_transcript','upstream','upstream_gene_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(5,1,'ZRANB1','ENST00000359653',0,0,0,NULL,NULL,NULL,'708','protein_coding','downstream','downstream_gene_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(5,2,'CTBP2','ENST00000395705',0,0,0,NULL,NULL,NULL,NULL,'processed_transcript','downstream','downstream_gene_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(5,3,'CTBP2','ENST00000337195',1,1,1,'exon_10_126676421_126678267','Caa/Taa','Q445*','445','protein_coding','stop_gain','stop_gained','HIGH',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(5,4,'CTBP2','ENST00000411419',1,1,1,'exon_10_126677794_126678267','Caa/Taa','Q445*','445','protein_coding','stop_gain','stop_gained','HIGH',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(5,5,'CTBP2','ENST00000494626',1,1,1,'exon_10_126677794_126678267','Caa/Taa','Q445*','445','protein_coding','stop_gain','stop_gained','HIGH',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(5,6,'CTBP2','ENST00000531469',1,1,1,'exon_10_126677794_126678267','Caa/Taa','Q445*','445','protein_coding','stop_gain','stop_gained','HIGH',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(5,7,'CTBP2','ENST00000334808',1,1,1,'exon_10_126677704_126678267','Caa/Taa','Q513*','513','protein_coding','stop_gain','stop_gained','HIGH',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(5,8,'CTBP2','ENST00000309035',1,1,1,'exon_10_126677507_126678267','Caa/Taa','Q985*','985','protein_coding','stop_gain','stop_gained','HIGH',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(6,1,'MTG1.1','ENST00000537620',0,0,0,NULL,NULL,NULL,'226','protein_coding','intron','intron_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(6,2,'MTG1.1','ENST00000432508',0,0,0,NULL,NULL,NULL,'283','protein_coding','intron','intron_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(6,3,'MTG1.1','ENST00000317502',0,0,0,NULL,NULL,NULL,'334','protein_coding','intron','intron_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(6,4,'MTG1','ENST00000468317',0,0,0,NULL,NULL,NULL,'339','protein_coding','intron','intron_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(6,5,'MTG1.1','ENST00000460848',0,0,0,NULL,NULL,NULL,NULL,'processed_transcript','intron','intron_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(6,6,'MTG1.1','ENST00000473735',0,0,0,NULL,NULL,NULL,NULL,'processed_transcript','intron','intron_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(6,7,'MTG1.1','ENST00000477902',0,0,0,NULL,NULL,NULL,NULL,'processed_transcript','intron','intron_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(6,8,'MTG1.1','ENST00000495014',0,0,0,NULL,NULL,NULL,NULL,'processed_transcript','intron','intron_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(6,9,'MTG1.1','ENST00000498334',0,0,0,NULL,NULL,NULL,NULL,'processed_transcript','intron','intron_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(6,10,'MTG1.1','ENST00000498790',0,0,0,NULL,NULL,NULL,NULL,'processed_transcript','intron','intron_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(6,11,'MTG1.1','ENST00000492266',0,0,0,NULL,NULL,NULL,NULL,'processed_transcript','upstream','upstream_gene_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(7,1,'SPRN','ENST00000541506',0,0,0,NULL,NULL,NULL,'151','protein_coding','intron','intron_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(7,2,'CYP2E1','ENST00000463117',0,0,0,NULL,NULL,NULL,'493','protein_coding','intron','intron_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(7,3,'RP11-108K14.4.1','ENST00000356567',0,0,0,NULL,NULL,NULL,'693','protein_coding','intron','intron_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(7,4,'RP11-108K14.4.1','ENST00000488261',0,0,0,NULL,NULL,NULL,NULL,'retained_intron','intron','intron_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(7,5,'CYP2E1','ENST00000418356',0,0,0,NULL,NULL,NULL,'305','protein_coding','upstream','upstream_gene_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(7,6,'CYP2E1','ENST00000421586',0,0,0,NULL,NULL,NULL,'355','protein_coding','upstream','upstream_gene_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(7,7,'CYP2E1','ENST00000252945',0,0,0,NULL,NULL,NULL,'493','protein_coding','upstream','upstream_gene_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(7,8,'CYP2E1','ENST00000541261',0,0,0,NULL,NULL,NULL,'85','protein_coding','upstream','upstream_gene_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(7,9,'CYP2E1','ENST00000477500',0,0,0,NULL,NULL,NULL,NULL,'processed_transcript','upstream','upstream_gene_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(7,10,'CYP2E1','ENST00000480558',0,0,0,NULL,NULL,NULL,NULL,'processed_transcript','upstream','upstream_gene_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(8,1,'SYCE1','ENST00000460441',0,0,0,NULL,NULL,NULL,NULL,'processed_transcript','downstream','downstream_gene_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(8,2,'SYCE1','ENST00000482127',0,0,0,NULL,NULL,NULL,NULL,'processed_transcript','downstream','downstream_gene_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(8,3,'CYP2E1','ENST00000368520',0,0,0,NULL,NULL,NULL,NULL,'retained_intron','exon','exon_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(8,4,'SYCE1','ENST00000479535',0,0,0,NULL,NULL,NULL,NULL,'processed_transcript','exon','exon_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(8,5,'SPRN','ENST00000541506',0,0,0,NULL,NULL,NULL,'151','protein_coding','intron','intron_variant','LOW',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(8,6,'SYCE1','ENST00000368517',1,1,0,'exon_10_135369485_135369551','aAg/aGg','K147R','282','protein_coding','non_syn_coding','missense_variant','MED',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(8,7,'SYCE1','ENST00000432597',1,1,0,'exon_10_135369485_135369551','aAg/aGg','K147R','282','protein_coding','non_syn_coding','missense_variant','MED',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(8,8,'SYCE1','ENST00000303903',1,1,0,'exon_10_135369485_135369551','aAg/aGg','K183R','318','protein_coding','non_syn_coding','missense_variant','MED',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(8,9,'SYCE1','ENST00000343131',1,1,0,'exon_10_135369485_135369551','aAg/aGg','K183R','351','protein_coding','non_syn_coding','missense_variant','MED',NULL,NULL,NULL,NULL);
+INSERT INTO "variant_impacts" VALUES(9,1,'DHODH','ENST00000219240',1,1,0,'exon_16_72057373_72057532','Cgg/Tgg','R346W','395','protein_coding','non_syn_coding','missense_variant','MED',NULL,NULL,NULL,NULL);
+CREATE TABLE variants  (                        chrom text,                                                     start integer,                                                  end integer,                                                    vcf_id text,                                                    variant_id integer,                                             anno_id integer,                                                ref text,                                                       alt text,                                                       qual float,                                                     filter text,                                                    type text,                                                      sub_type text,                                                  gts blob,                                                       gt_types blob,                                                  gt_phases blob,                                                 gt_depths blob,                                                 gt_ref_depths blob,                                             gt_alt_depths blob,                                             gt_quals blob,                                                  call_rate float,                                                in_dbsnp bool,                                                  rs_ids text default NULL,                                       in_omim bool,                                                   clinvar_sig text default NULL,                                  clinvar_disease_name text default NULL,                         clinvar_dbsource text default NULL,                             clinvar_dbsource_id text default NULL,                          clinvar_origin text default NULL,                               clinvar_dsdb text default NULL,                                 clinvar_dsdbid text default NULL,                               clinvar_disease_acc text default NULL,                          clinvar_in_locus_spec_db bool,                                  clinvar_on_diag_assay bool,                                     pfam_domain text,                                               cyto_band text default NULL,                                    rmsk text default NULL,                                         in_cpg_island bool,                                             in_segdup bool,                                                 is_conserved bool,                                              gerp_bp_score float,                                            gerp_element_pval float,                                        num_hom_ref integer,                                            num_het integer,                                                num_hom_alt integer,                                            num_unknown integer,                                            aaf real,                                                       hwe decimal(2,7),                                               inbreeding_coeff decimal(2,7),                                  pi decimal(2,7),                                                recomb_rate decimal(2,7),                                       gene text,                                                      transcript text,                                                is_exonic bool,                                                 is_coding bool,                                                 is_lof bool,                                                    exon text,                                                      codon_change text,                                              aa_change text,                                                 aa_length text,                                                 biotype text,                                                   impact text default NULL,                                       impact_so text default NULL,                                    impact_severity text,                                           polyphen_pred text,                                             polyphen_score float,                                           sift_pred text,                                                 sift_score float,                                               anc_allele text,                                                rms_bq float,                                                   cigar text,                                                     depth integer default NULL,                                     strand_bias float default NULL,                                 rms_map_qual float default NULL,                                in_hom_run integer default NULL,                                num_mapq_zero integer default NULL,                             num_alleles integer default NULL,                               num_reads_w_dels float default NULL,                            haplotype_score float default NULL,                             qual_depth float default NULL,                                  allele_count integer default NULL,                              allele_bal float default NULL,                                  in_hm2 bool,                                                    in_hm3 bool,                                                    is_somatic,                                                     in_esp bool,                                                    aaf_esp_ea decimal(2,7),                                        aaf_esp_aa decimal(2,7),                                        aaf_esp_all decimal(2,7),                                       exome_chip bool,                                                in_1kg bool,                                                    aaf_1kg_amr decimal(2,7),                                       aaf_1kg_asn decimal(2,7),                                       aaf_1kg_afr decimal(2,7),                                       aaf_1kg_eur decimal(2,7),                                       aaf_1kg_all decimal(2,7),                                       grc text default NULL,                                          gms_illumina float,                                             gms_solid float,                                                gms_iontorrent float,                                           in_cse bool,                                                    encode_tfbs text,                                               encode_dnaseI_cell_count integer,                               encode_dnaseI_cell_list text,                                   encode_consensus_gm12878 text,                                  encode_consensus_h1hesc text,                                   encode_consensus_helas3 text,                                   encode_consensus_hepg2 text,                                    encode_consensus_huvec text,                                    encode_consensus_k562 text,                                     vista_enhancers text,                                           cosmic_ids text,                                                info blob,                                                      cadd_raw float,                                                 cadd_scaled float,                                              PRIMARY KEY(variant_id ASC));
+INSERT INTO "variants" VALUES('chr10',1142207,1142208,NULL,1,4,'T','C',3404.3,NULL,'snp','ts',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432051B7B3378330215B06A78338732D6F8F9F9793303953294247586F238EB3BC35149921E00393F29FD',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432651A7A3378330215B06A78338732D6F8F9F979FD070230E1CD5092D419CAC20C0425497A005F372F33',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B2843225197A3378330215B06A78338732D6F8F9F979FD070230E1CD5092D419CAC2000425497A005DC82F20',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432659A783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192AA0CEC0C0200BC412402C07C425497A0086BB2F70',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432659A783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192AC0C8800A4A92F400805C2EF7',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432659A783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192AA0CAC0C0200BC412402C07C425497A0086952F6E',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432A599783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192AF026709D535ADA1CA775EE2D4E9A31D39C4A92F400D54B35E2',1.0,0,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,0,0,0,NULL,NULL,0,0,4,0,1.0,1,NULL,0,NULL,'WDR37','ENST00000381329',1,1,1,'exon_10_1142110_1142566','Tga/Cga','*250R','249','protein_coding','stop_loss','stop_lost','HIGH',NULL,NULL,NULL,NULL,NULL,NULL,NULL,122,NULL,36.0,0,0,8,0.0,2.6747,27.9,8,NULL,NULL,NULL,NULL,0,NULL,NULL,NULL,0,0,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,0,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,X'78DA6B60F2D3030002D400FF',NULL,NULL);
+INSERT INTO "variants" VALUES('chr10',48003991,48003992,NULL,2,1,'C','T',1047.87,NULL,'snp','ts',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432051B7B3378330215B06A78338732D6F8F9F9793303953294247586F284E8873843917349921E003C3C2A41',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432651A7A3378330215B06A78338732D6F8F9F979FD070230E1CD5092D419CAC2CCC80864E801005F152F2C',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B2843225197A3378330215B06A78338732D6F8F9F979FD070230E1CD5092D419CAC2000425497A005DC82F20',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432659A783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192A20C3C0C0A006C43A406C0EC425497A0087FC2F9B',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432659A783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192AC0000422402C01C4E6405C92A4070083FE2F59',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432659A783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192A20C3C0C02004C4220C105092A4070084472F38',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432A599783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192A20DF9AECC4C0700C8E4B92F400B1103354',1.0,0,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,0,0,0,NULL,NULL,1,2,1,0,0.5,1,0,5.7142857142857139685e-01,NULL,'ASAH2C','ENST00000420079',1,1,0,'exon_10_48003968_48004056','tGt/tAt','C540Y','610','protein_coding','non_syn_coding','missense_variant','MED',NULL,NULL,NULL,NULL,NULL,NULL,NULL,165,NULL,20.94,0,0,8,0.0,4.383,9.53,4,NULL,NULL,NULL,NULL,0,NULL,NULL,NULL,0,0,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,0,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,X'78DA6B60F2D3030002D400FF',NULL,NULL);
+INSERT INTO "variants" VALUES('chr10',52004314,52004315,NULL,3,1,'T','C',40.11,NULL,'snp','ts',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432051B7B3378330215B06A78338732D6F8F9F9793303953294247586F2E8E9EB0191B3BE33109524E90100352529A9',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432651A7A3378330215B06A78338732D6F8F9F979FD070230E1CD5092D419CAC2C4C4CC5C92A407005F2A2F31',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B2843225197A3378330215B06A78338732D6F8F9F979FD070230E1CD5092D419CAC2000425497A005DC82F20',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432659A783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192AF01F0A1819181840B824490F00FBDF36F0',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432659A783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192AF01F0A18A0A024490F00FBCD36EE',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432659A783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192AF01F0A1819181840B824490F00FBDF36F0',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432A599783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192AC0C0D0B01F84AF2F767000E192243D00C3563565',0.5,0,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,0,0,0,NULL,NULL,0,0,2,2,1.0,1,NULL,0,NULL,'ASAH2','ENST00000374028',0,0,0,NULL,NULL,NULL,'240','protein_coding','intron','intron_variant','LOW',NULL,NULL,NULL,NULL,NULL,NULL,NULL,2,NULL,37.0,0,0,4,0.0,0.0,20.06,4,NULL,NULL,NULL,NULL,0,NULL,NULL,NULL,0,0,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,0,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,X'78DA6B60F2D3030002D400FF',NULL,NULL);
+INSERT INTO "variants" VALUES('chr10',52497528,52497529,NULL,4,1,'G','C',33.61,NULL,'snp','tv',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432051B7B3378330215B06A78338732D6F8F9F9793303953294247586F2E8E9EB39EB3B0311905192A40700362129A9',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432651A7A3378330215B06A78338732D6F8F9F979FD070230E1CD5092D419CAC2C4CCCC5492A407005F2C2F31',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B2843225197A3378330215B06A78338732D6F8F9F979FD070230E1CD5092D419CAC2000425497A005DC82F20',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432659A783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192A0062323230308030885D92A40700DC0736F0',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432659A783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192A0062324001885D92A40700DBED36EE',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432659A783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192A0062323230308030885D92A40700DC0736F0',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432A599783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192AC0C0D0B0FFFA6207071006B14B92F400C92E3565',0.5,0,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,0,0,0,NULL,NULL,0,0,2,2,1.0,1,NULL,0,NULL,'ASAH2B','ENST00000185907',0,0,0,NULL,NULL,NULL,'160','protein_coding','upstream','upstream_gene_variant','LOW',NULL,NULL,NULL,NULL,NULL,NULL,NULL,2,NULL,31.58,0,0,4,0.0,0.0,16.81,4,NULL,NULL,NULL,NULL,0,NULL,NULL,NULL,0,0,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,0,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,X'78DA6B60F2D3030002D400FF',NULL,NULL);
+INSERT INTO "variants" VALUES('chr10',126678091,126678092,NULL,5,3,'G','A',89.08,NULL,'snp','ts',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432051B7B3378330215B06A78338732D6F8F9F9793303953294247586F2B8EBBBC3906349921E003A572A17',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432651A7A3378330215B06A78338732D6F8F9F979FD070230E1CD5092D419CAC2C0C0C05892A407005EF92F28',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B2843225197A3378330215B06A78338732D6F8F9F979FD070230E1CD5092D419CAC2000425497A005DC82F20',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432659A783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192AE0CCC0C0C003C47640AC03C425497A0089D42FAF',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432659A783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192AE0C0C0C0C00DC42640AC0CC425497A0088DF2F98',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432659A783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192AC0CCC0C0C008C45C40CC09C425497A00813E2F0D',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432A599783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192AC0C070CCA9F5F54B078F87D14E207649921E00CA6F3562',1.0,0,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,0,0,0,NULL,NULL,3,1,0,0,0.125,7.75096962148031920492e-01,-1.42857142857142793701e-01,0.25,NULL,'CTBP2','ENST00000337195',1,1,1,'exon_10_126676421_126678267','Caa/Taa','Q445*','445','protein_coding','stop_gain','stop_gained','HIGH',NULL,NULL,NULL,NULL,NULL,NULL,NULL,185,NULL,25.32,0,0,8,0.0,3.3843,2.02,1,NULL,NULL,NULL,NULL,0,NULL,NULL,NULL,0,0,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,0,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,X'78DA6B60F2D3030002D400FF',NULL,NULL);
+INSERT INTO "variants" VALUES('chr10',135210790,135210791,NULL,6,1,'T','C',65.41,NULL,'snp','ts',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432051B7B3378330215B06A78338732D6F8F9F9793303953294247586F284E88738EB3B0311905192A407003BC52A41',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432651A7A3378330215B06A78338732D6F8F9F979FD070230E1CD5092D419CAC2C0CC0C64E801005F162F2D',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B2843225197A3378330215B06A78338732D6F8F9F979FD070230E1CD5092D419CAC2000425497A005DC82F20',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432659A783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192AC0C2C0C0C00CC48C50BA24490F0080E22F01',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432659A783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192AC0C28000CC405C92A4070080AA2EFD',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432659A783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192AC00004CC40CCC8000125497A0080812EFA',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432A599783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192AC0C020E0787DF10187EB8B1D1CDE040A389624E90100C4903546',1.0,0,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,0,0,0,NULL,NULL,2,0,2,0,0.5,4.55002659190000269262e-02,NULL,5.7142857142857139685e-01,NULL,'MTG1.1','ENST00000537620',0,0,0,NULL,NULL,NULL,'226','protein_coding','intron','intron_variant','LOW',NULL,NULL,NULL,NULL,NULL,NULL,NULL,11,NULL,35.12,0,0,8,0.0,0.2489,16.35,4,NULL,NULL,NULL,NULL,0,NULL,NULL,NULL,0,0,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,0,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,X'78DA6B60F2D3030002D400FF',NULL,NULL);
+INSERT INTO "variants" VALUES('chr10',135336655,135336656,NULL,7,1,'G','A',38.34,NULL,'snp','ts',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432051B7B3378330215B06A78338732D6F8F9F9793303953294247586F2E8E9EB39EA3B42C892243D00356329A1',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432651A7A3378330215B06A78338732D6F8F9F979FD070230E1CD5092D419CAC2C4CCC45C92A407005F2B2F31',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B2843225197A3378330215B06A78338732D6F8F9F979FD070230E1CD5092D419CAC2000425497A005DC82F20',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432659A783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192A006232323030C0E892243D00EBF336F0',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432659A783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192A00623200018C2E49D20300EBDD36EE',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432659A783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192A006232323030C0E892243D00EBF336F0',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432A599783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192AC0C0D0B0FFFA620707185D92A40700C6423565',0.5,0,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,0,0,0,NULL,NULL,0,0,2,2,1.0,1,NULL,0,NULL,'SPRN','ENST00000541506',0,0,0,NULL,NULL,NULL,'151','protein_coding','intron','intron_variant','LOW',NULL,NULL,NULL,NULL,NULL,NULL,NULL,2,NULL,37.0,4,0,4,0.0,0.0,19.17,4,NULL,NULL,NULL,NULL,0,NULL,NULL,NULL,0,0,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,0,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,X'78DA6B60F2D3030002D400FF',NULL,NULL);
+INSERT INTO "variants" VALUES('chr10',135369531,135369532,NULL,8,6,'T','C',122.62,NULL,'snp','ts',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432051B7B3378330215B06A78338732D6F8F9F9793303953294247586F284E88784E83B83514849921E003D2A2A63',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432651A7A3378330215B06A78338732D6F8F9F979FD070230E1CD5092D419CAC2C0C80864E801005F002F29',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B2843225197A3378330215B06A78338732D6F8F9F979FD070230E1CD5092D419CAC2000425497A005DC82F20',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432659A783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192AA0C1C0C0A000C4A2403C09884B92F4008A062FE5',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432659A783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192AA0C1C0C0200DC4FC403C11884B92F40089722FD9',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432659A783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192AC00004AC500C0225497A0080CB2F00',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432A599783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192A50685BE3B443CEC58981E118189724E90100B99133CB',1.0,0,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,0,0,0,NULL,NULL,2,2,0,0,0.25,5.04985075229027469134e-01,-3.33333333333333259318e-01,4.28571428571428547638e-01,NULL,'SYCE1','ENST00000368517',1,1,0,'exon_10_135369485_135369551','aAg/aGg','K147R','282','protein_coding','non_syn_coding','missense_variant','MED',NULL,NULL,NULL,NULL,NULL,NULL,NULL,239,NULL,36.02,2,0,8,0.0,5.7141,2.31,2,NULL,NULL,NULL,NULL,0,NULL,NULL,NULL,0,0,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,0,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,X'78DA6B60F2D3030002D400FF',NULL,NULL);
+INSERT INTO "variants" VALUES('chr16',72057434,72057435,NULL,9,1,'C','T',572.98,NULL,'snp','ts',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432051B7B3378330215B06A78338732D6F8F9F9793303953294247586F238EB8738EB3B435049921E003A1C2A0E',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432651A7A3378330215B06A78338732D6F8F9F979FD070230E1CD5092D419CAC2C8C00064E801005EFC2F28',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B2843225197A3378330215B06A78338732D6F8F9F979FD070230E1CD5092D419CAC2000425497A005DC82F20',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432659A783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192AE0CEC0C06001C42E40EC08C425497A008D892FFA',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432659A783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192AA0CAC0C06001C4CE40EC08C425497A008AF82FD7',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432659A783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192AA0C800018C50BA24490F0082C72F18',X'78DA6B604ACE2BCD2DA8D44BCE2F4AD5CB2DCD29C94C2C2A4AACE48A2F4A4DCECF2B2E292A4D2EE12A6484A8E2CA4B81C816327933B4863226B50715326B78337AB3B44215A4945416A47215B28432A599783378330215B06A78338732DAF8F9F979FD070230E1CD5092D4192AC0C070CC09199724E90100ABFC3313',1.0,0,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,0,0,0,NULL,NULL,3,1,0,0,0.125,7.75096962148031920492e-01,-1.42857142857142793701e-01,0.25,NULL,'DHODH','ENST00000219240',1,1,0,'exon_16_72057373_72057532','Cgg/Tgg','R346W','395','protein_coding','non_syn_coding','missense_variant','MED',NULL,NULL,NULL,NULL,NULL,NULL,NULL,260,NULL,36.53,0,0,8,0.0,4.5319,8.07,1,NULL,NULL,NULL,NULL,0,NULL,NULL,NULL,0,0,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,0,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,NULL,X'78DA6B60F2D3030002D400FF',NULL,NULL);
+CREATE TABLE version (version text);
+INSERT INTO "version" VALUES('0.9.1');
+COMMIT;